@@ -0,0 +1,332 @@
+import time
+import numpy as np
+from GP_Tree_Addon.SC_Algorithm.tree import Tree
+from GP_Tree_Addon.SC_Algorithm.views import BranchView, LeafView
+
+
+class ArrayTree(Tree):
+    """
+    Space Colonization tree that keeps the branches in contiguous NumPy arrays
+    (structure of arrays) and runs every iteration as batched array operations.
+
+    Unlike Tree, every leaf of an iteration is compared with the branch ends as they
+    were at the beginning of it, so the trees are similar but not identical to the
+    ones obtained with the same random seed on Tree.
+    """
+    # Max number of leaf-branch distances computed at once (bounds the memory use)
+    max_chunk_size = 2 ** 22
+
+    # (m, 3) array with the leaf positions
+    leaf_positions = None
+
+    def __init__(self, n_leaves, branch_length, influence_radius, kill_distance, tree_crown_radius, tree_crown_height,
+                 tree_type, max_iterations, max_thickness, use_spatial_index=False, use_closest_cache=False, seed=None,
+                 stats=None, vectorized_crown=False, crown_volume=None, max_branches=0, max_points=0):
+        """
+        Creates a tree and initializes the leaves (attraction nodes) based on the tree type.
+        See Tree.__init__ for the parameters (use_spatial_index and use_closest_cache are ignored).
+        """
+        super().__init__(n_leaves=n_leaves, branch_length=branch_length, influence_radius=influence_radius,
+                         kill_distance=kill_distance, tree_crown_radius=tree_crown_radius,
+                         tree_crown_height=tree_crown_height, tree_type=tree_type, max_iterations=max_iterations,
+                         max_thickness=max_thickness, use_spatial_index=False, use_closest_cache=False, seed=seed,
+                         stats=stats, vectorized_crown=vectorized_crown, crown_volume=crown_volume,
+                         max_branches=max_branches, max_points=max_points)
+        self.array_rng = np.random.default_rng(self.rng.getrandbits(32))
+        if self.leaf_positions is None:
+            with self.stats.phase("crown"):
+                self.leaf_positions = np.array([tuple(leaf.pos) for leaf in self.leaves],
+                                               dtype=np.float64).reshape(-1, 3)
+
+        # Views of the branch arrays (Tree.branches)
+        self.branches = []
+        self.n_branches = 0
+        self.positions = np.zeros((0, 3), dtype=np.float64)
+        self.directions = np.zeros((0, 3), dtype=np.float64)
+        self.lengths = np.zeros(0, dtype=np.float64)
+        self.thicknesses = np.zeros(0, dtype=np.float64)
+        self.parents = np.zeros(0, dtype=np.int32)
+        self.counts = np.zeros(0, dtype=np.int32)
+        self._children = None
+
+    def add_crown_points(self, points):
+        """
+        Keeps a batch of sampled leaf positions in the leaf array, with views as leaves
+        (no Leaf object per leaf).
+
+        :param points: (n, 3) array with the leaf positions
+        """
+        first_index = 0 if self.leaf_positions is None else len(self.leaf_positions)
+        if self.leaf_positions is None:
+            self.leaf_positions = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        else:
+            self.leaf_positions = np.concatenate((self.leaf_positions, points))
+        self.leaves.extend(LeafView(self, index) for index in range(first_index, len(self.leaf_positions)))
+
+    def get_leaf_position(self, index):
+        return self.leaf_positions[index]
+
+    # Branch storage
+    def add_branches(self, positions, directions, lengths, thicknesses, parents):
+        """
+        Appends new branches at the end of the arrays, growing them if needed.
+
+        :param positions: (n, 3) array with the branch positions
+        :param directions: (n, 3) array with the branch growth directions
+        :param lengths: (n,) array with the branch lengths
+        :param thicknesses: (n,) array with the branch thickness
+        :param parents: (n,) array with the parent branch indices (-1 if none)
+        """
+        n_new = len(positions)
+        start = self.n_branches
+        end = start + n_new
+
+        if end > len(self.positions):
+            capacity = max(end, 2 * len(self.positions), 64)
+            self.positions = np.resize(self.positions, (capacity, 3))
+            self.directions = np.resize(self.directions, (capacity, 3))
+            self.lengths = np.resize(self.lengths, capacity)
+            self.thicknesses = np.resize(self.thicknesses, capacity)
+            self.parents = np.resize(self.parents, capacity)
+            self.counts = np.resize(self.counts, capacity)
+
+        self.positions[start:end] = positions
+        self.directions[start:end] = directions
+        self.lengths[start:end] = lengths
+        self.thicknesses[start:end] = thicknesses
+        self.parents[start:end] = parents
+        self.counts[start:end] = 0
+        self.n_branches = end
+        self._children = None
+
+        # Same attributes used by Tree (branches, first_branch)
+        self.branches.extend(BranchView(self, index) for index in range(start, end))
+        self.first_branch = self.branches[0]
+
+    def branch_ends(self):
+        """
+        :return:
+        array ends: (n, 3) array with the end position of every branch
+        """
+        n = self.n_branches
+        return self.positions[:n] + self.lengths[:n, None] * self.directions[:n]
+
+    # Branch access (used by BranchView)
+    def get_branch_position(self, index):
+        return self.positions[index]
+
+    def get_branch_direction(self, index):
+        return self.directions[index]
+
+    def get_branch_length(self, index):
+        return float(self.lengths[index])
+
+    def get_branch_thickness(self, index):
+        return float(self.thicknesses[index])
+
+    def get_branch_parent(self, index):
+        return int(self.parents[index])
+
+    def children_indices(self, index):
+        """
+        Children of a branch, derived from the parent indices.
+
+        :param int index: branch index
+        :return:
+        list children: indices of the children branches
+        """
+        if self._children is None:
+            self._children = [[] for _ in range(self.n_branches)]
+            for child_index, parent_index in enumerate(self.parents[:self.n_branches].tolist()):
+                if parent_index >= 0:
+                    self._children[parent_index].append(child_index)
+        return self._children[index]
+
+    # Tree trunk
+    def create_trunk(self):
+        """
+        Aux method to create the tree's trunk. It keeps growing (creating new branches)
+        towards the same direction (up) until it's close enough to the leaves
+        """
+        position = np.zeros(3)
+        direction = np.array((0.0, 0.0, 1.0))
+        thickness = self.max_thickness
+        parent = -1
+
+        # The trunk never grows over the highest leaf (e.g. a crown below the trunk base)
+        max_height = self.leaf_positions[:, 2].max() + self.influence_radius if len(self.leaf_positions) else 0
+
+        while True:
+            self.add_branches(positions=position[None], directions=direction[None], lengths=[self.branch_length],
+                              thicknesses=[thickness], parents=[parent])
+            distances = np.linalg.norm(self.leaf_positions - position, axis=1)
+            if np.any(distances < self.influence_radius) or position[2] >= max_height:
+                break
+            parent = self.n_branches - 1
+            position = position + direction * self.branch_length
+            thickness = thickness * 0.97
+
+    # Auxiliary method
+    def generate_random_directions(self, n):
+        """
+        Batched version of Tree.generate_random_direction.
+
+        :param int n: number of directions
+        :return:
+        array directions: (n, 3) array of random unit vectors
+        """
+        alpha = self.array_rng.uniform(0, np.pi, n)
+        theta = self.array_rng.uniform(0, 2 * np.pi, n)
+        return np.stack((np.cos(theta) * np.sin(alpha), np.sin(theta) * np.sin(alpha), np.cos(alpha)), axis=1)
+
+    def closest_branches(self, leaf_positions, branch_ends):
+        """
+        For every leaf, looks for the closest branch end. Distances are computed in chunks
+        of leaves so the (leaves x branches) matrix never exceeds max_chunk_size values.
+
+        :param leaf_positions: (m, 3) array with the leaf positions
+        :param branch_ends: (n, 3) array with the branch end positions
+        :return:
+        array closest: (m,) index of the closest branch of each leaf
+        array distances: (m,) distance to that branch
+        """
+        closest = np.empty(len(leaf_positions), dtype=np.int64)
+        distances = np.empty(len(leaf_positions), dtype=np.float64)
+        chunk = max(1, self.max_chunk_size // max(1, len(branch_ends)))
+
+        for start in range(0, len(leaf_positions), chunk):
+            block = leaf_positions[start:start + chunk]
+            block_distances = np.linalg.norm(block[:, None, :] - branch_ends[None, :, :], axis=2)
+            block_closest = np.argmin(block_distances, axis=1)
+            closest[start:start + chunk] = block_closest
+            distances[start:start + chunk] = block_distances[np.arange(len(block)), block_closest]
+
+        return closest, distances
+
+    # Growth limits
+    def duplicate_children(self, growing, new_ends, ends):
+        """
+        Batched version of Tree.duplicates_child.
+
+        :param growing: (k,) sorted indices of the branches that grow a new branch
+        :param new_ends: (k, 3) array with the end positions of the new branches
+        :param ends: (n, 3) array with the end position of every branch
+        :return:
+        array duplicate: (k,) boolean array, True for the new branches that are duplicates
+        """
+        duplicate = np.zeros(len(growing), dtype=bool)
+        parents = self.parents[:len(ends)]
+        children = np.nonzero(np.isin(parents, growing))[0]
+        if len(children) == 0:
+            return duplicate
+
+        rows = np.searchsorted(growing, parents[children])
+        distances = np.linalg.norm(ends[children] - new_ends[rows], axis=1)
+        duplicate[rows[distances < self.duplicate_distance * self.lengths[growing[rows]]]] = True
+        return duplicate
+
+    def budget_mask(self, counts):
+        """
+        Batched version of Tree.apply_budget.
+
+        :param counts: (k,) number of leaves attracting every growing branch, in branch order
+        :return:
+        array keep: (k,) boolean array, True for the branches that can grow
+        """
+        keep = np.ones(len(counts), dtype=bool)
+        budget, _ = self.branch_budget()
+        if budget is None:
+            return keep
+
+        available = max(0, budget - self.n_branches)
+        if len(counts) > available:
+            keep[:] = False
+            keep[np.argsort(-counts, kind="stable")[:available]] = True
+        return keep
+
+    # Main algorithm
+    def generate_tree(self):
+        """
+        Core of the Space Colonization algorithm, with batched array operations.
+        :return:
+        True if the tree has been correctly generated
+        False if there have been some problem while creating the tree
+        """
+        if len(self.leaf_positions) == 0:
+            return False
+
+        for _ in self.grow():
+            pass
+
+        return True
+
+    def grow(self):
+        """
+        Batched version of Tree.grow.
+        :return:
+        Generator of lists with the new branches (views) of every step
+        """
+        with self.stats.phase("trunk"):
+            self.create_trunk()
+        self.stats.set_value("iterations", 0)
+        self.stats.set_value("branches", self.n_branches)
+        self.stats.set_value("unreached_leaves", len(self.leaf_positions))
+        yield list(self.branches)
+
+        leaf_positions = self.leaf_positions
+        leaf_indices = np.arange(len(leaf_positions))
+        n_iterations = 0
+        n_stagnant = 0
+
+        while not self.stop_growth(n_iterations=n_iterations, n_leaves=len(leaf_positions), n_stagnant=n_stagnant):
+            iteration_start = time.perf_counter()
+            n = self.n_branches
+            ends = self.branch_ends()
+            closest, distances = self.closest_branches(leaf_positions, ends)
+
+            # Reached leaves don't attract any branch
+            reached = distances <= self.kill_distance
+            attracting = ~reached
+            closest = closest[attracting]
+
+            # Attraction: sum of the normalized directions towards the leaves
+            attraction = leaf_positions[attracting] - ends[closest]
+            attraction /= np.linalg.norm(attraction, axis=1)[:, None]
+            summed = np.zeros((n, 3))
+            np.add.at(summed, closest, attraction)
+            counts = np.bincount(closest, minlength=n)
+            self.counts[:n] = counts
+
+            with self.stats.phase("pruning"):
+                leaf_positions = leaf_positions[attracting]
+                leaf_indices = leaf_indices[attracting]
+
+            # New branches towards the averaged directions
+            growing = np.nonzero(counts)[0]
+            if len(growing) > 0:
+                averaged = (self.directions[growing] + summed[growing]) / counts[growing, None]
+                averaged /= np.linalg.norm(averaged, axis=1)[:, None]
+                new_directions = averaged + self.generate_random_directions(len(growing)) * 0.1
+
+                # Branches that would grow (almost) over one of their children don't grow again
+                new_ends = ends[growing] + self.lengths[growing, None] * new_directions
+                keep = ~self.duplicate_children(growing, new_ends, ends)
+                self.n_duplicates = self.n_duplicates + int(np.count_nonzero(~keep))
+                keep[keep] = self.budget_mask(counts[growing[keep]])
+                growing = growing[keep]
+                new_directions = new_directions[keep]
+
+                self.add_branches(positions=ends[growing], directions=new_directions, lengths=self.lengths[growing],
+                                  thicknesses=self.thicknesses[growing] * 0.98, parents=growing)
+
+            n_iterations = n_iterations + 1
+            n_stagnant = self.count_stagnant(n_stagnant, n_reached=int(np.count_nonzero(reached)),
+                                             n_new_branches=self.n_branches - n)
+            self.stats.add_time("iterations", time.perf_counter() - iteration_start, iteration=True)
+            self.stats.set_value("iterations", n_iterations)
+            self.stats.set_value("branches", self.n_branches)
+            self.stats.set_value("unreached_leaves", len(leaf_positions))
+            yield self.branches[n:]
+
+        self.counts[:self.n_branches] = 0
+        self.leaves = [self.original_leaves[index] for index in leaf_indices.tolist()]
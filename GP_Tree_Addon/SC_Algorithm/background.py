@@ -0,0 +1,134 @@
+import queue
+import threading
+from GP_Tree_Addon.SC_Algorithm.growth import new_tree
+from GP_Tree_Addon.SC_Algorithm.skeleton import Skeleton
+
+
+class SkeletonJob:
+    """
+    A tree to grow in the background (see SkeletonWorker). The worker thread only writes its
+    progress and its result, so they can be read from any thread.
+    """
+
+    def __init__(self, params, crown_volume=None, stats=None, data=None):
+        """
+        :param dict params: new_tree parameters
+        :param crown_volume: closed volume where the leaves of a MESH tree are sampled (see crown.MeshVolume)
+        :param GrowthStats stats: where the phase timings are recorded (None = not recorded)
+        :param data: anything needed to use the result later (not used by the worker)
+        """
+        self.params = params
+        self.crown_volume = crown_volume
+        self.stats = stats
+        self.data = data
+        self.progress = 0.0
+        self.skeleton = None
+        self.error = None
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        Stops the growth (the job is returned without skeleton).
+        """
+        self.cancelled.set()
+
+
+class SkeletonWorker:
+    """
+    Grows trees one after another in a background thread and returns their skeletons through
+    a result queue, in the same order. The worker thread doesn't use Blender: the thread that
+    submits the jobs gets the finished ones back with poll (and draws them).
+    """
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        # Jobs submitted and not returned yet (only used by the submitting thread)
+        self.pending = []
+        self.thread = None
+
+    def submit(self, job):
+        """
+        Queues a job. Jobs that already have their skeleton (e.g. taken from a cache) are
+        returned without growing them.
+
+        :param SkeletonJob job: tree to grow
+        """
+        self.pending.append(job)
+        if job.skeleton is not None:
+            job.progress = 1.0
+            self.results.put(job)
+            return
+
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="GP Tree skeleton worker", daemon=True)
+            self.thread.start()
+        self.jobs.put(job)
+
+    def poll(self):
+        """
+        :return:
+        list jobs: jobs finished (or cancelled) since the last call
+        """
+        finished = []
+        while True:
+            try:
+                job = self.results.get_nowait()
+            except queue.Empty:
+                return finished
+            self.pending.remove(job)
+            finished.append(job)
+
+    def cancel_all(self):
+        """
+        Cancels every pending job (the running one stops after its current step).
+        """
+        for job in self.pending:
+            job.cancel()
+
+    def run(self):
+        """
+        Worker thread: grows the queued trees until it gets None.
+        """
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+
+            if not job.cancelled.is_set():
+                try:
+                    job.skeleton = self.grow(job)
+                except Exception as error:
+                    job.error = error
+            self.results.put(job)
+
+    @staticmethod
+    def grow(job):
+        """
+        Grows the tree of a job one step at a time, updating its progress.
+
+        :param SkeletonJob job: tree to grow
+        :return:
+        Skeleton skeleton: the tree skeleton (None if it's cancelled or it couldn't be generated)
+        """
+        tree = new_tree(stats=job.stats, crown_volume=job.crown_volume, **job.params)
+        if not tree.leaves:
+            return None
+
+        # The trees usually stop before max_iterations, so the progress is a lower bound
+        n_steps = tree.max_iterations + 1
+        for step, _ in enumerate(tree.grow()):
+            if job.cancelled.is_set():
+                return None
+            job.progress = min(1.0, (step + 1) / n_steps)
+
+        return Skeleton.from_tree(tree)
+
+    def stop(self):
+        """
+        Cancels every pending job and ends the worker thread.
+        """
+        self.cancel_all()
+        if self.thread is not None:
+            self.jobs.put(None)
+            self.thread = None
@@ -0,0 +1,154 @@
+from array import array
+from GP_Tree_Addon.SC_Algorithm.vector import Vector
+from GP_Tree_Addon.SC_Algorithm.views import BranchView
+
+
+class BranchPool:
+    """
+    Branches of a Space Colonization tree, also called "tree nodes" on the original algorithm
+    by Runions et al., stored in typed arrays and identified by their index (creation order).
+    Every branch knows its parent index, the children are derived from them when needed.
+
+    Positions and directions are stored in single precision, like the vectors they come from,
+    so the tree grows exactly as it did with one object per branch.
+
+    The pool is also its own list of branches: indexing or iterating it gives BranchView
+    objects, created on demand, that the drawing code uses like the old Branch objects.
+    """
+
+    def __init__(self):
+        """
+        Creates an empty pool.
+        """
+        self.positions = array('f')
+        self.directions = array('f')
+        self.lengths = array('d')
+        self.thicknesses = array('d')
+        self.parents = array('i')
+        # Number of leaves attracting every branch on the current iteration
+        self.counts = array('i')
+
+        # Directions of the attracted branches before the attraction, to reset them
+        self._base_directions = {}
+        self._children = None
+
+    def add(self, position, direction, parent, length, thickness):
+        """
+        Adds a new branch.
+
+        :param Vector position: branch position
+        :param Vector direction: growth direction of the branch
+        :param int parent: index of the parent branch (-1 for the first one)
+        :param float length: branch length
+        :param float thickness: branch thickness (with drawing purposes)
+        :return:
+        int index: index of the new branch
+        """
+        self.positions.extend(position)
+        self.directions.extend(direction)
+        self.lengths.append(length)
+        self.thicknesses.append(thickness)
+        self.parents.append(parent)
+        self.counts.append(0)
+
+        index = len(self.lengths) - 1
+        if self._children is not None:
+            self._children.append([])
+            if parent >= 0:
+                self._children[parent].append(index)
+
+        return index
+
+    # List of branches (views)
+    def __len__(self):
+        return len(self.lengths)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [BranchView(self, branch_index) for branch_index in range(*index.indices(len(self)))]
+        if index < 0:
+            index = index + len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("branch index out of range")
+        return BranchView(self, index)
+
+    def __iter__(self):
+        return (BranchView(self, index) for index in range(len(self)))
+
+    @property
+    def branches(self):
+        return self
+
+    # Growth
+    def position(self, index):
+        return Vector(self.positions[3 * index:3 * index + 3])
+
+    def direction(self, index):
+        return Vector(self.directions[3 * index:3 * index + 3])
+
+    def set_direction(self, index, direction):
+        self.directions[3 * index:3 * index + 3] = array('f', direction)
+
+    def end(self, index):
+        """
+        :param int index: branch index
+        :return:
+        Vector end: end position of the branch (with its current direction)
+        """
+        return self.position(index) + self.lengths[index] * self.direction(index)
+
+    def attract(self, index, direction):
+        """
+        Adds the (normalized) direction towards a leaf to a branch direction.
+
+        :param int index: branch index
+        :param Vector direction: normalized direction towards the leaf
+        """
+        branch_direction = self.direction(index)
+        if self.counts[index] == 0:
+            self._base_directions[index] = branch_direction
+        self.set_direction(index, branch_direction + direction)
+        self.counts[index] = self.counts[index] + 1
+
+    def reset(self, index):
+        """
+        Clears the count and restores the direction of an attracted branch, used to
+        calculate the new branch's average direction on the main algorithm.
+
+        :param int index: branch index
+        """
+        base_direction = self._base_directions.pop(index, None)
+        if base_direction is not None:
+            self.set_direction(index, base_direction)
+        self.counts[index] = 0
+
+    # Branch access (used by BranchView)
+    def get_branch_position(self, index):
+        return self.positions[3 * index:3 * index + 3]
+
+    def get_branch_direction(self, index):
+        return self.directions[3 * index:3 * index + 3]
+
+    def get_branch_length(self, index):
+        return self.lengths[index]
+
+    def get_branch_thickness(self, index):
+        return self.thicknesses[index]
+
+    def get_branch_parent(self, index):
+        return self.parents[index]
+
+    def children_indices(self, index):
+        """
+        Children of a branch, derived from the parent indices.
+
+        :param int index: branch index
+        :return:
+        list children: indices of the children branches
+        """
+        if self._children is None:
+            self._children = [[] for _ in range(len(self))]
+            for child_index, parent_index in enumerate(self.parents):
+                if parent_index >= 0:
+                    self._children[parent_index].append(child_index)
+        return self._children[index]
@@ -0,0 +1,29 @@
+def get_branch_chains(first_branch):
+    """
+    Splits the branches of a tree into chains: lists of consecutive branches
+    without forks (every branch of a chain, but the last one, has exactly one child).
+    A new chain starts on every child of a fork.
+
+    :param first_branch: root branch of the tree (any object with a children list)
+    :return:
+    list chains: lists of branches, from the root to the tips (depth-first order)
+    """
+    chains = []
+    if first_branch is None:
+        return chains
+
+    pending = [first_branch]
+    while pending:
+        branch = pending.pop()
+        chain = [branch]
+
+        children = branch.children
+        while len(children) == 1:
+            branch = children[0]
+            chain.append(branch)
+            children = branch.children
+
+        chains.append(chain)
+        pending.extend(reversed(children))
+
+    return chains
@@ -0,0 +1,117 @@
+import numpy as np
+
+
+def sample_spherical_crown(rng, n_points, sphere_radius, cloud_centre):
+    """
+    Batched version of Tree.create_spherical_points_cloud.
+
+    :param rng: NumPy random generator
+    :param int n_points: number of points (leaves)
+    :param float sphere_radius: max radius for the cloud
+    :param cloud_centre: position of the 3D space where the cloud should be
+    :return:
+    array points: (n, 3) array with the point positions
+    """
+    radius = rng.uniform(0.3, 0.7, n_points) * sphere_radius
+    alpha = rng.uniform(0, np.pi, n_points)
+    theta = rng.uniform(0, 2 * np.pi, n_points)
+
+    points = np.stack((radius * np.cos(theta) * np.sin(alpha),
+                       radius * np.sin(theta) * np.sin(alpha),
+                       radius * np.cos(alpha)), axis=1)
+    return points + np.asarray(cloud_centre, dtype=np.float64)
+
+
+def sample_oblate_crown(rng, n_points, sphere_radius, cloud_centre):
+    """
+    Batched version of Tree.create_oblate_points_cloud.
+
+    :param rng: NumPy random generator
+    :param int n_points: number of points (leaves)
+    :param float sphere_radius: max radius for the cloud
+    :param cloud_centre: position of the 3D space where the cloud should be
+    :return:
+    array points: (n, 3) array with the point positions
+    """
+    radius = rng.uniform(0.3, 0.7, n_points) * sphere_radius
+    alpha = rng.uniform(0, np.pi, n_points)
+    theta = rng.uniform(0, 2 * np.pi, n_points)
+    eta = rng.uniform(0.3, 0.7, n_points)
+
+    points = np.stack((radius * np.cosh(eta) * np.cos(theta) * np.sin(alpha),
+                       radius * np.cosh(eta) * np.sin(theta) * np.sin(alpha),
+                       radius * np.sinh(eta) * np.cos(alpha)), axis=1)
+    return points + np.asarray(cloud_centre, dtype=np.float64)
+
+
+def sample_volume_crown(rng, n_points, volume, max_rounds=50):
+    """
+    Samples points inside a closed volume by rejection: batches of random points inside its
+    bounding box are tested at once, and the batch size follows the acceptance ratio.
+
+    :param rng: NumPy random generator
+    :param int n_points: number of points (leaves)
+    :param volume: crown volume (bounds attribute and contains method, see MeshVolume)
+    :param int max_rounds: max number of batches (fewer points are returned if the volume is too thin)
+    :return:
+    array points: (n, 3) array with the point positions
+    """
+    bounds_min, bounds_max = volume.bounds
+    found = []
+    n_found = 0
+    batch_size = 2 * n_points + 64
+
+    for _ in range(max_rounds):
+        if n_found >= n_points:
+            break
+        candidates = rng.uniform(bounds_min, bounds_max, (batch_size, 3))
+        inside = candidates[volume.contains(candidates)]
+        found.append(inside)
+        n_found = n_found + len(inside)
+
+        acceptance = max(len(inside) / batch_size, 0.01)
+        batch_size = int((n_points - n_found) / acceptance * 1.2) + 64
+
+    if not found:
+        return np.zeros((0, 3))
+    return np.concatenate(found)[:n_points]
+
+
+class MeshVolume:
+    """
+    Closed mesh used as a tree crown. Points are inside when the closest surface point
+    faces away from them (BVHTree nearest point and its normal).
+    """
+
+    def __init__(self, vertices, polygons):
+        """
+        Creates the crown volume (and its BVHTree) from the mesh geometry.
+
+        :param vertices: (n, 3) array with the vertex positions
+        :param polygons: vertex indices of every polygon
+        """
+        # Only this crown type needs mathutils (Blender)
+        from mathutils.bvhtree import BVHTree
+
+        vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+        self.bvh = BVHTree.FromPolygons(vertices.tolist(), polygons)
+        self.bounds = (vertices.min(axis=0), vertices.max(axis=0))
+
+    def contains(self, points):
+        """
+        Inside/outside test of a batch of points.
+
+        :param points: (n, 3) array with the point positions
+        :return:
+        array inside: (n,) boolean array, True for the points inside the mesh
+        """
+        inside = np.zeros(len(points), dtype=bool)
+        find_nearest = self.bvh.find_nearest
+
+        for index, (x, y, z) in enumerate(points.tolist()):
+            location, normal, _, _ = find_nearest((x, y, z))
+            if location is not None:
+                inside[index] = (location[0] - x) * normal[0] + (location[1] - y) * normal[1] + \
+                                (location[2] - z) * normal[2] > 0
+
+        return inside
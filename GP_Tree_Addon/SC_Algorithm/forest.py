@@ -0,0 +1,91 @@
+import os
+import math
+import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from GP_Tree_Addon.SC_Algorithm.growth import grow_skeleton
+
+
+def scatter_trees(count, area_size, n_leaves_range, tree_crown_radius_range, trunk_length_range, rng=random):
+    """
+    Places trees randomly on a square area and picks their parameters from the given ranges.
+
+    :param int count: number of trees
+    :param float area_size: side of the square area (centred on the origin)
+    :param tuple n_leaves_range: (min, max) number of leaves
+    :param tuple tree_crown_radius_range: (min, max) tree crown size
+    :param tuple trunk_length_range: (min, max) trunk length
+    :param rng: random number generator (random module or random.Random)
+    :return:
+    list locations: (x, y) position of every tree
+    list params: parameters of every tree (n_leaves, tree_crown_radius, trunk_length, seed)
+    """
+    locations = []
+    params = []
+
+    for i in range(count):
+        locations.append((rng.uniform(-area_size / 2, area_size / 2), rng.uniform(-area_size / 2, area_size / 2)))
+
+        trunk_length = rng.uniform(*trunk_length_range)
+        # The crown can't be bigger than the trunk (same rule as the add-on properties)
+        tree_crown_radius = min(rng.uniform(*tree_crown_radius_range), trunk_length)
+
+        params.append({
+            "n_leaves": rng.randint(*n_leaves_range),
+            "tree_crown_radius": tree_crown_radius,
+            "trunk_length": trunk_length,
+            "seed": rng.getrandbits(31)
+        })
+
+    return locations, params
+
+
+def scatter_instances(count, area_size, n_archetypes, scale_range, rng=random):
+    """
+    Places instances of a few archetype trees randomly on a square area, with a random
+    rotation (around the trunk) and scale. Every archetype is used at least once.
+
+    :param int count: number of instances
+    :param float area_size: side of the square area (centred on the origin)
+    :param int n_archetypes: number of archetype trees
+    :param tuple scale_range: (min, max) scale of the instances
+    :param rng: random number generator (random module or random.Random)
+    :return:
+    list instances: (x, y) position, archetype index, rotation (radians) and scale of every instance
+    """
+    instances = []
+
+    for i in range(count):
+        location = (rng.uniform(-area_size / 2, area_size / 2), rng.uniform(-area_size / 2, area_size / 2))
+        archetype = i if i < n_archetypes else rng.randrange(n_archetypes)
+        instances.append((location, archetype, rng.uniform(0, 2 * math.pi), rng.uniform(*scale_range)))
+
+    return instances
+
+
+def grow_skeletons(params_list, max_workers=None):
+    """
+    Grows several trees in parallel, in a pool of worker processes, and returns their skeletons.
+    If the pool can't be used (e.g. the platform doesn't allow it), the trees are grown here.
+
+    :param list params_list: grow_skeleton parameters of every tree
+    :param int max_workers: max number of worker processes (None = number of CPU cores)
+    :return:
+    list skeletons: skeleton of every tree, in the same order (None if it couldn't be generated)
+    bool parallel: True if the trees have been grown in the pool
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(params_list)))
+
+    if max_workers > 1:
+        try:
+            # Spawn: the workers must not inherit the state of the parent (e.g. Blender)
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+                return list(executor.map(grow_skeleton, params_list)), True
+        except (OSError, BrokenProcessPool):
+            pass
+
+    return [grow_skeleton(params) for params in params_list], False
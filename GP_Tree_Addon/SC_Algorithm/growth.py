@@ -0,0 +1,90 @@
+from GP_Tree_Addon.SC_Algorithm.tree import Tree
+from GP_Tree_Addon.SC_Algorithm.skeleton import Skeleton
+
+# Must change every time the algorithm changes its output for the same parameters
+# (it's part of the skeleton cache key)
+ALGORITHM_VERSION = 2
+
+# Low resolution previews: a fraction of the leaves and longer branches (fewer iterations)
+PREVIEW_LEAF_RATIO = 0.3
+PREVIEW_BRANCH_LENGTH_SCALE = 2.0
+
+
+def new_tree(engine, n_leaves, tree_crown_radius, trunk_length, tree_type, max_thickness, max_iterations=150,
+             seed=None, stats=None, vectorized_crown=False, crown_volume=None, max_branches=0, max_points=0,
+             branch_length_scale=1.0, drawn_leaves=0):
+    """
+    Creates a Space Colonization tree (not generated yet) from the add-on parameters.
+
+    :param str engine: growth engine ('OBJECT', 'NUMPY' or 'LARGE')
+    :param int n_leaves: number of leaves
+    :param float tree_crown_radius: size of the tree crown
+    :param float trunk_length: length of the trunk (height of the tree crown)
+    :param str tree_type: tree crown type
+    :param float max_thickness: trunk thickness
+    :param int max_iterations: maximum number of iterations allowed
+    :param int seed: random seed of the tree (None = taken from the global random module)
+    :param GrowthStats stats: where the phase timings are recorded (None = not recorded)
+    :param bool vectorized_crown: True to sample all the leaves at once (NumPy)
+    :param crown_volume: closed volume where the leaves of a MESH tree are sampled (see crown.MeshVolume)
+    :param int max_branches: max number of branches (0 = no limit)
+    :param int max_points: max number of stroke points of the drawn tree (0 = no limit)
+    :param float branch_length_scale: scale of the branch length (coarser branches for previews)
+    :param int drawn_leaves: number of leaves drawn as strokes, just used by the LARGE engine (0 = all of them)
+    :return:
+    Tree tree: Space Colonization tree object
+    """
+    branch_length = trunk_length * 0.03 * branch_length_scale
+    influence_radius = trunk_length * 0.47
+
+    large_params = {}
+    if engine == 'LARGE':
+        # NumPy is only needed by the NUMPY and LARGE engines
+        from GP_Tree_Addon.SC_Algorithm.large_tree import LargeTree
+        tree_class = LargeTree
+        large_params["drawn_leaves"] = drawn_leaves
+    elif engine == 'NUMPY':
+        from GP_Tree_Addon.SC_Algorithm.array_tree import ArrayTree
+        tree_class = ArrayTree
+    else:
+        tree_class = Tree
+
+    return tree_class(n_leaves=n_leaves, branch_length=branch_length, influence_radius=influence_radius,
+                      kill_distance=branch_length, tree_crown_radius=tree_crown_radius,
+                      tree_crown_height=trunk_length, tree_type=tree_type, max_iterations=max_iterations,
+                      max_thickness=max_thickness, seed=seed, stats=stats, vectorized_crown=vectorized_crown,
+                      crown_volume=crown_volume, max_branches=max_branches, max_points=max_points, **large_params)
+
+
+def preview_params(params):
+    """
+    Parameters of a low resolution preview of a tree: fewer leaves and coarser branches,
+    so it grows in a fraction of the time.
+
+    :param dict params: new_tree parameters of the tree
+    :return:
+    dict preview: new_tree parameters of the preview
+    """
+    preview = dict(params)
+    preview["n_leaves"] = max(5, int(round(params["n_leaves"] * PREVIEW_LEAF_RATIO)))
+    preview["branch_length_scale"] = params.get("branch_length_scale", 1.0) * PREVIEW_BRANCH_LENGTH_SCALE
+
+    return preview
+
+
+def grow_skeleton(params, stats=None, crown_volume=None):
+    """
+    Grows a tree and returns only its skeleton. It doesn't need Blender, so it can
+    run in a worker process.
+
+    :param dict params: new_tree parameters
+    :param GrowthStats stats: where the phase timings are recorded (None = not recorded)
+    :param crown_volume: closed volume where the leaves of a MESH tree are sampled (see crown.MeshVolume)
+    :return:
+    Skeleton skeleton: the tree skeleton (None if the tree couldn't be generated)
+    """
+    tree = new_tree(stats=stats, crown_volume=crown_volume, **params)
+    if not tree.generate_tree():
+        return None
+
+    return Skeleton.from_tree(tree)
@@ -0,0 +1,150 @@
+import time
+import numpy as np
+from GP_Tree_Addon.SC_Algorithm.array_tree import ArrayTree
+from GP_Tree_Addon.SC_Algorithm.multi_tree import grid_closest
+from GP_Tree_Addon.SC_Algorithm.views import LeafView
+
+
+class LargeTree(ArrayTree):
+    """
+    Space Colonization tree for dense crowns (100k or more attraction points), grown with the
+    same batched operations as ArrayTree, but:
+
+    - the leaf positions are kept in one float32 array, without any view or object per leaf,
+      and the reached leaves are dropped with an alive mask (the array is never rebuilt);
+    - the leaves are processed in chunks of leaf_chunk_size, so the memory used by every
+      iteration is bounded;
+    - every leaf keeps its closest branch between iterations, so only the new branches are
+      searched (through a grid, see multi_tree.grid_closest);
+    - only a subsample of drawn_leaves leaves is drawn (original_leaves).
+    """
+    # Leaves processed at once on every iteration
+    leaf_chunk_size = 2 ** 16
+
+    def __init__(self, n_leaves, branch_length, influence_radius, kill_distance, tree_crown_radius, tree_crown_height,
+                 tree_type, max_iterations, max_thickness, use_spatial_index=False, use_closest_cache=False, seed=None,
+                 stats=None, vectorized_crown=True, crown_volume=None, max_branches=0, max_points=0,
+                 drawn_leaves=5000):
+        """
+        Creates a tree and samples its leaves (always all at once, see Tree.create_batched_tree_crown).
+        See Tree.__init__ for the rest of the parameters (vectorized_crown is ignored).
+
+        :param int drawn_leaves: number of leaves drawn as strokes (0 = all of them)
+        """
+        super().__init__(n_leaves=n_leaves, branch_length=branch_length, influence_radius=influence_radius,
+                         kill_distance=kill_distance, tree_crown_radius=tree_crown_radius,
+                         tree_crown_height=tree_crown_height, tree_type=tree_type, max_iterations=max_iterations,
+                         max_thickness=max_thickness, seed=seed, stats=stats, vectorized_crown=True,
+                         crown_volume=crown_volume, max_branches=max_branches, max_points=max_points)
+
+        # The leaves are sampled at random: evenly spaced indices are a random subsample
+        n_sampled = len(self.leaf_positions)
+        n_drawn = n_sampled if drawn_leaves <= 0 else min(drawn_leaves, n_sampled)
+        self.original_leaves = [LeafView(self, index) for index in (np.arange(n_drawn) * n_sampled // max(1, n_drawn))
+                                .tolist()]
+        self.leaves = self.original_leaves.copy()
+
+    def add_crown_points(self, points):
+        """
+        Keeps a batch of sampled leaf positions in the (float32) leaf array, without views.
+
+        :param points: (n, 3) array with the leaf positions
+        """
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        if self.leaf_positions is None:
+            self.leaf_positions = points
+        else:
+            self.leaf_positions = np.concatenate((self.leaf_positions, points))
+
+    def grow(self):
+        """
+        Chunked version of ArrayTree.grow, with an alive mask of the leaves and their closest
+        branches kept between iterations.
+        :return:
+        Generator of lists with the new branches (views) of every step
+        """
+        with self.stats.phase("trunk"):
+            self.create_trunk()
+        n_leaves = len(self.leaf_positions)
+        self.stats.set_value("iterations", 0)
+        self.stats.set_value("branches", self.n_branches)
+        self.stats.set_value("unreached_leaves", n_leaves)
+        yield list(self.branches)
+
+        alive = np.ones(n_leaves, dtype=bool)
+        closest = np.full(n_leaves, -1, dtype=np.int64)
+        distances = np.full(n_leaves, np.inf)
+        n_alive = n_leaves
+        n_searched = 0
+        n_iterations = 0
+        n_stagnant = 0
+
+        while not self.stop_growth(n_iterations=n_iterations, n_leaves=n_alive, n_stagnant=n_stagnant):
+            iteration_start = time.perf_counter()
+            n = self.n_branches
+            ends = self.branch_ends()
+
+            summed = np.zeros((n, 3))
+            counts = np.zeros(n, dtype=np.int64)
+            n_reached = 0
+
+            for start in range(0, n_leaves, self.leaf_chunk_size):
+                indices = start + np.nonzero(alive[start:start + self.leaf_chunk_size])[0]
+                if len(indices) == 0:
+                    continue
+                positions = self.leaf_positions[indices].astype(np.float64)
+
+                # Only the new branches can be closer than the closest one known
+                if n > n_searched:
+                    new_closest, new_distances = grid_closest(positions, ends[n_searched:],
+                                                              cell_size=max(self.lengths[n_searched:n].max(), 1e-6),
+                                                              known_distances=distances[indices])
+                    closer = new_distances < distances[indices]
+                    closest[indices[closer]] = new_closest[closer] + n_searched
+                    distances[indices[closer]] = new_distances[closer]
+
+                # Reached leaves don't attract any branch
+                reached = distances[indices] <= self.kill_distance
+                alive[indices[reached]] = False
+                n_reached = n_reached + int(np.count_nonzero(reached))
+
+                # Attraction: sum of the normalized directions towards the leaves
+                leaf_closest = closest[indices[~reached]]
+                attraction = positions[~reached] - ends[leaf_closest]
+                attraction /= np.linalg.norm(attraction, axis=1)[:, None]
+                for axis in range(3):
+                    summed[:, axis] += np.bincount(leaf_closest, weights=attraction[:, axis], minlength=n)
+                counts += np.bincount(leaf_closest, minlength=n)
+
+            n_alive = n_alive - n_reached
+            n_searched = n
+            self.counts[:n] = counts
+
+            # New branches towards the averaged directions
+            growing = np.nonzero(counts)[0]
+            if len(growing) > 0:
+                averaged = (self.directions[growing] + summed[growing]) / counts[growing, None]
+                averaged /= np.linalg.norm(averaged, axis=1)[:, None]
+                new_directions = averaged + self.generate_random_directions(len(growing)) * 0.1
+
+                # Branches that would grow (almost) over one of their children don't grow again
+                new_ends = ends[growing] + self.lengths[growing, None] * new_directions
+                keep = ~self.duplicate_children(growing, new_ends, ends)
+                self.n_duplicates = self.n_duplicates + int(np.count_nonzero(~keep))
+                keep[keep] = self.budget_mask(counts[growing[keep]])
+                growing = growing[keep]
+                new_directions = new_directions[keep]
+
+                self.add_branches(positions=ends[growing], directions=new_directions, lengths=self.lengths[growing],
+                                  thicknesses=self.thicknesses[growing] * 0.98, parents=growing)
+
+            n_iterations = n_iterations + 1
+            n_stagnant = self.count_stagnant(n_stagnant, n_reached=n_reached, n_new_branches=self.n_branches - n)
+            self.stats.add_time("iterations", time.perf_counter() - iteration_start, iteration=True)
+            self.stats.set_value("iterations", n_iterations)
+            self.stats.set_value("branches", self.n_branches)
+            self.stats.set_value("unreached_leaves", n_alive)
+            yield self.branches[n:]
+
+        self.counts[:self.n_branches] = 0
+        self.leaves = [leaf for leaf in self.original_leaves if alive[leaf.index]]
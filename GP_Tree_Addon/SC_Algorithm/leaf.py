@@ -9,7 +9,7 @@
 # Blender + Python adaptation by: Ana Gloria Gálvez Mellado
 # ana.gloria.galvez99@gmail.com
 # -----------------------------------------------------------
-from mathutils import Vector
+from GP_Tree_Addon.SC_Algorithm.vector import Vector
 
 
 class Leaf:
@@ -21,6 +21,10 @@ class Leaf:
     pos = Vector((0.0, 0.0, 0.0))
     reached = False
 
+    # Closest branch cache (index in Tree.branches and distance to its end)
+    closest_index = None
+    closest_distance = -1
+
     def __init__(self, position):
         """
         Creates a new leaf.
@@ -28,4 +32,6 @@ class Leaf:
         :param Vector position: leaf position (3D)
         """
         self.pos = position
-        reached = False
+        self.reached = False
+        self.closest_index = None
+        self.closest_distance = -1
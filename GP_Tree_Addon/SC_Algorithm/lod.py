@@ -0,0 +1,141 @@
+from GP_Tree_Addon.SC_Algorithm.chains import get_branch_chains
+
+# (error tolerance, dropped twigs, kept leaves) of every level of detail. The tolerance is a
+# fraction of the mean branch length, the twigs are the given fraction of thinnest branches.
+LOD_LEVELS = ((0.0, 0.0, 1.0), (0.5, 0.3, 0.5), (2.0, 0.6, 0.2))
+
+
+def point_segment_distance(point, start, end):
+    """
+    :param point: x, y, z of the point
+    :param start: x, y, z of the segment start
+    :param end: x, y, z of the segment end
+    :return:
+    float distance: distance from the point to the segment
+    """
+    segment = [b - a for a, b in zip(start, end)]
+    offset = [p - a for a, p in zip(start, point)]
+    squared_length = sum(value * value for value in segment)
+
+    if squared_length > 0:
+        t = max(0.0, min(1.0, sum(a * b for a, b in zip(offset, segment)) / squared_length))
+        offset = [value - t * segment_value for value, segment_value in zip(offset, segment)]
+
+    return sum(value * value for value in offset) ** 0.5
+
+
+def simplify_polyline(points, tolerance):
+    """
+    Ramer-Douglas-Peucker simplification: removes the points of a polyline while the
+    simplified polyline stays closer than the tolerance to every removed point.
+
+    :param list points: x, y, z of every point of the polyline
+    :param float tolerance: max distance from a removed point to the simplified polyline
+    :return:
+    list kept: indices of the kept points (the first and the last one are always kept)
+    """
+    if len(points) < 3 or tolerance <= 0:
+        return list(range(len(points)))
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    pending = [(0, len(points) - 1)]
+
+    while pending:
+        first, last = pending.pop()
+        max_distance = -1.0
+        farthest = None
+        for index in range(first + 1, last):
+            distance = point_segment_distance(points[index], points[first], points[last])
+            if distance > max_distance:
+                max_distance = distance
+                farthest = index
+
+        if farthest is not None and max_distance > tolerance:
+            keep[farthest] = True
+            pending.append((first, farthest))
+            pending.append((farthest, last))
+
+    return [index for index, kept in enumerate(keep) if kept]
+
+
+def build_lod_buffers(tree, tolerance=0.0, min_thickness=0.0):
+    """
+    Build the flat buffers needed to draw a simplified tree: one polyline per chain of branches
+    without forks, without the twigs thinner than min_thickness and simplified with the given
+    error tolerance (see simplify_polyline).
+
+    :param tree: Space Colonization tree (or tree skeleton)
+    :param float tolerance: max distance from the simplified chains to the branch ends
+    :param float min_thickness: thinner branches are not drawn
+    :return:
+    list point_counts: number of points of each stroke
+    list coords: x, y, z coordinates of every point, one after another
+    list pressures: pressure (thickness) of every point
+    """
+    point_counts = []
+    coords = []
+    pressures = []
+
+    for chain in get_branch_chains(tree.first_branch):
+        # Branches are thinner than their parents: the twigs are always at the end of the chains
+        chain = [branch for branch in chain if branch.thickness >= min_thickness]
+        if not chain:
+            continue
+
+        points = [tuple(chain[0].pos)]
+        thicknesses = [chain[0].thickness]
+        for branch in chain:
+            points.append(tuple(branch.pos + branch.direction * branch.length))
+            thicknesses.append(branch.thickness)
+
+        kept = simplify_polyline(points, tolerance)
+        for index in kept:
+            coords.extend(points[index])
+            pressures.append(thicknesses[index])
+        point_counts.append(len(kept))
+
+    return point_counts, coords, pressures
+
+
+def thin_leaves(leaves, ratio):
+    """
+    Keeps a fraction of the leaves, evenly spread over the list (the leaves are sampled at
+    random, so it's a random subset of the crown).
+
+    :param list leaves: tree leaves
+    :param float ratio: fraction of the leaves kept (0 to 1)
+    :return:
+    list leaves: kept leaves
+    """
+    n_kept = int(round(len(leaves) * ratio))
+    if n_kept >= len(leaves):
+        return list(leaves)
+
+    return [leaves[index * len(leaves) // n_kept] for index in range(n_kept)]
+
+
+def get_lod_settings(tree, level):
+    """
+    Absolute simplification settings of a level of detail for a given tree.
+
+    :param tree: Space Colonization tree (or tree skeleton)
+    :param int level: level of detail (index in LOD_LEVELS)
+    :return:
+    float tolerance: error tolerance (see build_lod_buffers)
+    float min_thickness: min branch thickness (see build_lod_buffers)
+    float leaf_ratio: fraction of the leaves kept (see thin_leaves)
+    """
+    tolerance, twig_ratio, leaf_ratio = LOD_LEVELS[level]
+    if not tree.branches:
+        return 0.0, 0.0, leaf_ratio
+
+    lengths = [branch.length for branch in tree.branches]
+    mean_length = sum(lengths) / len(lengths)
+
+    min_thickness = 0.0
+    if twig_ratio > 0:
+        thicknesses = sorted(branch.thickness for branch in tree.branches)
+        min_thickness = thicknesses[min(int(twig_ratio * len(thicknesses)), len(thicknesses) - 1)]
+
+    return tolerance * mean_length, min_thickness, leaf_ratio
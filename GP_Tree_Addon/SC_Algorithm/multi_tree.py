@@ -0,0 +1,485 @@
+import numpy as np
+from array import array
+from GP_Tree_Addon.SC_Algorithm.tree import Tree
+from GP_Tree_Addon.SC_Algorithm.growth import new_tree
+from GP_Tree_Addon.SC_Algorithm.skeleton import Skeleton
+
+# Offsets of the 27 cells around (and including) a grid cell
+NEIGHBOUR_OFFSETS = np.array([(i, j, k) for i in (-1, 0, 1) for j in (-1, 0, 1) for k in (-1, 0, 1)], dtype=np.int64)
+
+
+def brute_force_closest(queries, points, max_chunk_size=2 ** 22):
+    """
+    For every query position, looks for the closest point comparing it with all of them. Distances
+    are computed in chunks of queries so the (queries x points) matrix never exceeds max_chunk_size values.
+
+    :param queries: (m, 3) array with the query positions
+    :param points: (n, 3) array with the point positions (n > 0)
+    :param int max_chunk_size: max number of distances computed at once
+    :return:
+    array closest: (m,) index of the closest point of each query
+    array distances: (m,) distance to that point
+    """
+    closest = np.empty(len(queries), dtype=np.int64)
+    distances = np.empty(len(queries), dtype=np.float64)
+    chunk = max(1, max_chunk_size // max(1, len(points)))
+
+    for start in range(0, len(queries), chunk):
+        block = queries[start:start + chunk]
+        block_distances = np.linalg.norm(block[:, None, :] - points[None, :, :], axis=2)
+        block_closest = np.argmin(block_distances, axis=1)
+        closest[start:start + chunk] = block_closest
+        distances[start:start + chunk] = block_distances[np.arange(len(block)), block_closest]
+
+    return closest, distances
+
+
+class ArrayGrid:
+    """
+    Uniform grid over a set of points, built at once with NumPy (the batched counterpart of
+    SpatialGrid). The points are sorted by cell, so the points of a cell are a contiguous range
+    found with a binary search, and all the queries are answered together.
+    """
+    # Max number of query-point distances computed at once (bounds the memory use)
+    max_chunk_size = 2 ** 22
+
+    def __init__(self, points, cell_size):
+        """
+        Creates the grid of a set of points.
+
+        :param points: (n, 3) array with the point positions (n > 0)
+        :param float cell_size: side of each (cubic) cell
+        """
+        self.points = points
+        self.cell_size = cell_size
+
+        cells = np.floor(points / cell_size).astype(np.int64)
+        # One empty cell around the occupied ones, so the neighbours of any of them are inside the grid
+        self.origin = cells.min(axis=0) - 1
+        self.shape = cells.max(axis=0) - self.origin + 2
+
+        keys = self.cell_keys(cells - self.origin)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+
+    def cell_keys(self, cells):
+        """
+        :param cells: (n, 3) array with cell coordinates, relative to the grid origin
+        :return:
+        array keys: (n,) linear index of every cell
+        """
+        return (cells[:, 0] * self.shape[1] + cells[:, 1]) * self.shape[2] + cells[:, 2]
+
+    def closest(self, queries):
+        """
+        For every query position, looks for the closest point inside the 27 cells around it. Only
+        the points closer than cell_size are sure to be the closest ones (anything outside those
+        cells is, at least, cell_size away), the rest of the queries are left unresolved.
+
+        :param queries: (m, 3) array with the query positions
+        :return:
+        array closest: (m,) index of the closest point of each query (-1 if unresolved)
+        array distances: (m,) distance to that point (inf if unresolved)
+        """
+        closest = np.full(len(queries), -1, dtype=np.int64)
+        distances = np.full(len(queries), np.inf)
+
+        # The 27 cells of every query, one query after another
+        query_cells = np.floor(queries / self.cell_size).astype(np.int64) - self.origin
+        cells = (query_cells[:, None, :] + NEIGHBOUR_OFFSETS[None, :, :]).reshape(-1, 3)
+        inside = np.nonzero(np.all((cells >= 0) & (cells < self.shape), axis=1))[0]
+        keys = self.cell_keys(cells[inside])
+        starts = np.searchsorted(self.keys, keys, side="left")
+        counts = np.searchsorted(self.keys, keys, side="right") - starts
+        rows = inside // len(NEIGHBOUR_OFFSETS)
+
+        # Cells in chunks, so their (query, point of the cell) pairs fit in max_chunk_size
+        occupied = counts > 0
+        rows, starts, counts = rows[occupied], starts[occupied], counts[occupied]
+        cumulative = np.cumsum(counts)
+        bounds = np.searchsorted(cumulative, np.arange(self.max_chunk_size, cumulative[-1] if len(counts) else 0,
+                                                       self.max_chunk_size), side="right")
+        for first, last in zip(np.r_[0, bounds], np.r_[bounds, len(counts)]):
+            if last > first:
+                self.closest_pairs(queries, rows[first:last], starts[first:last], counts[first:last],
+                                   closest, distances)
+
+        unresolved = distances > self.cell_size
+        closest[unresolved] = -1
+        distances[unresolved] = np.inf
+
+        return closest, distances
+
+    def closest_pairs(self, queries, rows, starts, counts, closest, distances):
+        """
+        Compares the queries with the points of some of their neighbour cells, keeping the closest
+        point found so far (ties go to the lowest index, like brute_force_closest).
+
+        :param queries: (m, 3) array with the query positions
+        :param rows: (k,) query of every cell, in query order
+        :param starts: (k,) first (sorted) point of every cell
+        :param counts: (k,) number of points of every cell (> 0)
+        :param closest: (m,) closest point found so far, updated
+        :param distances: (m,) distance to the closest point found so far, updated
+        """
+        rows = np.repeat(rows, counts)
+        ranks = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        candidates = self.order[np.repeat(starts, counts) + ranks]
+        candidate_distances = np.linalg.norm(queries[rows] - self.points[candidates], axis=1)
+
+        # Closest pair of every query (the pairs of a query are contiguous)
+        first_pairs = np.nonzero(np.r_[True, rows[1:] != rows[:-1]])[0]
+        n_pairs = np.diff(np.r_[first_pairs, len(rows)])
+        rows = rows[first_pairs]
+        min_distances = np.minimum.reduceat(candidate_distances, first_pairs)
+        tied = np.where(candidate_distances == np.repeat(min_distances, n_pairs), candidates,
+                        np.iinfo(np.int64).max)
+        best = np.minimum.reduceat(tied, first_pairs)
+
+        better = ((min_distances < distances[rows]) |
+                  ((min_distances == distances[rows]) & (best < closest[rows])))
+        closest[rows[better]] = best[better]
+        distances[rows[better]] = min_distances[better]
+
+
+def grid_closest(queries, points, cell_size, known_distances=None):
+    """
+    For every query position, looks for the closest point: first on a grid of the given cell size,
+    then on coarser grids (2 times bigger cells each time) for the queries that are farther away, and
+    comparing them with every point once the cells cover all the points.
+
+    Queries that already know a point are only searched on the first grid with cells bigger than its
+    distance (a closer point is inside their 27 cells), and the result is only meaningful if it's
+    closer than the known one.
+
+    :param queries: (m, 3) array with the query positions
+    :param points: (n, 3) array with the point positions (n > 0)
+    :param float cell_size: side of the cells of the first grid
+    :param known_distances: (m,) distance to the closest point already known by every query (None = none)
+    :return:
+    array closest: (m,) index of the closest point of each query (-1 if not closer than the known one)
+    array distances: (m,) distance to that point (inf if not closer than the known one)
+    """
+    closest = np.full(len(queries), -1, dtype=np.int64)
+    distances = np.full(len(queries), np.inf)
+    extent = float(np.max(points.max(axis=0) - points.min(axis=0)))
+
+    pending = np.arange(len(queries))
+    while len(pending) > 0 and cell_size < extent:
+        searched = pending
+        if known_distances is not None:
+            searched = pending[(known_distances[pending] <= cell_size) | np.isinf(known_distances[pending])]
+        if len(searched) > 0:
+            grid = ArrayGrid(points, cell_size)
+            closest[searched], distances[searched] = grid.closest(queries[searched])
+
+        resolved = closest[pending] >= 0
+        if known_distances is not None:
+            resolved |= known_distances[pending] <= cell_size
+        pending = pending[~resolved]
+        cell_size = cell_size * 2
+
+    if len(pending) > 0:
+        closest[pending], distances[pending] = brute_force_closest(queries[pending], points)
+
+    return closest, distances
+
+
+class MultiTree:
+    """
+    Several Space Colonization trees competing for one shared cloud of attraction points (leaves).
+    Every leaf attracts the closest branch of any tree, found through one spatial index of every
+    branch end (ArrayGrid), so trees planted close together don't grow through each other.
+
+    The crowns are sampled and the trunks created by each tree (ArrayTree), the growth runs on
+    shared arrays with the same batched operations as ArrayTree.grow.
+    """
+    stagnation_limit = Tree.stagnation_limit
+    duplicate_distance = Tree.duplicate_distance
+
+    def __init__(self, trees, locations, max_iterations=150):
+        """
+        Puts several trees (not generated yet) together.
+
+        :param list trees: ArrayTree objects, with their crown sampled around their own origin
+        :param list locations: (x, y) position of every tree
+        :param int max_iterations: maximum number of iterations allowed
+        """
+        self.trees = trees
+        self.locations = np.array([(x, y, 0.0) for x, y in locations], dtype=np.float64).reshape(-1, 3)
+        self.max_iterations = max_iterations
+        self.stop_reason = None
+        self.n_duplicates = 0
+        self.n_iterations = 0
+
+        # Shared leaves, in world space, with the tree they belong to: the one of their crown, and the
+        # one that reaches them once they are reached
+        self.leaf_positions = np.concatenate(
+            [tree.leaf_positions + location for tree, location in zip(trees, self.locations)] + [np.zeros((0, 3))])
+        self.leaf_trees = np.repeat(np.arange(len(trees)), [len(tree.leaf_positions) for tree in trees])
+
+        self.kill_distances = np.array([tree.kill_distance for tree in trees], dtype=np.float64)
+        self.array_rng = np.random.default_rng([tree.rng.getrandbits(32) for tree in trees])
+
+        # Shared branches, with the tree they belong to
+        self.n_branches = 0
+        self.positions = np.zeros((0, 3), dtype=np.float64)
+        self.directions = np.zeros((0, 3), dtype=np.float64)
+        self.lengths = np.zeros(0, dtype=np.float64)
+        self.thicknesses = np.zeros(0, dtype=np.float64)
+        self.parents = np.zeros(0, dtype=np.int64)
+        self.tree_ids = np.zeros(0, dtype=np.int64)
+
+    def add_branches(self, positions, directions, lengths, thicknesses, parents, tree_ids):
+        """
+        Appends new branches at the end of the shared arrays.
+
+        :param positions: (n, 3) array with the branch positions (world space)
+        :param directions: (n, 3) array with the branch growth directions
+        :param lengths: (n,) array with the branch lengths
+        :param thicknesses: (n,) array with the branch thickness
+        :param parents: (n,) array with the parent branch indices (-1 if none)
+        :param tree_ids: (n,) array with the tree of every branch
+        """
+        n_new = len(positions)
+        start = self.n_branches
+        end = start + n_new
+
+        if end > len(self.positions):
+            capacity = max(end, 2 * len(self.positions), 64)
+            self.positions = np.resize(self.positions, (capacity, 3))
+            self.directions = np.resize(self.directions, (capacity, 3))
+            self.lengths = np.resize(self.lengths, capacity)
+            self.thicknesses = np.resize(self.thicknesses, capacity)
+            self.parents = np.resize(self.parents, capacity)
+            self.tree_ids = np.resize(self.tree_ids, capacity)
+
+        self.positions[start:end] = positions
+        self.directions[start:end] = directions
+        self.lengths[start:end] = lengths
+        self.thicknesses[start:end] = thicknesses
+        self.parents[start:end] = parents
+        self.tree_ids[start:end] = tree_ids
+        self.n_branches = end
+
+    def branch_ends(self):
+        """
+        :return:
+        array ends: (n, 3) array with the end position of every branch
+        """
+        n = self.n_branches
+        return self.positions[:n] + self.lengths[:n, None] * self.directions[:n]
+
+    def create_trunks(self):
+        """
+        Creates the trunk of every tree (each one grows towards its own crown) and moves it to the
+        tree location.
+        """
+        for tree_id, (tree, location) in enumerate(zip(self.trees, self.locations)):
+            tree.create_trunk()
+            n = tree.n_branches
+            parents = tree.parents[:n].astype(np.int64)
+            self.add_branches(positions=tree.positions[:n] + location, directions=tree.directions[:n],
+                              lengths=tree.lengths[:n], thicknesses=tree.thicknesses[:n],
+                              parents=np.where(parents >= 0, parents + self.n_branches, -1),
+                              tree_ids=np.full(n, tree_id))
+
+    def generate_random_directions(self, n):
+        """
+        :param int n: number of directions
+        :return:
+        array directions: (n, 3) array of random unit vectors (see ArrayTree.generate_random_directions)
+        """
+        alpha = self.array_rng.uniform(0, np.pi, n)
+        theta = self.array_rng.uniform(0, 2 * np.pi, n)
+        return np.stack((np.cos(theta) * np.sin(alpha), np.sin(theta) * np.sin(alpha), np.cos(alpha)), axis=1)
+
+    def duplicate_children(self, growing, new_ends, ends):
+        """
+        Checks which new branches would end (almost) where a child of their parent already ends
+        (see ArrayTree.duplicate_children).
+
+        :param growing: (k,) sorted indices of the branches that grow a new branch
+        :param new_ends: (k, 3) array with the end positions of the new branches
+        :param ends: (n, 3) array with the end position of every branch
+        :return:
+        array duplicate: (k,) boolean array, True for the new branches that are duplicates
+        """
+        duplicate = np.zeros(len(growing), dtype=bool)
+        parents = self.parents[:len(ends)]
+        children = np.nonzero(np.isin(parents, growing))[0]
+        if len(children) == 0:
+            return duplicate
+
+        rows = np.searchsorted(growing, parents[children])
+        distances = np.linalg.norm(ends[children] - new_ends[rows], axis=1)
+        duplicate[rows[distances < self.duplicate_distance * self.lengths[growing[rows]]]] = True
+        return duplicate
+
+    def stop_growth(self, n_leaves, n_stagnant):
+        """
+        Checks the stop conditions of the growth (see Tree.stop_growth) and records the first one met.
+
+        :param int n_leaves: leaves not reached yet
+        :param int n_stagnant: iterations in a row without reaching any leaf
+        :return:
+        bool stop: True if the growth must stop
+        """
+        if n_leaves == 0:
+            self.stop_reason = "LEAVES_REACHED"
+        elif n_stagnant >= self.stagnation_limit:
+            self.stop_reason = "STAGNATED"
+        elif self.n_iterations >= self.max_iterations:
+            self.stop_reason = "MAX_ITERATIONS"
+        else:
+            return False
+        return True
+
+    def generate(self):
+        """
+        Grows every tree.
+        :return:
+        True if the trees have been correctly generated
+        False if there are no trees or no leaves
+        """
+        if not self.trees or len(self.leaf_positions) == 0:
+            return False
+
+        for _ in self.grow():
+            pass
+
+        return True
+
+    def grow(self):
+        """
+        Grows every tree at once, one step at a time: the first step creates the trunks and every
+        other one runs an iteration over the shared leaves.
+        :return:
+        Generator of the (first, last + 1) indices of the new branches of every step
+        """
+        self.create_trunks()
+        yield 0, self.n_branches
+
+        leaf_positions = self.leaf_positions
+        leaf_indices = np.arange(len(leaf_positions))
+        n_stagnant = 0
+
+        # Branch ends never move: the closest branch of a leaf only changes if a new branch is closer
+        closest = np.full(len(leaf_positions), -1, dtype=np.int64)
+        distances = np.full(len(leaf_positions), np.inf)
+        n_searched = 0
+
+        while not self.stop_growth(n_leaves=len(leaf_positions), n_stagnant=n_stagnant):
+            n = self.n_branches
+            ends = self.branch_ends()
+            tree_ids = self.tree_ids[:n]
+
+            # Closest branch of any tree, among the new ones (first cells of the size of the longest branch)
+            if n > n_searched:
+                new_closest, new_distances = grid_closest(leaf_positions, ends[n_searched:],
+                                                          cell_size=max(self.lengths[n_searched:n].max(), 1e-6),
+                                                          known_distances=distances)
+                closer = new_distances < distances
+                closest[closer] = new_closest[closer] + n_searched
+                distances[closer] = new_distances[closer]
+                n_searched = n
+
+            # Reached leaves belong to the tree that reaches them, and don't attract any branch
+            reached = distances <= self.kill_distances[tree_ids[closest]]
+            self.leaf_trees[leaf_indices[reached]] = tree_ids[closest[reached]]
+            attracting = ~reached
+
+            # Attraction: sum of the normalized directions towards the leaves
+            leaf_positions = leaf_positions[attracting]
+            leaf_indices = leaf_indices[attracting]
+            closest = closest[attracting]
+            distances = distances[attracting]
+
+            attraction = leaf_positions - ends[closest]
+            attraction /= np.linalg.norm(attraction, axis=1)[:, None]
+            summed = np.zeros((n, 3))
+            np.add.at(summed, closest, attraction)
+            counts = np.bincount(closest, minlength=n)
+
+            # New branches towards the averaged directions, on the tree of their parent
+            growing = np.nonzero(counts)[0]
+            if len(growing) > 0:
+                averaged = (self.directions[growing] + summed[growing]) / counts[growing, None]
+                averaged /= np.linalg.norm(averaged, axis=1)[:, None]
+                new_directions = averaged + self.generate_random_directions(len(growing)) * 0.1
+
+                new_ends = ends[growing] + self.lengths[growing, None] * new_directions
+                keep = ~self.duplicate_children(growing, new_ends, ends)
+                self.n_duplicates = self.n_duplicates + int(np.count_nonzero(~keep))
+                growing = growing[keep]
+
+                self.add_branches(positions=ends[growing], directions=new_directions[keep],
+                                  lengths=self.lengths[growing], thicknesses=self.thicknesses[growing] * 0.98,
+                                  parents=growing, tree_ids=tree_ids[growing])
+
+            self.n_iterations = self.n_iterations + 1
+            n_reached = int(np.count_nonzero(reached))
+            if n_reached > 0:
+                n_stagnant = 0
+            elif self.n_branches == n:
+                n_stagnant = self.stagnation_limit
+            else:
+                n_stagnant = n_stagnant + 1
+            yield n, self.n_branches
+
+    def skeletons(self):
+        """
+        Splits the grown branches and leaves into one skeleton per tree, relative to its location.
+        :return:
+        list skeletons: Skeleton of every tree
+        """
+        n = self.n_branches
+        tree_ids = self.tree_ids[:n]
+        local_indices = np.zeros(n, dtype=np.int64)
+        skeletons = []
+
+        for tree_id, (tree, location) in enumerate(zip(self.trees, self.locations)):
+            indices = np.nonzero(tree_ids == tree_id)[0]
+            local_indices[indices] = np.arange(len(indices))
+            # Parents always belong to the tree of their children
+            parents = self.parents[indices]
+            parents = np.where(parents >= 0, local_indices[np.maximum(parents, 0)], -1)
+
+            skeletons.append(Skeleton(
+                positions=to_array('f', self.positions[indices] - location),
+                directions=to_array('f', self.directions[indices]), lengths=to_array('f', self.lengths[indices]),
+                thicknesses=to_array('f', self.thicknesses[indices]), parents=to_array('i', parents),
+                leaf_positions=to_array('f', self.leaf_positions[self.leaf_trees == tree_id] - location),
+                seed=tree.seed, stop_reason=self.stop_reason))
+
+        return skeletons
+
+
+def to_array(type_code, values):
+    """
+    :param str type_code: 'f' (float32) or 'i' (int32)
+    :param values: NumPy array
+    :return:
+    array values: flat copy of the values as a Python array
+    """
+    result = array(type_code)
+    result.frombytes(np.ascontiguousarray(values, dtype=np.float32 if type_code == 'f' else np.int32).tobytes())
+    return result
+
+
+def grow_competing_skeletons(params_list, locations):
+    """
+    Grows several trees competing for their leaves (see MultiTree) and returns their skeletons.
+
+    :param list params_list: new_tree parameters of every tree (they always grow with the NumPy engine;
+                             max_branches and max_points are not applied)
+    :param list locations: (x, y) position of every tree
+    :return:
+    list skeletons: Skeleton of every tree, relative to its location
+    str stop_reason: why the growth stopped (see tree.STOP_REASONS)
+    """
+    trees = [new_tree(**dict(params, engine='NUMPY')) for params in params_list]
+    multi_tree = MultiTree(trees, locations, max_iterations=max((tree.max_iterations for tree in trees), default=0))
+    multi_tree.generate()
+
+    return multi_tree.skeletons(), multi_tree.stop_reason
@@ -0,0 +1,253 @@
+import os
+import sys
+import mmap
+import struct
+from array import array
+from GP_Tree_Addon.SC_Algorithm.views import BranchView, LeafView
+from GP_Tree_Addon.SC_Algorithm.branch_pool import BranchPool
+
+# Binary skeleton file (little endian):
+#   header: magic, format version, n_branches, n_leaves, seed (padded to HEADER_SIZE bytes)
+#   positions (3n float32), directions (3n float32), lengths (n float32), thicknesses (n float32),
+#   parents (n int32), leaf positions (3m float32)
+MAGIC = b"GPTS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sIIII")
+HEADER_SIZE = 32
+
+# (attribute, array type code, values per branch or leaf), in file order
+BRANCH_ARRAYS = (("positions", 'f', 3), ("directions", 'f', 3), ("lengths", 'f', 1), ("thicknesses", 'f', 1),
+                 ("parents", 'i', 1))
+LEAF_ARRAYS = (("leaf_positions", 'f', 3),)
+
+
+class Skeleton:
+    """
+    Plain data of a grown tree: flat arrays with the branches and the leaves, without any
+    Python object per branch. It can be pickled (e.g. sent back from a worker process) and
+    exposes branches, first_branch and original_leaves views, like Tree, so it can be drawn.
+    """
+
+    def __init__(self, positions, directions, lengths, thicknesses, parents, leaf_positions, seed=0,
+                 stop_reason=None):
+        """
+        Creates a skeleton from flat arrays.
+
+        :param positions: x, y, z position of every branch, one after another
+        :param directions: x, y, z growth direction of every branch, one after another
+        :param lengths: length of every branch
+        :param thicknesses: thickness of every branch
+        :param parents: parent index of every branch (-1 for the first one)
+        :param leaf_positions: x, y, z position of every leaf, one after another
+        :param int seed: random seed the tree was grown with
+        :param str stop_reason: why the growth of the tree stopped (see tree.STOP_REASONS, not saved to files)
+        """
+        self.positions = positions
+        self.directions = directions
+        self.lengths = lengths
+        self.thicknesses = thicknesses
+        self.parents = parents
+        self.leaf_positions = leaf_positions
+        self.seed = seed
+        self.stop_reason = stop_reason
+
+        self._branches = None
+        self._children = None
+
+    @classmethod
+    def from_tree(cls, tree):
+        """
+        Creates a skeleton from a grown tree. The branch arrays are copied at once from the arrays
+        of the tree (BranchPool of Tree, or ArrayTree and LargeTree), only other trees are read
+        branch by branch through their views.
+
+        :param tree: Space Colonization tree
+        :return:
+        Skeleton skeleton: the tree skeleton
+        """
+        n_branches = len(tree.branches)
+        pool = tree.branches if isinstance(tree.branches, BranchPool) else tree
+        if hasattr(pool, "parents"):
+            positions = flat_array('f', pool.positions, 3 * n_branches)
+            directions = flat_array('f', pool.directions, 3 * n_branches)
+            lengths = flat_array('f', pool.lengths, n_branches)
+            thicknesses = flat_array('f', pool.thicknesses, n_branches)
+            parents = flat_array('i', pool.parents, n_branches)
+        else:
+            positions = array('f')
+            directions = array('f')
+            lengths = array('f')
+            thicknesses = array('f')
+            parents = array('i')
+            for branch in tree.branches:
+                positions.extend(branch.pos)
+                directions.extend(branch.direction)
+                lengths.append(branch.length)
+                thicknesses.append(branch.thickness)
+                parents.append(-1 if branch.parent is None else branch.parent.index)
+
+        leaves = tree.original_leaves
+        all_leaf_positions = getattr(tree, "leaf_positions", None)
+        if all_leaf_positions is not None and len(leaves) == len(all_leaf_positions):
+            leaf_positions = flat_array('f', all_leaf_positions, 3 * len(leaves))
+        elif all_leaf_positions is not None and leaves and isinstance(leaves[0], LeafView):
+            # Subsample of the leaf array (the drawn leaves of LargeTree)
+            leaf_positions = flat_array('f', all_leaf_positions[[leaf.index for leaf in leaves]], 3 * len(leaves))
+        else:
+            leaf_positions = array('f')
+            for leaf in leaves:
+                leaf_positions.extend(leaf.pos)
+
+        return cls(positions=positions, directions=directions, lengths=lengths, thicknesses=thicknesses,
+                   parents=parents, leaf_positions=leaf_positions, seed=tree.seed, stop_reason=tree.stop_reason)
+
+    def __getstate__(self):
+        # The views are rebuilt on demand, memory mapped arrays are copied
+        state = self.__dict__.copy()
+        state["_branches"] = None
+        state["_children"] = None
+        for name, type_code, _ in BRANCH_ARRAYS + LEAF_ARRAYS:
+            if not isinstance(state[name], array):
+                state[name] = array(type_code, state[name])
+        return state
+
+    @property
+    def n_branches(self):
+        return len(self.lengths)
+
+    @property
+    def n_leaves(self):
+        return len(self.leaf_positions) // 3
+
+    # Tree-like views
+    @property
+    def branches(self):
+        if self._branches is None:
+            self._branches = [BranchView(self, index) for index in range(self.n_branches)]
+        return self._branches
+
+    @property
+    def first_branch(self):
+        return self.branches[0] if self.n_branches > 0 else None
+
+    @property
+    def original_leaves(self):
+        return [LeafView(self, index) for index in range(self.n_leaves)]
+
+    # Branch access (used by BranchView and LeafView)
+    def get_branch_position(self, index):
+        return self.positions[3 * index:3 * index + 3]
+
+    def get_branch_direction(self, index):
+        return self.directions[3 * index:3 * index + 3]
+
+    def get_branch_length(self, index):
+        return self.lengths[index]
+
+    def get_branch_thickness(self, index):
+        return self.thicknesses[index]
+
+    def get_branch_parent(self, index):
+        return self.parents[index]
+
+    def children_indices(self, index):
+        """
+        Children of a branch, derived from the parent indices.
+
+        :param int index: branch index
+        :return:
+        list children: indices of the children branches
+        """
+        if self._children is None:
+            self._children = [[] for _ in range(self.n_branches)]
+            for child_index, parent_index in enumerate(self.parents):
+                if parent_index >= 0:
+                    self._children[parent_index].append(child_index)
+        return self._children[index]
+
+    def get_leaf_position(self, index):
+        return self.leaf_positions[3 * index:3 * index + 3]
+
+
+def flat_array(type_code, values, n):
+    """
+    :param str type_code: 'f' (float32) or 'i' (int32)
+    :param values: Python array or NumPy array (any shape, e.g. (n, 3) positions)
+    :param int n: number of values to copy
+    :return:
+    array values: flat copy of the first n values
+    """
+    if isinstance(values, array):
+        return array(type_code, values[:n])
+
+    # NumPy arrays are converted without a Python loop (and without importing NumPy here)
+    result = array(type_code)
+    result.frombytes(values.reshape(-1)[:n].astype("float32" if type_code == 'f' else "int32").tobytes())
+    return result
+
+
+def write_skeleton(skeleton, path):
+    """
+    Saves a skeleton as a binary skeleton file. The file is written next to the
+    destination first, so a half-written file never replaces a good one.
+
+    :param Skeleton skeleton: skeleton to save
+    :param str path: file path
+    """
+    temp_path = "{}.{}.tmp".format(path, os.getpid())
+
+    with open(temp_path, "wb") as skeleton_file:
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, skeleton.n_branches, skeleton.n_leaves, skeleton.seed)
+        skeleton_file.write(header.ljust(HEADER_SIZE, b"\0"))
+
+        for name, type_code, _ in BRANCH_ARRAYS + LEAF_ARRAYS:
+            values = array(type_code, getattr(skeleton, name))
+            if sys.byteorder != "little":
+                values.byteswap()
+            values.tofile(skeleton_file)
+
+    os.replace(temp_path, path)
+
+
+def read_skeleton(path, use_mmap=True):
+    """
+    Loads a binary skeleton file. With use_mmap, the arrays are views of a read-only
+    memory map of the file, so nothing is parsed or copied until it's used.
+
+    :param str path: file path
+    :param bool use_mmap: map the file instead of reading it
+    :return:
+    Skeleton skeleton: the loaded skeleton
+    """
+    with open(path, "rb") as skeleton_file:
+        # Empty files can't be mapped
+        if os.fstat(skeleton_file.fileno()).st_size < HEADER_SIZE:
+            raise ValueError("Not a tree skeleton file: {}".format(path))
+        if use_mmap and sys.byteorder == "little":
+            data = memoryview(mmap.mmap(skeleton_file.fileno(), 0, access=mmap.ACCESS_READ))
+        else:
+            data = memoryview(skeleton_file.read())
+
+    if len(data) < HEADER_SIZE:
+        raise ValueError("Not a tree skeleton file: {}".format(path))
+    magic, version, n_branches, n_leaves, seed = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a tree skeleton file: {}".format(path))
+    if version != FORMAT_VERSION:
+        raise ValueError("Unsupported tree skeleton file version: {}".format(version))
+
+    arrays = {}
+    offset = HEADER_SIZE
+    for arrays_info, count in ((BRANCH_ARRAYS, n_branches), (LEAF_ARRAYS, n_leaves)):
+        for name, type_code, size in arrays_info:
+            end = offset + 4 * size * count
+            if end > len(data):
+                raise ValueError("Truncated tree skeleton file: {}".format(path))
+            values = data[offset:end].cast(type_code)
+            if sys.byteorder != "little":
+                values = array(type_code, values)
+                values.byteswap()
+            arrays[name] = values
+            offset = end
+
+    return Skeleton(seed=seed, **arrays)
@@ -0,0 +1,129 @@
+import os
+import hashlib
+from GP_Tree_Addon.SC_Algorithm.growth import ALGORITHM_VERSION
+from GP_Tree_Addon.SC_Algorithm.skeleton import read_skeleton, write_skeleton
+
+
+def skeleton_key(seed, n_leaves, tree_crown_radius, trunk_length, tree_type, max_thickness, engine='OBJECT',
+                 **params):
+    """
+    Content-addressed key of a tree skeleton: hash of everything that changes the grown tree.
+
+    :param int seed: random seed of the tree
+    :param int n_leaves: number of leaves
+    :param float tree_crown_radius: size of the tree crown
+    :param float trunk_length: length of the trunk
+    :param str tree_type: tree crown type
+    :param float max_thickness: trunk thickness
+    :param str engine: growth engine
+    :param params: any other growth parameter (part of the key as well)
+    :return:
+    str key: hexadecimal hash
+    """
+    values = (ALGORITHM_VERSION, seed, n_leaves, tree_crown_radius, trunk_length, tree_type, max_thickness, engine,
+              sorted(params.items()))
+    return hashlib.sha256(repr(values).encode("utf-8")).hexdigest()
+
+
+class SkeletonCache:
+    """
+    On-disk cache of grown tree skeletons, one binary skeleton file per key. The total size
+    is bounded: when it's exceeded, the least recently used skeletons are removed.
+    """
+    extension = ".skel"
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        """
+        Creates (or opens) a cache.
+
+        :param str directory: folder where the skeletons are stored
+        :param int max_bytes: max size of the cache, in bytes
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.extension)
+
+    def get(self, key):
+        """
+        Looks for a skeleton in the cache.
+
+        :param str key: skeleton key
+        :return:
+        Skeleton skeleton: the cached skeleton (None if not found)
+        """
+        path = self.path(key)
+        try:
+            # Read, not mapped: the file may be evicted while the skeleton is still in use
+            skeleton = read_skeleton(path, use_mmap=False)
+            # Last use time, for the LRU eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Damaged or outdated file
+            self.remove(key)
+            return None
+
+        return skeleton
+
+    def put(self, key, skeleton):
+        """
+        Stores a skeleton in the cache and removes the least recently used ones if needed.
+
+        :param str key: skeleton key
+        :param Skeleton skeleton: skeleton to store
+        """
+        write_skeleton(skeleton, self.path(key))
+        self.evict()
+
+    def remove(self, key):
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
+
+    def entries(self):
+        """
+        :return:
+        list entries: (last use time, size, path) of every cached skeleton
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.extension):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """
+        Removes the least recently used skeletons until the cache fits in max_bytes.
+        """
+        entries = sorted(self.entries())
+        total_size = sum(size for _, size, _ in entries)
+
+        for _, size, path in entries:
+            if total_size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size = total_size - size
+
+    def clear(self):
+        """
+        Removes every cached skeleton.
+        """
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,116 @@
+import math
+
+
+class SpatialGrid:
+    """
+    Uniform grid used to speed up the leaf-to-branch searches of the
+    Space Colonization algorithm. Every stored item is an integer index
+    (e.g. the branch index inside Tree.branches) and a position (e.g. the
+    branch end). Cells are cubes of side cell_size, stored sparsely in a dict.
+    """
+
+    def __init__(self, cell_size):
+        """
+        Creates an empty grid.
+
+        :param float cell_size: side of each (cubic) cell
+        """
+        self.cell_size = cell_size
+        self.cells = {}
+        self.min_cell = None
+        self.max_cell = None
+
+    def cell_of(self, position):
+        """
+        Returns the integer coordinates of the cell that contains a position.
+
+        :param Vector position: 3D position
+        :return:
+        tuple cell: (i, j, k) cell coordinates
+        """
+        return (math.floor(position[0] / self.cell_size),
+                math.floor(position[1] / self.cell_size),
+                math.floor(position[2] / self.cell_size))
+
+    def insert(self, index, position):
+        """
+        Stores a new item in the grid.
+
+        :param int index: item identifier (branch index)
+        :param Vector position: item position (branch end)
+        """
+        cell = self.cell_of(position)
+        self.cells.setdefault(cell, []).append((index, position))
+
+        if self.min_cell is None:
+            self.min_cell = cell
+            self.max_cell = cell
+        else:
+            self.min_cell = tuple(min(a, b) for a, b in zip(self.min_cell, cell))
+            self.max_cell = tuple(max(a, b) for a, b in zip(self.max_cell, cell))
+
+    def max_shell(self, cell):
+        """
+        Number of shells needed, starting from a given cell, to cover every
+        occupied cell of the grid.
+
+        :param tuple cell: (i, j, k) cell coordinates
+        :return:
+        int max_shell: Chebyshev distance to the farthest occupied cell corner
+        """
+        if self.min_cell is None:
+            return -1
+        return max(max(abs(c - low), abs(c - high)) for c, low, high in zip(cell, self.min_cell, self.max_cell))
+
+    def shell(self, cell, radius):
+        """
+        Yields the items stored in the cells at an exact Chebyshev distance
+        (in cells) from a given cell, i.e. the surface of a cube of cells.
+
+        :param tuple cell: (i, j, k) centre cell coordinates
+        :param int radius: shell radius, in cells (0 is the centre cell)
+        """
+        i, j, k = cell
+        for di in range(-radius, radius + 1):
+            for dj in range(-radius, radius + 1):
+                if abs(di) == radius or abs(dj) == radius:
+                    dk_values = range(-radius, radius + 1)
+                else:
+                    dk_values = (-radius, radius) if radius > 0 else (0,)
+                for dk in dk_values:
+                    items = self.cells.get((i + di, j + dj, k + dk))
+                    if items:
+                        yield from items
+
+    def nearest_candidates(self, position, best_distance=-1, skip=()):
+        """
+        Searches the grid ring by ring around a position and returns the indices of every
+        item that could be the closest one. The search stops as soon as no item in the
+        unexplored rings can be closer than (or as close as) the best distance found.
+
+        :param Vector position: query position
+        :param float best_distance: best distance already known by the caller (-1 if none)
+        :param skip: indices that must be ignored (the caller evaluates them on its own)
+        :return:
+        list candidates: indices of the items whose distance is not greater than the best one
+        """
+        cell = self.cell_of(position)
+        max_shell = self.max_shell(cell)
+        found = []
+
+        radius = 0
+        while radius <= max_shell:
+            for index, item_position in self.shell(cell, radius):
+                if index in skip:
+                    continue
+                distance = (position - item_position).length
+                found.append((distance, index))
+                if best_distance < 0 or distance < best_distance:
+                    best_distance = distance
+
+            # Anything outside the explored cube is, at least, radius * cell_size away
+            if 0 <= best_distance < radius * self.cell_size:
+                break
+            radius = radius + 1
+
+        return [index for distance, index in found if distance <= best_distance]
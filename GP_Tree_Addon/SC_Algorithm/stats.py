@@ -0,0 +1,121 @@
+import time
+
+# (phase, label) in pipeline order
+PHASES = (("crown", "Crown sampling"), ("trunk", "Trunk growth"), ("iterations", "Colonization"),
+          ("pruning", "Leaf pruning"), ("draw_tree", "Draw branches"), ("draw_leaves", "Draw leaves"))
+
+# (value, label)
+VALUES = (("stop_reason", "Stopped by"), ("iterations", "Iterations"), ("branches", "Branches"),
+          ("duplicate_branches", "Duplicate branches"), ("unreached_leaves", "Unreached leaves"),
+          ("strokes", "Strokes"), ("points", "Points"))
+
+
+class GrowthStats:
+    """
+    Wall time of every phase of a tree generation (crown sampling, trunk, colonization
+    iterations, leaf pruning, drawing) and the size of the result.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.timings = {}
+        self.iteration_times = []
+        self.values = {}
+
+    def phase(self, name):
+        """
+        Context manager that adds the time spent inside it to a phase.
+
+        :param str name: phase name (see PHASES)
+        """
+        return PhaseTimer(self, name)
+
+    def add_time(self, name, seconds, iteration=False):
+        """
+        :param str name: phase name (see PHASES)
+        :param float seconds: time spent
+        :param bool iteration: True if the time is a whole colonization iteration
+        """
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        if iteration:
+            self.iteration_times.append(seconds)
+
+    def set_value(self, name, value):
+        self.values[name] = value
+
+    def summary(self):
+        """
+        :return:
+        list lines: (label, text) of every recorded phase and value, in pipeline order
+        """
+        lines = []
+        if self.values.get("cached"):
+            lines.append(("Tree", "From cache"))
+
+        for name, label in PHASES:
+            if name not in self.timings:
+                continue
+            text = "{:.1f} ms".format(self.timings[name] * 1000)
+            if name == "iterations" and self.iteration_times:
+                text = "{} (max {:.1f} ms)".format(text, max(self.iteration_times) * 1000)
+            lines.append((label, text))
+
+        for name, label in VALUES:
+            if name in self.values:
+                lines.append((label, str(self.values[name])))
+
+        return lines
+
+
+class PhaseTimer:
+    """
+    Context manager used by GrowthStats.phase.
+    """
+    __slots__ = ("stats", "name", "start")
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class NullStats:
+    """
+    Stats that record nothing (the default), so the instrumentation costs almost nothing
+    when the stats are not shown.
+    """
+    enabled = False
+
+    def phase(self, name):
+        return NULL_TIMER
+
+    def add_time(self, name, seconds, iteration=False):
+        pass
+
+    def set_value(self, name, value):
+        pass
+
+    def summary(self):
+        return []
+
+
+class NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_TIMER = NullTimer()
+NULL_STATS = NullStats()
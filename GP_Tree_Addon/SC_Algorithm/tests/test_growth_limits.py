@@ -0,0 +1,132 @@
+"""
+Tests of the growth limits of every engine: the branch and point budgets are never exceeded,
+every stop condition records its stop reason, and no branch grows two children that end
+(almost) at the same point.
+
+Plain Python (no Blender needed):
+    python -m pytest GP_Tree_Addon/SC_Algorithm/tests
+"""
+import os
+import sys
+import unittest
+import functools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from GP_Tree_Addon.SC_Algorithm.growth import new_tree
+from GP_Tree_Addon.SC_Algorithm.tree import STOP_REASONS
+
+ENGINES = ("OBJECT", "NUMPY", "LARGE")
+SEEDS = (0, 1)
+TREE_PARAMS = {"n_leaves": 200, "tree_crown_radius": 0.7, "trunk_length": 1.6, "tree_type": "ROUNDED",
+               "max_thickness": 50}
+
+
+# The complete trees are shared by several tests
+@functools.lru_cache(maxsize=None)
+def grow(engine, seed, **params):
+    """
+    :param str engine: growth engine (see growth.new_tree)
+    :param int seed: random seed of the tree
+    :param params: new_tree parameters that replace the TREE_PARAMS ones
+    :return:
+    tree: the grown tree
+    """
+    tree = new_tree(engine=engine, seed=seed, **dict(TREE_PARAMS, **params))
+    assert tree.generate_tree()
+    return tree
+
+
+def n_points(tree):
+    """
+    :param tree: Space Colonization tree
+    :return:
+    int points: stroke points of the tree drawn with one stroke per branch (2 per branch and per leaf)
+    """
+    return 2 * len(tree.branches) + 2 * len(tree.original_leaves)
+
+
+class GrowthLimitsTest(unittest.TestCase):
+
+    def test_max_branches(self):
+        for engine in ENGINES:
+            for seed in SEEDS:
+                for max_branches in (100, 151):
+                    with self.subTest(engine=engine, seed=seed, max_branches=max_branches):
+                        tree = grow(engine, seed, max_branches=max_branches)
+                        self.assertLessEqual(len(tree.branches), max_branches)
+                        self.assertEqual(tree.stop_reason, "MAX_BRANCHES")
+
+    def test_max_points(self):
+        for engine in ENGINES:
+            for seed in SEEDS:
+                for max_points in (600, 701):
+                    with self.subTest(engine=engine, seed=seed, max_points=max_points):
+                        tree = grow(engine, seed, max_points=max_points)
+                        self.assertLessEqual(n_points(tree), max_points)
+                        self.assertEqual(tree.stop_reason, "MAX_POINTS")
+
+    def test_tightest_budget(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                tree = grow(engine, 0, max_branches=300, max_points=700)
+                self.assertLessEqual(n_points(tree), 700)
+                self.assertEqual(tree.stop_reason, "MAX_POINTS")
+
+                tree = grow(engine, 0, max_branches=120, max_points=1000)
+                self.assertLessEqual(len(tree.branches), 120)
+                self.assertEqual(tree.stop_reason, "MAX_BRANCHES")
+
+    def test_max_iterations(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                tree = grow(engine, 0, max_iterations=5)
+                self.assertEqual(tree.stop_reason, "MAX_ITERATIONS")
+
+    def test_complete_growth(self):
+        for engine in ENGINES:
+            for seed in SEEDS:
+                with self.subTest(engine=engine, seed=seed):
+                    tree = grow(engine, seed)
+                    self.assertIn(tree.stop_reason, ("LEAVES_REACHED", "STAGNATED"))
+                    self.assertEqual(tree.stop_reason == "LEAVES_REACHED", len(tree.leaves) == 0)
+
+    def test_stop_reasons(self):
+        # The first condition met is the recorded one
+        for engine in ENGINES:
+            tree = new_tree(engine=engine, seed=0, **TREE_PARAMS)
+            limit = tree.stagnation_limit
+            cases = (({"n_iterations": 3, "n_leaves": 0, "n_stagnant": 0}, "LEAVES_REACHED"),
+                     ({"n_iterations": 3, "n_leaves": 10, "n_stagnant": limit}, "STAGNATED"),
+                     ({"n_iterations": tree.max_iterations, "n_leaves": 10, "n_stagnant": 0}, "MAX_ITERATIONS"),
+                     ({"n_iterations": tree.max_iterations, "n_leaves": 0, "n_stagnant": limit}, "LEAVES_REACHED"))
+            self.assertIsNone(tree.stop_reason)
+            self.assertFalse(tree.stop_growth(n_iterations=3, n_leaves=10, n_stagnant=0))
+            self.assertIsNone(tree.stop_reason)
+            for arguments, stop_reason in cases:
+                with self.subTest(engine=engine, stop_reason=stop_reason, **arguments):
+                    self.assertTrue(tree.stop_growth(**arguments))
+                    self.assertEqual(tree.stop_reason, stop_reason)
+                    self.assertIn(tree.stop_reason, STOP_REASONS)
+
+    def test_no_duplicate_children(self):
+        n_duplicates = 0
+        for engine in ENGINES:
+            for seed in SEEDS:
+                with self.subTest(engine=engine, seed=seed):
+                    tree = grow(engine, seed)
+                    n_duplicates = n_duplicates + tree.n_duplicates
+                    for branch in tree.branches:
+                        children = branch.children
+                        ends = [child.pos + child.direction * child.length for child in children]
+                        for first in range(len(ends)):
+                            for second in range(first + 1, len(ends)):
+                                self.assertGreaterEqual((ends[first] - ends[second]).length,
+                                                        tree.duplicate_distance * branch.length)
+
+        # The rule has actually dropped some branches
+        self.assertGreater(n_duplicates, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
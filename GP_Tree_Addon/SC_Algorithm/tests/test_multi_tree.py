@@ -0,0 +1,96 @@
+"""
+Tests of the competing trees growth: the grid search must find the same closest points as
+the brute force search, and every grown tree must give one connected skeleton.
+
+Plain Python (no Blender needed):
+    python -m pytest GP_Tree_Addon/SC_Algorithm/tests
+"""
+import os
+import sys
+import unittest
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from GP_Tree_Addon.SC_Algorithm.multi_tree import brute_force_closest, grid_closest, grow_competing_skeletons
+from GP_Tree_Addon.SC_Algorithm.tree import STOP_REASONS
+
+TREE_PARAMS = {"n_leaves": 80, "tree_crown_radius": 0.7, "trunk_length": 1.6, "tree_type": "ROUNDED",
+               "max_thickness": 50}
+
+
+def random_clouds(rng):
+    """
+    :param rng: NumPy random generator
+    :return:
+    Generator of (queries, points, cell size) cases: uniform and clustered clouds, queries inside
+    and far outside the points, a single point
+    """
+    for n_queries, n_points in ((200, 50), (500, 3000), (50, 1)):
+        points = rng.uniform(-1.0, 1.0, (n_points, 3))
+        queries = rng.uniform(-1.5, 1.5, (n_queries, 3))
+        for cell_size in (0.01, 0.1, 0.5):
+            yield queries, points, cell_size
+
+    clusters = rng.uniform(-5.0, 5.0, (4, 3))
+    points = (clusters[rng.integers(0, 4, 2000)] + rng.normal(0.0, 0.05, (2000, 3)))
+    queries = np.concatenate((rng.uniform(-6.0, 6.0, (300, 3)), points[:100] + rng.normal(0.0, 0.01, (100, 3))))
+    yield queries, points, 0.02
+
+
+class GridClosestTest(unittest.TestCase):
+
+    def assertSameClosest(self, closest, distances, expected_closest, expected_distances):
+        self.assertEqual(closest.tolist(), expected_closest.tolist())
+        np.testing.assert_allclose(distances, expected_distances, rtol=1e-12)
+
+    def test_grid_closest(self):
+        rng = np.random.default_rng(0)
+        for case, (queries, points, cell_size) in enumerate(random_clouds(rng)):
+            with self.subTest(case=case, n_queries=len(queries), n_points=len(points), cell_size=cell_size):
+                self.assertSameClosest(*grid_closest(queries, points, cell_size),
+                                       *brute_force_closest(queries, points))
+
+    def test_known_distances(self):
+        # Only the points closer than the known ones are found (the rest are -1 / inf)
+        rng = np.random.default_rng(1)
+        for case, (queries, points, cell_size) in enumerate(random_clouds(rng)):
+            with self.subTest(case=case, n_queries=len(queries), n_points=len(points), cell_size=cell_size):
+                expected_closest, expected_distances = brute_force_closest(queries, points)
+                known_distances = expected_distances * rng.uniform(0.5, 2.0, len(queries))
+                known_distances[rng.random(len(queries)) < 0.2] = np.inf
+
+                closest, distances = grid_closest(queries, points, cell_size, known_distances=known_distances)
+                closer = expected_distances < known_distances
+                self.assertSameClosest(closest[closer], distances[closer], expected_closest[closer],
+                                       expected_distances[closer])
+                # Points that aren't closer than the known ones are never reported as closer
+                found = ~closer & (closest >= 0)
+                self.assertTrue(np.all(distances[found] >= known_distances[found]))
+
+
+class CompetingSkeletonsTest(unittest.TestCase):
+
+    def test_competing_skeletons(self):
+        locations = [(0.0, 0.0), (1.0, 0.0), (0.5, 0.9)]
+        params_list = [dict(TREE_PARAMS, seed=seed) for seed in range(len(locations))]
+        skeletons, stop_reason = grow_competing_skeletons(params_list, locations)
+
+        self.assertIn(stop_reason, STOP_REASONS)
+        self.assertEqual(len(skeletons), len(locations))
+        for seed, skeleton in enumerate(skeletons):
+            with self.subTest(tree=seed):
+                self.assertEqual(skeleton.seed, seed)
+                self.assertGreater(skeleton.n_branches, 0)
+                parents = list(skeleton.parents)
+                # One trunk, and every branch grows from a branch of the same tree created before it
+                self.assertEqual(parents[0], -1)
+                self.assertEqual(parents.count(-1), 1)
+                for index, parent in enumerate(parents[1:], start=1):
+                    self.assertTrue(0 <= parent < index)
+                # The trunk starts at the tree location (the skeletons are relative to it)
+                self.assertEqual(list(skeleton.positions[:3]), [0.0, 0.0, 0.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
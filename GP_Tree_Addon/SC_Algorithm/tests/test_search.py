@@ -0,0 +1,73 @@
+"""
+Equivalence tests of the leaf-to-branch search accelerations: a tree grown with the spatial index,
+the closest branch cache or both must be the same tree as the one grown with the brute force search.
+
+Plain Python (no Blender needed):
+    python -m pytest GP_Tree_Addon/SC_Algorithm/tests
+"""
+import os
+import sys
+import unittest
+import functools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from GP_Tree_Addon.SC_Algorithm.tree import Tree
+from GP_Tree_Addon.SC_Algorithm.skeleton import Skeleton, BRANCH_ARRAYS, LEAF_ARRAYS
+
+TREE_TYPES = ("ROUNDED", "ELLIPSE", "DOUBLE")
+SEEDS = (0, 1)
+
+
+# The brute force reference of every case is grown only once
+@functools.lru_cache(maxsize=None)
+def grow_skeleton(tree_type, seed, use_spatial_index, use_closest_cache):
+    """
+    Grows a tree with the same parameters as growth.new_tree (OBJECT engine).
+
+    :param str tree_type: tree crown type
+    :param int seed: random seed of the tree
+    :param bool use_spatial_index: see Tree.__init__
+    :param bool use_closest_cache: see Tree.__init__
+    :return:
+    Skeleton skeleton: the tree skeleton
+    """
+    trunk_length = 1.6
+    branch_length = trunk_length * 0.03
+    tree = Tree(n_leaves=60, branch_length=branch_length, influence_radius=trunk_length * 0.47,
+                kill_distance=branch_length, tree_crown_radius=0.7, tree_crown_height=trunk_length,
+                tree_type=tree_type, max_iterations=150, max_thickness=50, use_spatial_index=use_spatial_index,
+                use_closest_cache=use_closest_cache, seed=seed)
+    assert tree.generate_tree()
+    return Skeleton.from_tree(tree)
+
+
+class SearchEquivalenceTest(unittest.TestCase):
+
+    def assertSameSkeleton(self, skeleton, reference):
+        self.assertEqual(skeleton.n_branches, reference.n_branches)
+        self.assertEqual(skeleton.stop_reason, reference.stop_reason)
+        for name, _, _ in BRANCH_ARRAYS + LEAF_ARRAYS:
+            self.assertEqual(list(getattr(skeleton, name)), list(getattr(reference, name)), name)
+
+    def check_search(self, use_spatial_index, use_closest_cache):
+        for tree_type in TREE_TYPES:
+            for seed in SEEDS:
+                with self.subTest(tree_type=tree_type, seed=seed):
+                    reference = grow_skeleton(tree_type, seed, use_spatial_index=False, use_closest_cache=False)
+                    skeleton = grow_skeleton(tree_type, seed, use_spatial_index=use_spatial_index,
+                                             use_closest_cache=use_closest_cache)
+                    self.assertSameSkeleton(skeleton, reference)
+
+    def test_spatial_index(self):
+        self.check_search(use_spatial_index=True, use_closest_cache=False)
+
+    def test_closest_cache(self):
+        self.check_search(use_spatial_index=False, use_closest_cache=True)
+
+    def test_spatial_index_and_closest_cache(self):
+        self.check_search(use_spatial_index=True, use_closest_cache=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Round-trip tests of the binary skeleton files: a tree written with write_skeleton and read back
+with read_skeleton (memory mapped or not) must give the same arrays and the same strokes.
+
+Plain Python (no Blender needed):
+    python -m pytest GP_Tree_Addon/SC_Algorithm/tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from GP_Tree_Addon.SC_Algorithm.growth import new_tree
+from GP_Tree_Addon.SC_Algorithm.lod import build_lod_buffers
+from GP_Tree_Addon.SC_Algorithm.skeleton import (Skeleton, read_skeleton, write_skeleton, BRANCH_ARRAYS,
+                                                 LEAF_ARRAYS, HEADER_SIZE)
+
+ENGINES = ("OBJECT", "NUMPY", "LARGE")
+TREE_PARAMS = {"n_leaves": 120, "tree_crown_radius": 0.7, "trunk_length": 1.6, "tree_type": "ROUNDED",
+               "max_thickness": 50, "seed": 7}
+
+
+def branch_buffers(tree):
+    """
+    Same stroke buffers as ops.build_branch_buffers (one 2-point stroke per branch).
+
+    :param tree: Space Colonization tree (or tree skeleton)
+    :return:
+    list coords: x, y, z coordinates of every point, one after another
+    list pressures: pressure (thickness) of every point
+    """
+    coords = []
+    pressures = []
+    for branch in tree.branches:
+        coords.extend(branch.pos)
+        coords.extend(branch.pos + branch.direction * branch.length)
+        pressures.extend((branch.thickness, branch.thickness))
+    return coords, pressures
+
+
+def leaf_buffers(tree):
+    """
+    :param tree: Space Colonization tree (or tree skeleton)
+    :return:
+    list coords: x, y, z position of every leaf, one after another
+    """
+    return [value for leaf in tree.original_leaves for value in leaf.pos]
+
+
+class SkeletonRoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, skeleton, name="tree.gptree"):
+        path = os.path.join(self.directory.name, name)
+        write_skeleton(skeleton, path)
+        return path
+
+    def test_round_trip(self):
+        for engine in ENGINES:
+            tree = new_tree(engine=engine, **TREE_PARAMS)
+            self.assertTrue(tree.generate_tree())
+            skeleton = Skeleton.from_tree(tree)
+            path = self.write(skeleton, name="{}.gptree".format(engine))
+
+            for use_mmap in (True, False):
+                with self.subTest(engine=engine, use_mmap=use_mmap):
+                    loaded = read_skeleton(path, use_mmap=use_mmap)
+                    self.assertEqual(loaded.seed, skeleton.seed)
+                    self.assertEqual(loaded.n_branches, len(tree.branches))
+                    self.assertEqual(loaded.n_leaves, len(tree.original_leaves))
+                    for name, _, _ in BRANCH_ARRAYS + LEAF_ARRAYS:
+                        self.assertEqual(list(getattr(loaded, name)), list(getattr(skeleton, name)), name)
+
+                    # Same strokes as the skeleton, and as the tree (up to float32 precision)
+                    self.assertEqual(branch_buffers(loaded), branch_buffers(skeleton))
+                    self.assertEqual(build_lod_buffers(loaded), build_lod_buffers(skeleton))
+                    self.assertEqual(leaf_buffers(loaded), leaf_buffers(skeleton))
+                    for loaded_values, tree_values in ((branch_buffers(loaded)[0], branch_buffers(tree)[0]),
+                                                       (leaf_buffers(loaded), leaf_buffers(tree))):
+                        self.assertEqual(len(loaded_values), len(tree_values))
+                        for loaded_value, tree_value in zip(loaded_values, tree_values):
+                            self.assertAlmostEqual(loaded_value, tree_value, places=4)
+                    del loaded
+
+    def test_invalid_files(self):
+        tree = new_tree(engine="OBJECT", **TREE_PARAMS)
+        self.assertTrue(tree.generate_tree())
+        with open(self.write(Skeleton.from_tree(tree)), "rb") as skeleton_file:
+            data = skeleton_file.read()
+
+        contents = {"empty": b"", "header_only": data[:HEADER_SIZE - 1], "truncated": data[:-4],
+                    "foreign_magic": b"ABCD" + data[4:]}
+        for name, content in contents.items():
+            path = os.path.join(self.directory.name, name + ".gptree")
+            with open(path, "wb") as skeleton_file:
+                skeleton_file.write(content)
+            for use_mmap in (True, False):
+                with self.subTest(file=name, use_mmap=use_mmap):
+                    with self.assertRaises(ValueError):
+                        read_skeleton(path, use_mmap=use_mmap)
+
+
+if __name__ == "__main__":
+    unittest.main()
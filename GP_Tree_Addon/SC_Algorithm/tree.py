@@ -9,11 +9,23 @@
 # Blender + Python adaptation by: Ana Gloria Gálvez Mellado
 # ana.gloria.galvez99@gmail.com
 # -----------------------------------------------------------
-from mathutils import Vector
-from GP_Tree_Addon.SC_Algorithm.branch import Branch
+from GP_Tree_Addon.SC_Algorithm.vector import Vector
+from GP_Tree_Addon.SC_Algorithm.branch_pool import BranchPool
 from GP_Tree_Addon.SC_Algorithm.leaf import Leaf
+from GP_Tree_Addon.SC_Algorithm.spatial_grid import SpatialGrid
+from GP_Tree_Addon.SC_Algorithm.stats import NULL_STATS
 import random
 import math
+import time
+
+# Why the growth of a tree stopped (Tree.stop_reason) and how it's shown
+STOP_REASONS = {
+    "LEAVES_REACHED": "All leaves reached",
+    "STAGNATED": "No more leaves reached",
+    "MAX_ITERATIONS": "Max iterations",
+    "MAX_BRANCHES": "Max branches",
+    "MAX_POINTS": "Max points"
+}
 
 
 class Tree:
@@ -29,21 +41,50 @@ class Tree:
     influence_radius = 0
     kill_distance = 0
 
-    branches = []
+    branches = None
     leaves = []
     original_leaves = []
     first_branch = None
 
     max_iterations = 100  # Prevents infinite loops
 
+    # Growth budgets (0 = no limit): total branches, and total stroke points of the tree
+    # drawn with one stroke per branch (2 points per branch and per leaf)
+    max_branches = 0
+    max_points = 0
+
+    # A new branch is dropped if its end is this close (fraction of the branch length) to
+    # the end of a sibling: the same leaves keep attracting the same branch otherwise
+    duplicate_distance = 0.1
+
+    # The growth stops after this many iterations in a row without reaching any leaf
+    stagnation_limit = 30
+    stop_reason = None
+    n_duplicates = 0
+
+    # Search acceleration (False = brute force, kept for verification purposes)
+    use_spatial_index = True
+    spatial_index = None
+    use_closest_cache = True
+
+    # Random number generator (one per tree, so it can be reproduced from its seed)
+    seed = 0
+    rng = None
+
+    # Phase timings and sizes (GrowthStats), nothing is recorded by default
+    stats = NULL_STATS
+
     # Drawing parameters
     max_thickness = 1
 
-    # Tree types
-    tree_types = ["ROUNDED", "ELLIPSE", "DOUBLE"]
+    # Tree types (MESH needs a crown volume)
+    tree_types = ["ROUNDED", "ELLIPSE", "DOUBLE", "MESH"]
+    crown_volume = None
+    vectorized_crown = False
 
     def __init__(self, n_leaves, branch_length, influence_radius, kill_distance, tree_crown_radius, tree_crown_height,
-                 tree_type, max_iterations, max_thickness):
+                 tree_type, max_iterations, max_thickness, use_spatial_index=True, use_closest_cache=True, seed=None,
+                 stats=None, vectorized_crown=False, crown_volume=None, max_branches=0, max_points=0):
         """
         Creates a tree and initializes the leaves (attraction nodes) based on the tree type.
 
@@ -56,6 +97,17 @@ class Tree:
         :param str tree_type: tree crown type
         :param int max_iterations: maximum number of iterations allowed (avoids crashing)
         :param float max_thickness: maximum thickness of the branches (the trunk thickness)
+        :param bool use_spatial_index: True to use a uniform grid for the leaf-to-branch searches,
+                                       False to compare every leaf against every branch (brute force)
+        :param bool use_closest_cache: True to keep, per leaf, its closest branch between iterations
+                                       (only the new branches are compared on each iteration)
+        :param int seed: random seed of the tree (None = taken from the global random module)
+        :param GrowthStats stats: where the phase timings are recorded (None = not recorded)
+        :param bool vectorized_crown: True to sample all the leaves at once with NumPy (different leaves
+                                      than the default sampling for the same seed)
+        :param crown_volume: closed volume where the leaves of a MESH tree are sampled (see crown.MeshVolume)
+        :param int max_branches: max number of branches (0 = no limit)
+        :param int max_points: max number of stroke points of the drawn tree (0 = no limit)
         """
         self.control_branch_test = None
         self.branch_length = branch_length
@@ -66,12 +118,25 @@ class Tree:
         self.tree_crown_position = Vector((0, 0, tree_crown_height))
         self.max_iterations = max_iterations
         self.max_thickness = max_thickness
-        self.branches = []
-
-        if tree_type not in self.tree_types:
+        self.max_branches = max_branches
+        self.max_points = max_points
+        self.use_spatial_index = use_spatial_index
+        self.use_closest_cache = use_closest_cache
+        self.vectorized_crown = vectorized_crown
+        self.crown_volume = crown_volume
+        self.seed = seed if seed is not None else random.getrandbits(31)
+        self.rng = random.Random(self.seed)
+        self.stats = stats if stats is not None else NULL_STATS
+        self.stop_reason = None
+        self.n_duplicates = 0
+        self.branches = BranchPool()
+        self.leaves = []
+
+        if tree_type not in self.tree_types or (tree_type == "MESH" and crown_volume is None):
             tree_type = self.tree_types[0]
-        self.create_tree_crown(n_leaves=n_leaves, crown_type=tree_type, sphere_radius=self.tree_crown_radius,
-                               cloud_centre=self.tree_crown_position)
+        with self.stats.phase("crown"):
+            self.create_tree_crown(n_leaves=n_leaves, crown_type=tree_type, sphere_radius=self.tree_crown_radius,
+                                   cloud_centre=self.tree_crown_position)
         self.original_leaves = self.leaves.copy()
 
     # Tree crown
@@ -86,11 +151,11 @@ class Tree:
         """
 
         for i in range(0, n_points):
-            radius = random.uniform(0.3, 0.7)
+            radius = self.rng.uniform(0.3, 0.7)
             radius = radius * sphere_radius
 
-            alpha = random.uniform(0, math.pi)
-            theta = random.uniform(0, 2 * math.pi)
+            alpha = self.rng.uniform(0, math.pi)
+            theta = self.rng.uniform(0, 2 * math.pi)
 
             point = Vector((
                 radius * math.cos(theta) * math.sin(alpha),
@@ -114,12 +179,12 @@ class Tree:
         """
 
         for i in range(0, n_points):
-            radius = random.uniform(0.3, 0.7)
+            radius = self.rng.uniform(0.3, 0.7)
             radius = radius * sphere_radius
 
-            alpha = random.uniform(0, math.pi)
-            theta = random.uniform(0, 2 * math.pi)
-            eta = random.uniform(0.3, 0.7)
+            alpha = self.rng.uniform(0, math.pi)
+            theta = self.rng.uniform(0, 2 * math.pi)
+            eta = self.rng.uniform(0.3, 0.7)
 
             point = Vector((
                 radius * float(math.cosh(eta)) * math.cos(theta) * math.sin(alpha),
@@ -141,7 +206,10 @@ class Tree:
         :param float sphere_radius: Determines the size of the crown
         :param float cloud_centre: Where the crown centre should be placed
         """
-        if crown_type == "ROUNDED":
+        if self.vectorized_crown or crown_type == "MESH":
+            self.create_batched_tree_crown(n_leaves=n_leaves, crown_type=crown_type, sphere_radius=sphere_radius,
+                                           cloud_centre=cloud_centre)
+        elif crown_type == "ROUNDED":
             self.create_spherical_points_cloud(n_points=n_leaves, sphere_radius=sphere_radius,
                                                cloud_centre=cloud_centre)
         elif crown_type == "ELLIPSE":
@@ -158,34 +226,84 @@ class Tree:
             self.create_oblate_points_cloud(n_points=n_leaves, sphere_radius=sphere_radius,
                                             cloud_centre=cloud_centre_2)
 
+    def create_batched_tree_crown(self, n_leaves, crown_type, sphere_radius, cloud_centre):
+        """
+        Same as create_tree_crown, but all the leaf positions are sampled at once (NumPy).
+        It's the only way to sample a MESH crown.
+
+        :param int n_leaves: Max number of leaves
+        :param str crown_type: Type of tree crown shape: Rounded, spherical, double, mesh
+        :param float sphere_radius: Determines the size of the crown
+        :param float cloud_centre: Where the crown centre should be placed
+        """
+        # NumPy is only needed by the batched sampling
+        import numpy as np
+        from GP_Tree_Addon.SC_Algorithm.crown import sample_spherical_crown, sample_oblate_crown, \
+            sample_volume_crown
+
+        rng = np.random.default_rng(self.rng.getrandbits(32))
+
+        if crown_type == "MESH":
+            points = sample_volume_crown(rng=rng, n_points=n_leaves, volume=self.crown_volume)
+        elif crown_type == "ELLIPSE":
+            points = sample_oblate_crown(rng=rng, n_points=n_leaves, sphere_radius=sphere_radius,
+                                         cloud_centre=cloud_centre)
+        elif crown_type == "DOUBLE":
+            n_leaves = int(n_leaves / 2)
+            cloud_centre_1 = self.tree_crown_position + Vector((-0.33 * self.tree_crown_height, 0, 0))
+            cloud_centre_2 = self.tree_crown_position + \
+                             Vector((0.2 * self.tree_crown_height, 0, 0.33 * self.tree_crown_height))
+
+            points = np.concatenate((
+                sample_oblate_crown(rng=rng, n_points=n_leaves, sphere_radius=sphere_radius / 1.2,
+                                    cloud_centre=cloud_centre_1),
+                sample_oblate_crown(rng=rng, n_points=n_leaves, sphere_radius=sphere_radius,
+                                    cloud_centre=cloud_centre_2)))
+        else:
+            points = sample_spherical_crown(rng=rng, n_points=n_leaves, sphere_radius=sphere_radius,
+                                            cloud_centre=cloud_centre)
+
+        self.add_crown_points(points)
+
+    def add_crown_points(self, points):
+        """
+        Creates the leaves of a batch of sampled positions.
+
+        :param points: (n, 3) array with the leaf positions
+        """
+        self.leaves.extend(Leaf(position=Vector(point)) for point in points.tolist())
+
     # Tree trunk
     def create_trunk(self):
         """
         Aux method to create the tree's trunk. It keeps growing (creating new branches)
         towards the same direction (up) until it's close enough to the leaves
         """
-        self.first_branch = Branch(position=Vector((0, 0, 0)), direction=Vector((0, 0, 1)), length=self.branch_length,
-                                   thickness=self.max_thickness, parent=None)
-        self.branches.append(self.first_branch)
-        current_branch = self.first_branch
-
-        while not self.trunk_close_enough(current_branch):
-            trunk = Branch(position=current_branch.pos + current_branch.direction * current_branch.length,
-                           direction=current_branch.direction.copy(),
-                           parent=current_branch, length=self.branch_length, thickness=current_branch.thickness * 0.97)
-            current_branch.children.append(trunk)
-            self.branches.append(trunk)
-            current_branch = trunk
-
-    def trunk_close_enough(self, branch):
+        branches = self.branches
+        current_index = branches.add(position=Vector((0, 0, 0)), direction=Vector((0, 0, 1)), parent=-1,
+                                     length=self.branch_length, thickness=self.max_thickness)
+        self.first_branch = branches[current_index]
+
+        # The trunk never grows over the highest leaf (e.g. a crown below the trunk base)
+        max_height = max(leaf.pos.z for leaf in self.leaves) + self.influence_radius if self.leaves else 0
+
+        position = branches.position(current_index)
+        while not self.trunk_close_enough(position) and position.z < max_height:
+            current_index = branches.add(position=branches.end(current_index),
+                                         direction=branches.direction(current_index), parent=current_index,
+                                         length=self.branch_length,
+                                         thickness=branches.thicknesses[current_index] * 0.97)
+            position = branches.position(current_index)
+
+    def trunk_close_enough(self, position):
         """
         Aux method used to check if the new trunk branches are close
         enough to any leaf.
 
-        :param Branch branch: the branch used to check if it's close enough
+        :param Vector position: position of the branch used to check if it's close enough
         """
         for leaf in self.leaves:
-            if (leaf.pos - branch.pos).length < self.influence_radius:
+            if (leaf.pos - position).length < self.influence_radius:
                 return True
 
     # Auxiliary method
@@ -195,8 +313,8 @@ class Tree:
         :return:
         Vector direction: random direction vector
         """
-        alpha = random.uniform(0, math.pi)
-        theta = random.uniform(0, 2 * math.pi)
+        alpha = self.rng.uniform(0, math.pi)
+        theta = self.rng.uniform(0, 2 * math.pi)
 
         direction = Vector((
             math.cos(theta) * math.sin(alpha),
@@ -208,6 +326,117 @@ class Tree:
 
         return direction
 
+    # Leaf-to-branch search
+    def closest_branch(self, leaf, indices):
+        """
+        Looks for the branch closest to a leaf. If any branch is within the kill distance,
+        the leaf is marked as reached and no branch is returned.
+
+        :param Leaf leaf: the leaf attracting the branches
+        :param indices: indices (in self.branches) of the branches to compare with, sorted
+        :return:
+        int closest_index: index of the closest branch (None if the leaf has been reached)
+        Vector closest_direction: vector from the closest branch end to the leaf
+        """
+        closest_index = None
+        closest_direction = None
+        record_distance = -1
+
+        for index in indices:
+            direction = leaf.pos - self.branches.end(index)
+            distance = direction.length
+
+            if distance <= self.kill_distance:
+                leaf.reached = True
+                return None, None
+
+            elif closest_index is None or distance < record_distance:
+                closest_index = index
+                closest_direction = direction
+                record_distance = distance
+
+        return closest_index, closest_direction
+
+    def closest_branch_indexed(self, leaf, attracted):
+        """
+        Same as closest_branch, but only the branches returned by the spatial index
+        are compared. Branches already attracted on this iteration have a temporary
+        direction (so their indexed end is outdated): they are always compared.
+
+        :param Leaf leaf: the leaf attracting the branches
+        :param dict attracted: indices of the branches attracted on the current iteration
+        :return:
+        int closest_index: index of the closest branch (None if the leaf has been reached)
+        Vector closest_direction: vector from the closest branch end to the leaf
+        """
+        best_distance = -1
+        for index in attracted:
+            distance = (leaf.pos - self.branches.end(index)).length
+            if best_distance < 0 or distance < best_distance:
+                best_distance = distance
+
+        candidates = self.spatial_index.nearest_candidates(leaf.pos, best_distance=best_distance, skip=attracted)
+        candidates.extend(attracted)
+        candidates.sort()
+
+        return self.closest_branch(leaf, candidates)
+
+    def closest_branch_cached(self, leaf, attracted):
+        """
+        Same as closest_branch, but using the closest branch cached on the leaf. Only the
+        cached branch and the ones attracted on this iteration are compared: the rest have
+        not moved, so none of them can be closer than the cached one.
+
+        If the cached branch is one of the attracted ones and it has moved away from the leaf,
+        the next closest branch is unknown and a full search is done instead.
+
+        :param Leaf leaf: the leaf attracting the branches
+        :param dict attracted: indices of the branches attracted on the current iteration
+        :return:
+        int closest_index: index of the closest branch (None if the leaf has been reached)
+        Vector closest_direction: vector from the closest branch end to the leaf
+        """
+        candidates = list(attracted)
+        if leaf.closest_index not in attracted:
+            candidates.append(leaf.closest_index)
+        candidates.sort()
+
+        closest_index, closest_direction = self.closest_branch(leaf, candidates)
+        if leaf.reached:
+            return None, None
+
+        if leaf.closest_index in attracted and closest_direction.length >= leaf.closest_distance:
+            if self.use_spatial_index:
+                return self.closest_branch_indexed(leaf, attracted)
+            return self.closest_branch(leaf, range(len(self.branches)))
+
+        return closest_index, closest_direction
+
+    def update_closest_cache(self, first_index):
+        """
+        Updates the closest branch cached on every leaf, comparing it only with
+        the branches from a given index onwards (the ones created since the last update).
+
+        :param int first_index: index (in self.branches) of the first branch to compare with
+        """
+        new_branch_ends = [(index, self.branches.end(index)) for index in range(first_index, len(self.branches))]
+
+        for leaf in self.leaves:
+            for index, _branch_end in new_branch_ends:
+                distance = (leaf.pos - _branch_end).length
+                if leaf.closest_index is None or distance < leaf.closest_distance:
+                    leaf.closest_index = index
+                    leaf.closest_distance = distance
+
+    def index_branches(self, first_index):
+        """
+        Adds the branches from a given index onwards to the spatial index.
+
+        :param int first_index: index (in self.branches) of the first branch to add
+        """
+        for index in range(first_index, len(self.branches)):
+            self.spatial_index.insert(index, self.branches.end(index))
+
     # Main algorithm
     def generate_tree(self):
         """
@@ -219,68 +448,234 @@ class Tree:
         if self.leaves == 0 or not self.leaves:
             return False
 
-        self.create_trunk()
+        for _ in self.grow():
+            pass
+
+        return True
+
+    def grow(self):
+        """
+        Core of the Space Colonization algorithm, one step at a time, so the caller can
+        draw the tree while it grows or stop it (the branches grown so far are kept).
+        The first step creates the trunk and every other one runs an iteration.
+        :return:
+        Generator of lists with the new branches of every step
+        """
+        with self.stats.phase("trunk"):
+            self.create_trunk()
+        self.record_sizes(n_iterations=0)
+        yield list(self.branches)
+
+        if self.use_spatial_index:
+            # The first shells of cells cover the influence radius, farther shells are only
+            # explored for the leaves that have no branch inside it
+            cell_size = self.influence_radius / 4 if self.influence_radius > 0 else self.branch_length
+            self.spatial_index = SpatialGrid(cell_size=cell_size)
+            self.index_branches(first_index=0)
+
         # Main growing algorithm
         n_iterations = 0
+        n_cached_branches = 0
+        n_stagnant = 0
 
-        while len(self.leaves) > 0 and n_iterations < self.max_iterations:
-            for leaf in self.leaves:
-                closest_branch = None
-                closest_direction = None
-                record_distance = -1
+        while not self.stop_growth(n_iterations=n_iterations, n_leaves=len(self.leaves), n_stagnant=n_stagnant):
+            iteration_start = time.perf_counter()
 
-                for branch in self.branches:
-                    _branch_end = branch.pos + branch.length * branch.direction
-                    direction = leaf.pos - _branch_end
-                    distance = direction.length
+            # Indices of the branches attracted by, at least, one leaf (insertion order is irrelevant)
+            attracted = {}
 
-                    if distance <= self.kill_distance:
-                        leaf.reached = True
-                        closest_branch = None
-                        break
+            if self.use_closest_cache:
+                self.update_closest_cache(first_index=n_cached_branches)
+                n_cached_branches = len(self.branches)
 
-                    elif closest_branch is None or distance < record_distance:
-                        closest_branch = branch
-                        closest_direction = direction
-                        record_distance = distance
+            for leaf in self.leaves:
+                if self.use_closest_cache:
+                    closest_index, closest_direction = self.closest_branch_cached(leaf, attracted)
+                elif self.use_spatial_index:
+                    closest_index, closest_direction = self.closest_branch_indexed(leaf, attracted)
+                else:
+                    closest_index, closest_direction = self.closest_branch(leaf, range(len(self.branches)))
 
                 # We've found a close enough branch
-                if closest_branch is not None:
+                if closest_index is not None:
                     closest_direction.normalize()
-                    closest_branch.direction = closest_branch.direction + closest_direction
-                    closest_branch.count = closest_branch.count + 1
+                    self.branches.attract(closest_index, closest_direction)
+                    attracted[closest_index] = True
 
             # Clear reached leaves
-            _non_reached_leaves = []
-            for leaf in self.leaves:
-                if leaf.reached is False:
-                    _non_reached_leaves.append(leaf)
-
-            self.leaves.clear()
-            self.leaves = _non_reached_leaves
-
-            _new_branches = []
-            for branch in self.branches:
+            with self.stats.phase("pruning"):
+                _non_reached_leaves = []
+                for leaf in self.leaves:
+                    if leaf.reached is False:
+                        _non_reached_leaves.append(leaf)
+
+                n_reached = len(self.leaves) - len(_non_reached_leaves)
+                self.leaves.clear()
+                self.leaves = _non_reached_leaves
+
+            # Only the attracted branches can grow (keep the self.branches order)
+            branches = self.branches
+            _candidates = []
+            for index in sorted(attracted):
                 # If there's a leaf attracting, create new branch towards it
-                if branch.count > 0:
-                    branch.direction = branch.direction / branch.count
-                    branch.direction.normalize()
-                    _new_branch_direction = branch.direction.copy() + self.generate_random_direction() * 0.1
+                count = branches.counts[index]
+                if count > 0:
+                    direction = branches.direction(index) / count
+                    direction.normalize()
+                    _new_branch_direction = direction + self.generate_random_direction() * 0.1
 
                     # Re-do this method as we can simply calculate the new branch direction without modifying the
                     # current branch's one
-                    branch.reset()
+                    branches.reset(index)
+                    _candidates.append((index, _new_branch_direction, count))
+
+            # Branches that would grow (almost) over one of their children don't grow again
+            n_candidates = len(_candidates)
+            children = self.collect_children({index for index, _, _ in _candidates})
+            _candidates = [(index, direction, count) for index, direction, count in _candidates
+                           if not self.duplicates_child(index, direction, children.get(index, ()))]
+            self.n_duplicates = self.n_duplicates + n_candidates - len(_candidates)
+
+            first_new_index = len(branches)
+            for index, direction, _ in self.apply_budget(_candidates):
+                branches.add(position=branches.end(index), direction=direction, parent=index,
+                             length=branches.lengths[index], thickness=branches.thicknesses[index] * 0.98)
+
+            _new_branches = branches[first_new_index:]
+            if _new_branches:
+                self.control_branch_test = _new_branches[-1]
+            if self.use_spatial_index:
+                self.index_branches(first_index=first_new_index)
 
-                    _new_branch = Branch(position=branch.pos + branch.length * branch.direction,
-                                         direction=_new_branch_direction, parent=None,
-                                         length=branch.length, thickness=branch.thickness * 0.98)
+            n_iterations = n_iterations + 1
+            n_stagnant = self.count_stagnant(n_stagnant, n_reached=n_reached, n_new_branches=len(_new_branches))
+            self.stats.add_time("iterations", time.perf_counter() - iteration_start, iteration=True)
+            self.record_sizes(n_iterations=n_iterations)
+            yield _new_branches
 
-                    branch.children.append(_new_branch)
-                    _new_branches.append(_new_branch)
-                    self.control_branch_test = _new_branch
+    # Growth limits
+    def collect_children(self, indices):
+        """
+        Children of some branches, found in one pass over the parent indices, so no children
+        list is kept for every branch while the tree grows.
 
-            self.branches.extend(_new_branches)
+        :param set indices: indices of the parent branches
+        :return:
+        dict children: indices of the children of every parent branch that has any
+        """
+        children = {}
+        for child_index, parent_index in enumerate(self.branches.parents):
+            if parent_index in indices:
+                children.setdefault(parent_index, []).append(child_index)
+        return children
 
-            n_iterations = n_iterations + 1
+    def duplicates_child(self, index, direction, children):
+        """
+        Checks if a new branch would end (almost) where a child of its parent already ends.
 
+        :param int index: index of the parent branch
+        :param Vector direction: growth direction of the new branch
+        :param children: indices of the children of the parent branch (see collect_children)
+        :return:
+        bool duplicate: True if the new branch is a duplicate
+        """
+        branches = self.branches
+        if not children:
+            return False
+
+        length = branches.lengths[index]
+        new_end = branches.end(index) + length * direction
+        for child_index in children:
+            if (branches.end(child_index) - new_end).length < self.duplicate_distance * length:
+                return True
+        return False
+
+    def branch_budget(self):
+        """
+        :return:
+        int budget: max number of branches of the tree (None if there's no limit)
+        str reason: stop reason when the budget is reached
+        """
+        budget = None
+        reason = None
+        if self.max_branches > 0:
+            budget, reason = self.max_branches, "MAX_BRANCHES"
+        if self.max_points > 0:
+            # 2 points per branch and per leaf
+            point_budget = max(0, (self.max_points - 2 * len(self.original_leaves)) // 2)
+            if budget is None or point_budget < budget:
+                budget, reason = point_budget, "MAX_POINTS"
+        return budget, reason
+
+    def apply_budget(self, candidates):
+        """
+        Keeps only the new branches that fit in the branch budget. If not all of them fit,
+        the ones attracted by more leaves are kept.
+
+        :param list candidates: (parent index, direction, number of attracting leaves) of the new branches,
+                                in parent order
+        :return:
+        list candidates: the candidates that can grow, in parent order
+        """
+        budget, _ = self.branch_budget()
+        if budget is None:
+            return candidates
+
+        available = max(0, budget - len(self.branches))
+        if len(candidates) <= available:
+            return candidates
+
+        order = sorted(range(len(candidates)), key=lambda position: -candidates[position][2])
+        return [candidates[position] for position in sorted(order[:available])]
+
+    def count_stagnant(self, n_stagnant, n_reached, n_new_branches):
+        """
+        :param int n_stagnant: iterations in a row without reaching any leaf, before the current one
+        :param int n_reached: leaves reached on the current iteration
+        :param int n_new_branches: branches grown on the current iteration
+        :return:
+        int n_stagnant: iterations in a row without reaching any leaf, including the current one
+        """
+        if n_reached > 0:
+            return 0
+        if n_new_branches == 0:
+            # Nothing reached and nothing grown: the next iterations would be the same
+            return self.stagnation_limit
+        return n_stagnant + 1
+
+    def stop_growth(self, n_iterations, n_leaves, n_stagnant):
+        """
+        Checks every stop condition of the growth and records the first one met.
+
+        :param int n_iterations: iterations run so far
+        :param int n_leaves: leaves not reached yet
+        :param int n_stagnant: iterations in a row without reaching any leaf
+        :return:
+        bool stop: True if the growth must stop
+        """
+        budget, budget_reason = self.branch_budget()
+
+        if n_leaves == 0:
+            self.stop_reason = "LEAVES_REACHED"
+        elif n_stagnant >= self.stagnation_limit:
+            self.stop_reason = "STAGNATED"
+        elif budget is not None and len(self.branches) >= budget:
+            self.stop_reason = budget_reason
+        elif n_iterations >= self.max_iterations:
+            self.stop_reason = "MAX_ITERATIONS"
+        else:
+            return False
+
+        self.stats.set_value("stop_reason", STOP_REASONS[self.stop_reason])
+        self.stats.set_value("duplicate_branches", self.n_duplicates)
         return True
+
+    def record_sizes(self, n_iterations):
+        """
+        Record the current size of the tree in its stats.
+
+        :param int n_iterations: iterations run so far
+        """
+        self.stats.set_value("iterations", n_iterations)
+        self.stats.set_value("branches", len(self.branches))
+        self.stats.set_value("unreached_leaves", len(self.leaves))
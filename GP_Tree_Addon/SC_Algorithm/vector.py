@@ -0,0 +1,146 @@
+from array import array
+import math
+
+
+class PyVector:
+    """
+    Pure Python replacement of mathutils.Vector, with the subset of its API used by the
+    Space Colonization algorithm. Used when the algorithm runs outside Blender.
+
+    The components are stored in single precision, like mathutils does, and every operation
+    follows the same rounding steps, so the same random seed gives the same tree.
+    """
+    __slots__ = ("_data",)
+
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        """
+        Creates a new vector.
+
+        :param values: vector components
+        """
+        self._data = array('f', values)
+
+    # Sequence
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __getitem__(self, index):
+        return self._data[index]
+
+    def __setitem__(self, index, value):
+        self._data[index] = value
+
+    def __eq__(self, other):
+        return len(self) == len(other) and all(a == b for a, b in zip(self._data, other))
+
+    def __repr__(self):
+        return "Vector(({}))".format(", ".join("{:.4f}".format(value) for value in self._data))
+
+    @property
+    def x(self):
+        return self._data[0]
+
+    @x.setter
+    def x(self, value):
+        self._data[0] = value
+
+    @property
+    def y(self):
+        return self._data[1]
+
+    @y.setter
+    def y(self, value):
+        self._data[1] = value
+
+    @property
+    def z(self):
+        return self._data[2]
+
+    @z.setter
+    def z(self, value):
+        self._data[2] = value
+
+    # Arithmetic
+    def __add__(self, other):
+        return PyVector([a + b for a, b in zip(self._data, other)])
+
+    def __sub__(self, other):
+        return PyVector([a - b for a, b in zip(self._data, other)])
+
+    def __neg__(self):
+        return PyVector([-a for a in self._data])
+
+    def __mul__(self, scalar):
+        if not isinstance(scalar, (int, float)):
+            return NotImplemented
+        scalar = single_precision(scalar)
+        return PyVector([a * scalar for a in self._data])
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, scalar):
+        if not isinstance(scalar, (int, float)):
+            return NotImplemented
+        if scalar == 0:
+            raise ZeroDivisionError("Vector division: divide by zero error")
+        inverse = single_precision(1.0 / single_precision(scalar))
+        return PyVector([a * inverse for a in self._data])
+
+    def dot(self, other):
+        """
+        :return:
+        float dot: dot product, accumulated in double precision (as mathutils does)
+        """
+        result = 0.0
+        for a, b in zip(reversed(self._data), reversed(array('f', other))):
+            result += single_precision(a * b)
+        return result
+
+    @property
+    def length(self):
+        return math.sqrt(self.dot(self))
+
+    def normalize(self):
+        """
+        Normalizes the vector in place (zero vectors stay as zero).
+        """
+        squared_length = single_precision(self.dot(self))
+        if squared_length > 1.0e-35:
+            inverse = single_precision(1.0 / single_precision(math.sqrt(squared_length)))
+            self._data = array('f', [a * inverse for a in self._data])
+        else:
+            self._data = array('f', [0.0] * len(self._data))
+
+    def normalized(self):
+        vector = self.copy()
+        vector.normalize()
+        return vector
+
+    def copy(self):
+        return PyVector(self._data)
+
+    def to_tuple(self):
+        return tuple(self._data)
+
+
+def single_precision(value):
+    """
+    Rounds a float to the closest single precision value.
+
+    :param float value: value to round
+    :return:
+    float value: rounded value
+    """
+    return array('f', (value,))[0]
+
+
+try:
+    from mathutils import Vector
+    BACKEND = "mathutils"
+except ImportError:
+    # Outside Blender (plain Python workers, tests, benchmarks)
+    Vector = PyVector
+    BACKEND = "python"
@@ -0,0 +1,72 @@
+from GP_Tree_Addon.SC_Algorithm.vector import Vector
+
+
+class BranchView:
+    """
+    Read-only view of a branch stored in arrays (ArrayTree, Skeleton). It exposes the same
+    attributes as Branch, so the drawing code can use all of them. The owner must implement
+    get_branch_position, get_branch_direction, get_branch_length, get_branch_thickness,
+    get_branch_parent, children_indices and a branches list of views.
+    """
+    __slots__ = ("owner", "index")
+
+    def __init__(self, owner, index):
+        """
+        Creates a view of a branch.
+
+        :param owner: object that stores the branch arrays
+        :param int index: branch index inside the owner arrays
+        """
+        self.owner = owner
+        self.index = index
+
+    @property
+    def pos(self):
+        return Vector(self.owner.get_branch_position(self.index))
+
+    @property
+    def direction(self):
+        return Vector(self.owner.get_branch_direction(self.index))
+
+    @property
+    def length(self):
+        return self.owner.get_branch_length(self.index)
+
+    @property
+    def thickness(self):
+        return self.owner.get_branch_thickness(self.index)
+
+    @property
+    def parent(self):
+        parent_index = self.owner.get_branch_parent(self.index)
+        if parent_index < 0:
+            return None
+        return self.owner.branches[parent_index]
+
+    @property
+    def children(self):
+        return [self.owner.branches[child_index] for child_index in self.owner.children_indices(self.index)]
+
+
+class LeafView:
+    """
+    Read-only view of a leaf stored in arrays. It exposes the same attributes as Leaf.
+    The owner must implement get_leaf_position.
+    """
+    __slots__ = ("owner", "index")
+
+    reached = False
+
+    def __init__(self, owner, index):
+        """
+        Creates a view of a leaf.
+
+        :param owner: object that stores the leaf arrays
+        :param int index: leaf index inside the owner arrays
+        """
+        self.owner = owner
+        self.index = index
+
+    @property
+    def pos(self):
+        return Vector(self.owner.get_leaf_position(self.index))
@@ -9,7 +9,14 @@ bl_info = {
     "category": "Object",
 }
 
-from GP_Tree_Addon import ops, ui_panels
+try:
+    import bpy
+except ImportError:
+    # Used outside Blender (e.g. worker processes): only SC_Algorithm is available
+    bpy = None
+
+if bpy is not None:
+    from GP_Tree_Addon import ops, ui_panels
 
 
 def register():
@@ -1,21 +1,37 @@
 import bpy
 import os
+import re
 from mathutils import *
 import math
-from .SC_Algorithm.tree import Tree
+from .SC_Algorithm.growth import new_tree, grow_skeleton, preview_params
+from .SC_Algorithm.tree import STOP_REASONS
+from .SC_Algorithm.chains import get_branch_chains
+from .SC_Algorithm.forest import scatter_trees, scatter_instances, grow_skeletons
+from .SC_Algorithm.multi_tree import grow_competing_skeletons
+from .SC_Algorithm.skeleton_cache import SkeletonCache, skeleton_key
+from .SC_Algorithm.background import SkeletonJob, SkeletonWorker
+from .SC_Algorithm.skeleton import Skeleton, read_skeleton, write_skeleton
+from .SC_Algorithm.views import LeafView
+from .SC_Algorithm.stats import GrowthStats, NULL_STATS
+from .SC_Algorithm.crown import MeshVolume
+from .SC_Algorithm.lod import LOD_LEVELS, build_lod_buffers, thin_leaves, get_lod_settings
+from bpy_extras.io_utils import ExportHelper, ImportHelper
 import random
+import time
+import hashlib
 
 
 # AUX
 
-def generate_random_direction():
+def generate_random_direction(rng=random):
     """
     An aux method used to create a random direction (normalized vector)
+    :param rng: Random number generator (random module or random.Random)
     :return:
     Vector direction: Random direction vector
     """
-    alpha = random.uniform(0, math.pi)
-    theta = random.uniform(0, 2 * math.pi)
+    alpha = rng.uniform(0, math.pi)
+    theta = rng.uniform(0, 2 * math.pi)
 
     direction = Vector((
         math.cos(theta) * math.sin(alpha),
@@ -28,6 +44,186 @@ def generate_random_direction():
     return direction
 
 
+def get_tree_params(ui_values):
+    """
+    Get the tree growth parameters (the ones that change the grown tree) from the add-on properties
+    :param ui_values: Add-on properties (GPT_property_group)
+    :return:
+    dict params: Tree growth parameters (see SC_Algorithm.growth.new_tree)
+    """
+    params = {
+        "engine": ui_values.engine,
+        "n_leaves": ui_values.n_leaves,
+        "tree_crown_radius": ui_values.tree_crown_radius,
+        "trunk_length": ui_values.trunk_length,
+        "tree_type": ui_values.tree_type,
+        "max_thickness": ui_values.max_thickness,
+        "vectorized_crown": ui_values.vectorized_crown,
+        "max_iterations": ui_values.max_iterations,
+        "max_branches": ui_values.max_branches,
+        "max_points": ui_values.max_points,
+        "seed": ui_values.seed
+    }
+
+    if ui_values.engine == 'LARGE':
+        params["n_leaves"] = ui_values.large_n_leaves
+        params["drawn_leaves"] = ui_values.drawn_leaves
+
+    if ui_values.tree_type == 'MESH':
+        if ui_values.crown_mesh is None:
+            raise ValueError("Select the mesh object used as tree crown.")
+        # The mesh geometry is part of the parameters (and the cache key) through its hash
+        params["crown_mesh"] = ui_values.crown_mesh.name
+        params["crown_mesh_key"] = get_crown_volume(ui_values.crown_mesh)[0]
+
+    return params
+
+
+def split_tree_params(params):
+    """
+    Split the tree parameters into the growth ones and the crown volume (MESH trees).
+    :param dict params: Tree parameters (see get_tree_params)
+    :return:
+    dict growth_params: Tree growth parameters (see SC_Algorithm.growth.new_tree)
+    MeshVolume crown_volume: Crown volume (None if the tree isn't a MESH tree)
+    """
+    growth_params = {key: value for key, value in params.items() if key not in ("crown_mesh", "crown_mesh_key")}
+    if "crown_mesh" not in params:
+        return growth_params, None
+
+    mesh_object = bpy.data.objects.get(params["crown_mesh"])
+    if mesh_object is None:
+        raise ValueError("Crown mesh not found: {}".format(params["crown_mesh"]))
+
+    return growth_params, get_crown_volume(mesh_object)[1]
+
+
+def get_skeleton_cache(ui_values):
+    """
+    Get the on-disk skeleton cache (stored on the Blender user data folder)
+    :param ui_values: Add-on properties (GPT_property_group)
+    :return:
+    SkeletonCache cache: Skeleton cache (None if it's disabled)
+    """
+    if not ui_values.use_cache:
+        return None
+    directory = bpy.utils.user_resource('DATAFILES', path="gp_tree_cache", create=True)
+    return SkeletonCache(directory=directory, max_bytes=ui_values.cache_size * 1024 * 1024)
+
+
+def get_tree_skeleton(params, cache=None, stats=NULL_STATS):
+    """
+    Grow a tree and get its skeleton. If the same tree (same parameters and seed)
+    is in the cache, it's not grown again.
+    :param dict params: Tree growth parameters (see get_tree_params)
+    :param SkeletonCache cache: Skeleton cache (None = no cache)
+    :param GrowthStats stats: Where the phase timings are recorded
+    :return:
+    Skeleton skeleton: Tree skeleton (None if the tree couldn't be generated)
+    bool cached: True if the skeleton has been taken from the cache
+    """
+    key = skeleton_key(**params)
+    if cache is not None:
+        skeleton = cache.get(key)
+        if skeleton is not None:
+            stats.set_value("cached", True)
+            stats.set_value("branches", skeleton.n_branches)
+            return skeleton, True
+
+    growth_params, crown_volume = split_tree_params(params)
+    skeleton = grow_skeleton(growth_params, stats=stats, crown_volume=crown_volume)
+    if skeleton is not None and cache is not None:
+        cache.put(key, skeleton)
+
+    return skeleton, False
+
+
+def get_new_tree_params(ui_values):
+    """
+    Get the growth parameters of a new tree: a new random seed (if randomize_seed is enabled) is
+    only put into the parameters. It reaches the seed property once the new tree is selected,
+    changing it before would start a live preview of the selected tree.
+    :param ui_values: Add-on properties (GPT_property_group)
+    :return:
+    dict params: Tree growth parameters (see get_tree_params)
+    """
+    params = get_tree_params(ui_values)
+    if ui_values.randomize_seed:
+        params["seed"] = random.getrandbits(31)
+
+    return params
+
+
+def store_tree_params(collection=None, params=None):
+    """
+    Store the tree growth parameters (including its seed) on the tree collection,
+    so the same tree can be obtained again.
+    :param collection: Reference to the tree collection inside Blender
+    :param dict params: Tree growth parameters (see get_tree_params)
+    """
+    collection["gp_tree_params"] = params
+    if "gp_tree_file" in collection:
+        del collection["gp_tree_file"]
+
+
+def get_collection_skeleton(collection=None, cache=None):
+    """
+    Get the skeleton of an existing tree collection: from the skeleton file it was
+    imported from, or grown again (or taken from the cache) with its stored parameters.
+    :param collection: Reference to the tree collection inside Blender
+    :param SkeletonCache cache: Skeleton cache (None = no cache)
+    :return:
+    Skeleton skeleton: Tree skeleton (None if the collection isn't a tree)
+    """
+    if "gp_tree_file" in collection:
+        return read_skeleton(bpy.path.abspath(collection["gp_tree_file"]))
+    if "gp_tree_params" in collection:
+        params = dict(collection["gp_tree_params"].items())
+        return get_tree_skeleton(params=params, cache=cache)[0]
+    return None
+
+
+# CROWN MESHES
+# Crown volumes (and their BVH trees) by mesh hash, so they're only built again if the mesh changes
+crown_volumes = {}
+MAX_CROWN_VOLUMES = 8
+
+
+def get_crown_volume(mesh_object=None):
+    """
+    Get the crown volume of a closed mesh object. The mesh is used with its modifiers, rotation
+    and scale, but not its location: the mesh origin is the base of the trunk.
+    :param mesh_object: Reference to the mesh object inside Blender
+    :return:
+    str key: Hash of the mesh geometry
+    MeshVolume crown_volume: Crown volume (with a BVH tree of the mesh)
+    """
+    import numpy as np
+
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    evaluated_object = mesh_object.evaluated_get(depsgraph)
+    mesh = evaluated_object.to_mesh()
+    try:
+        vertices = np.zeros(3 * len(mesh.vertices), dtype=np.float32)
+        mesh.vertices.foreach_get("co", vertices)
+        polygons = [tuple(polygon.vertices) for polygon in mesh.polygons]
+    finally:
+        evaluated_object.to_mesh_clear()
+
+    matrix = np.array(mesh_object.matrix_world.to_3x3(), dtype=np.float64)
+    vertices = vertices.reshape(-1, 3).astype(np.float64) @ matrix.T
+
+    key = hashlib.sha256(vertices.tobytes() + repr(polygons).encode("utf-8")).hexdigest()
+    crown_volume = crown_volumes.get(key)
+    if crown_volume is None:
+        if len(crown_volumes) >= MAX_CROWN_VOLUMES:
+            crown_volumes.clear()
+        crown_volume = MeshVolume(vertices=vertices, polygons=polygons)
+        crown_volumes[key] = crown_volume
+
+    return key, crown_volume
+
+
 # GREASE PENCIL GETTERS
 
 def get_gp_object(name='GPencil', create_new=True):
@@ -66,19 +262,88 @@ def get_gp_layer(gp_object=None, layer_name="Layer", clear_layer=False):
     return gp_object.data.layers.new(name=layer_name, set_active=True)
 
 
-def get_frame_gp_layer(gp_layer=None, frame_number=0):
+def index_gp_frames(gp_layer=None):
+    """
+    Index the frames of a Grease Pencil layer by frame number (one pass over the frames).
+    The index is only valid while the layer frames are created through it.
+    :param gp_layer: Reference to the gp layer inside Blender
+    :return:
+    dict frames_index: Frame number -> reference to the gp frame inside Blender
+    """
+    return {frame.frame_number: frame for frame in gp_layer.frames}
+
+
+def get_frame_gp_layer(gp_layer=None, frame_number=0, frames_index=None):
     """
     Create or get a Grease Pencil frame (inside GP layer)
     :param gp_layer: Reference to the gp layer inside Blender
     :param frame_number: Number of the frame we want to create
+    :param dict frames_index: Index of the layer frames (see index_gp_frames), kept up to date.
+                              Reuse it when getting many frames of the same layer
+    :return:
+    grease pencil frame: Reference to the gp frame inside Blender
+    """
+    if frames_index is None:
+        frames_index = index_gp_frames(gp_layer)
+
+    gp_frame = frames_index.get(frame_number)
+    if gp_frame is None:
+        # If not found, return new frame
+        gp_frame = gp_layer.frames.new(frame_number)
+        frames_index[frame_number] = gp_frame
+
+    return gp_frame
+
+
+def reuse_frame_gp_layer(gp_layer=None, frame_number=0):
+    """
+    Get the Grease Pencil frame of a layer that is going to be drawn again. The frame with that
+    number (or else the last one, renumbered) keeps its strokes, so they can be reused
+    (see update_strokes); the rest of the layer frames are removed.
+    :param gp_layer: Reference to the gp layer inside Blender
+    :param frame_number: Number of the frame
     :return:
     grease pencil frame: Reference to the gp frame inside Blender
     """
-    for index, frame in enumerate(gp_layer.frames):
+    frames = list(gp_layer.frames)
+    if not frames:
+        return gp_layer.frames.new(frame_number)
+
+    gp_frame = frames[-1]
+    for frame in frames:
         if frame.frame_number == frame_number:
-            return gp_layer.frames[index]
-    # If not found, return new frame
-    return gp_layer.frames.new(frame_number)
+            gp_frame = frame
+
+    for frame in frames:
+        if frame != gp_frame:
+            gp_layer.frames.remove(frame)
+    gp_frame.frame_number = frame_number
+
+    return gp_frame
+
+
+def copy_frame_gp_layer(gp_layer=None, gp_frame=None, frame_number=0, frames_index=None):
+    """
+    Copy a Grease Pencil frame (with all its strokes) into another frame number of the same layer.
+    If that frame already exists, it's replaced.
+    :param gp_layer: Reference to the gp layer inside Blender
+    :param gp_frame: Reference to the gp frame to copy
+    :param frame_number: Number of the new frame
+    :param dict frames_index: Index of the layer frames (see index_gp_frames), kept up to date
+    :return:
+    grease pencil frame: Reference to the new gp frame inside Blender
+    """
+    if frames_index is None:
+        frames_index = index_gp_frames(gp_layer)
+
+    if frame_number in frames_index:
+        gp_layer.frames.remove(frames_index.pop(frame_number))
+
+    new_frame = gp_layer.frames.copy(gp_frame)
+    new_frame.frame_number = frame_number
+    frames_index[frame_number] = new_frame
+
+    return new_frame
 
 
 # ASPECT-RELATED METHODS: MATERIALS
@@ -145,26 +410,116 @@ def create_material_color(material_name="New Color Material", color=(0.0, 0.0, 0
 
 def add_active_material_to_gp(gp_object=None, material_to_add=None):
     """
-    Change the "active material" of a GP object, so it can be used to draw
+    Change the "active material" of a GP object, so it can be used to draw.
+    The material is only added if the object doesn't have it yet.
     :param gp_object: Reference to the gp object inside Blender
     :param material_to_add: Reference to the gp material inside Blender
     """
-    gp_object.data.materials.append(material_to_add)
-    gp_object.active_material = material_to_add
+    materials = list(gp_object.data.materials)
+    if material_to_add not in materials:
+        gp_object.data.materials.append(material_to_add)
+        materials.append(material_to_add)
+    gp_object.active_material_index = materials.index(material_to_add)
 
 
-# MAIN DRAWING METHOD
-def apply_custom_vertex_config_leaves(point=None):
+# ASPECT-RELATED METHODS: REGISTRY
+# The add-on materials and images are tagged with a custom property (stable key),
+# so they are reused instead of creating new copies on every tree generation.
+
+REGISTRY_PROPERTY = "gp_tree_key"
+TRUNK_MATERIAL_KEY = "TRUNK"
+LEAVES_MATERIAL_KEY = "LEAVES"
+LEAVES_IMAGE_KEY = "LEAVES_TEXTURE"
+
+# Names given to the materials and images by the versions without registry
+LEGACY_MATERIAL_NAMES = re.compile(r"^(Trunk|Leaves)(\.\d{3})?$")
+LEGACY_IMAGE_NAMES = re.compile(r"^leaves_texture\.png(\.\d{3})?$")
+
+
+def find_registered(datablocks=None, key=""):
+    """
+    Look for an add-on datablock (material, image) by its registry key
+    :param datablocks: Blender data collection (bpy.data.materials, bpy.data.images)
+    :param str key: Registry key
+    :return:
+    datablock: Reference to the datablock inside Blender (None if not found)
+    """
+    for datablock in datablocks:
+        if datablock.get(REGISTRY_PROPERTY) == key:
+            return datablock
+    return None
+
+
+def get_trunk_material():
+    """
+    Get the trunk material, creating it only if it doesn't exist yet
+    :return:
+    gp_mat: Reference to the material inside Blender
+    """
+    gp_mat = find_registered(datablocks=bpy.data.materials, key=TRUNK_MATERIAL_KEY)
+    if gp_mat is None:
+        gp_mat = create_material_color(material_name="Trunk", color=(0.0581109, 0.0284933, 0.0100318, 1), mode='LINE')
+        gp_mat[REGISTRY_PROPERTY] = TRUNK_MATERIAL_KEY
+    return gp_mat
+
+
+def get_leaves_image():
+    """
+    Get the leaves texture image, importing it only if it doesn't exist yet
+    :return:
+    image: Image object in Blender
+    """
+    image = find_registered(datablocks=bpy.data.images, key=LEAVES_IMAGE_KEY)
+    if image is None:
+        # Get current addon path
+        script_file = os.path.realpath(__file__)
+        directory = os.path.dirname(script_file)
+        img_dir = "{}/{}".format(directory, "leaves_texture.png")
+
+        image = import_image(image_path=img_dir)
+        image[REGISTRY_PROPERTY] = LEAVES_IMAGE_KEY
+    return image
+
+
+def get_leaves_material():
+    """
+    Get the leaves material (with the leaves texture), creating it only if it doesn't exist yet
+    :return:
+    gp_mat: Reference to the material inside Blender
+    """
+    gp_mat = find_registered(datablocks=bpy.data.materials, key=LEAVES_MATERIAL_KEY)
+    if gp_mat is None:
+        gp_mat = create_material_texture(material_name="Leaves", color=(0.0, 0.0, 0.0, 1.0), mode='DOTS',
+                                         text_img=get_leaves_image())
+        gp_mat[REGISTRY_PROPERTY] = LEAVES_MATERIAL_KEY
+    return gp_mat
+
+
+def purge_orphan_data():
     """
-    For a given point (of a stroke), the color and UV rotation properties are
-    randomly modified (on a controlled range) so different shadows of a green
-    color are obtained, achieving a more interesting look on the leaves.
-    :param point: Reference to the gp point (of a stroke) inside Blender
+    Remove the add-on materials and images that are not used anymore, including
+    the duplicates created by the versions without registry.
+    :return:
+    int n_materials: Number of removed materials
+    int n_images: Number of removed images
     """
-    point.vertex_color.data.vertex_color[0] = random.uniform(0.300, 0.350)  # Hue
-    point.vertex_color.data.vertex_color[1] = 0.502  # Saturation
-    point.vertex_color.data.vertex_color[2] = random.uniform(0.200, 0.300)  # Value
-    point.vertex_color.data.vertex_color[3] = random.uniform(0.0, 1.0) # Mix factor
+    orphan_materials = [mat for mat in bpy.data.materials if mat.users == 0 and mat.is_grease_pencil and
+                        (REGISTRY_PROPERTY in mat or LEGACY_MATERIAL_NAMES.match(mat.name))]
+    for mat in orphan_materials:
+        bpy.data.materials.remove(mat)
+
+    # Images go after the materials, as removing a material releases its image
+    orphan_images = [image for image in bpy.data.images if image.users == 0 and
+                     (REGISTRY_PROPERTY in image or LEGACY_IMAGE_NAMES.match(image.name))]
+    for image in orphan_images:
+        bpy.data.images.remove(image)
+
+    return len(orphan_materials), len(orphan_images)
+
+
+# MAIN DRAWING METHOD
+# Leaves drawn in every stroke when the leaves are packed (see build_leaf_buffers)
+LEAVES_PER_STROKE = 1000
 
 
 def draw_line(gp_frame=None, p0=Vector((0, 0, 0)), p1=Vector((0, 0, 0)), thickness=1):
@@ -191,144 +546,956 @@ def draw_line(gp_frame=None, p0=Vector((0, 0, 0)), p1=Vector((0, 0, 0)), thickne
     return gp_stroke
 
 
-def draw_line_custom_leaves(gp_frame=None, p0=Vector((0, 0, 0)), p1=Vector((0, 0, 0)), thickness=1):
+def build_branch_buffers(branches):
+    """
+    Build the flat buffers needed to draw a list of branches in bulk, one 2-point
+    stroke (straight line) per branch.
+    :param branches: Space Colonization branches
+    :return:
+    list point_counts: Number of points of each stroke
+    list coords: x, y, z coordinates of every point, one after another
+    list pressures: Pressure (thickness) of every point
+    """
+    point_counts = [2] * len(branches)
+    coords = []
+    pressures = []
+
+    for branch in branches:
+        coords.extend(branch.pos)
+        coords.extend(branch.pos + branch.direction * branch.length)
+        pressures.append(branch.thickness)
+        pressures.append(branch.thickness)
+
+    return point_counts, coords, pressures
+
+
+def get_leaf_positions(tree=None, leaves=None):
+    """
+    Get the positions of the leaves to draw. The NumPy engines and the skeletons keep their leaves
+    in an array (leaf_positions), so the positions are sliced from it; only the leaves of the
+    OBJECT engine are read one by one.
+    :param tree: Space Colonization tree object (or tree skeleton)
+    :param leaves: Leaves to draw (None = all the tree leaves)
+    :return:
+    array positions: (n, 3) array with the x, y, z position of every leaf
+    """
+    import numpy as np
+
+    leaf_positions = getattr(tree, "leaf_positions", None)
+    if leaf_positions is not None:
+        leaf_positions = np.asarray(leaf_positions, dtype=np.float64).reshape(-1, 3)
+        if leaves is None:
+            # Every leaf of a skeleton is drawn (without building its views)
+            if isinstance(tree, Skeleton):
+                return leaf_positions
+            leaves = tree.original_leaves
+            if len(leaves) == len(leaf_positions):
+                return leaf_positions
+
+        # Views of the leaf array (e.g. the drawn leaves of a large-scale tree, or a level of detail)
+        if leaves and isinstance(leaves[0], LeafView) and leaves[0].owner is tree:
+            indices = np.fromiter((leaf.index for leaf in leaves), dtype=np.int64, count=len(leaves))
+            return leaf_positions[indices]
+
+    leaves = tree.original_leaves if leaves is None else leaves
+    return np.array([tuple(leaf.pos) for leaf in leaves], dtype=np.float64).reshape(-1, 3)
+
+
+def build_leaf_buffers(positions, seed=None, leaves_per_stroke=1):
+    """
+    Build the flat buffers needed to draw the leaves in bulk, generating all the random values
+    at once: every leaf is a 2-point line around its position (random directions, 0.01 long),
+    with a random thickness and a random shade of green (hue, saturation, value, mix factor)
+    in the vertex color of each point.
+    :param positions: (n, 3) array with the leaf positions (see get_leaf_positions)
+    :param seed: Seed of the random values (same seed, same leaves)
+    :param int leaves_per_stroke: Number of leaves (point pairs) of each stroke. The leaves
+                                  material draws every point as a dot, so packing several leaves
+                                  into one stroke draws the same dots with far fewer strokes
+    :return:
+    list point_counts: Number of points of each stroke
+    float32 array coords: x, y, z coordinates of every point, one after another
+    float32 array pressures: Pressure (thickness) of every point
+    float32 array vertex_colors: Vertex color (hue, saturation, value, mix factor) of every point
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    n_leaves = len(positions)
+
+    # Same random directions as generate_random_direction, 2 per leaf
+    alpha = rng.uniform(0, math.pi, (n_leaves, 2))
+    theta = rng.uniform(0, 2 * math.pi, (n_leaves, 2))
+    directions = np.stack((np.cos(theta) * np.sin(alpha), np.sin(theta) * np.sin(alpha), np.cos(alpha)), axis=-1)
+    coords = (positions[:, None, :] + directions * 0.01).astype(np.float32).ravel()
+
+    pressures = np.repeat(rng.uniform(200, 300, n_leaves), 2).astype(np.float32)
+
+    vertex_colors = np.empty((2 * n_leaves, 4), dtype=np.float32)
+    vertex_colors[:, 0] = rng.uniform(0.300, 0.350, 2 * n_leaves)  # Hue
+    vertex_colors[:, 1] = 0.502  # Saturation
+    vertex_colors[:, 2] = rng.uniform(0.200, 0.300, 2 * n_leaves)  # Value
+    vertex_colors[:, 3] = rng.uniform(0.0, 1.0, 2 * n_leaves)  # Mix factor
+
+    leaves_per_stroke = max(1, leaves_per_stroke)
+    n_full, n_rest = divmod(n_leaves, leaves_per_stroke)
+    point_counts = [2 * leaves_per_stroke] * n_full + ([2 * n_rest] if n_rest else [])
+
+    return point_counts, coords, pressures, vertex_colors.ravel()
+
+
+def build_chain_buffers(first_branch):
+    """
+    Build the flat buffers needed to draw a tree in bulk, one multi-point stroke
+    (polyline) per chain of branches without forks.
+    :param first_branch: Root branch of the Space Colonization tree
+    :return:
+    list point_counts: Number of points of each stroke
+    list coords: x, y, z coordinates of every point, one after another
+    list pressures: Pressure (thickness) of every point
+    """
+    point_counts = []
+    coords = []
+    pressures = []
+
+    for chain in get_branch_chains(first_branch):
+        coords.extend(chain[0].pos)
+        pressures.append(chain[0].thickness)
+
+        # Each branch adds its end point (the next branch starts there)
+        for branch in chain:
+            coords.extend(branch.pos + branch.direction * branch.length)
+            pressures.append(branch.thickness)
+
+        point_counts.append(len(chain) + 1)
+
+    return point_counts, coords, pressures
+
+
+def count_strokes(gp_object=None, layer_name="Layer", frame_number=0):
+    """
+    Count the strokes and points shown on a frame of a gp layer (the ones of the last
+    frame drawn up to that frame number)
+    :param gp_object: Reference to the gp object inside Blender
+    :param str layer_name: Layer name
+    :param frame_number: Frame number
+    :return:
+    int n_strokes: Number of strokes
+    int n_points: Number of points (of all the strokes)
+    """
+    gp_layer = get_gp_layer(gp_object=gp_object, layer_name=layer_name)
+
+    gp_frame = None
+    for frame in gp_layer.frames:
+        if frame.frame_number <= frame_number and (gp_frame is None or frame.frame_number > gp_frame.frame_number):
+            gp_frame = frame
+    if gp_frame is None:
+        return 0, 0
+
+    return len(gp_frame.strokes), sum(len(gp_stroke.points) for gp_stroke in gp_frame.strokes)
+
+
+def draw_strokes(gp_frame=None, point_counts=(), coords=(), pressures=(), vertex_colors=None):
     """
-    Create a new stroke with 2 points (straight line) inside a given gp frame.
-    Apply a special per-vertex configuration for textured leaves to look better.
+    Create several strokes inside a given gp frame, filling all the point
+    coordinates and pressures of each stroke at once (foreach_set).
     :param gp_frame: Reference to the gp frame inside Blender
-    :param Vector p0: Position of the first point of the line
-    :param Vector p1: Position of the second point of the line
-    :param thickness: Line thickness
+    :param point_counts: Number of points of each stroke
+    :param coords: x, y, z coordinates of every point, one stroke after another
+    :param pressures: Pressure (thickness) of every point
+    :param vertex_colors: R, G, B, A vertex color of every point (None = default vertex colors)
     :return:
-    grease pencil stroke: Reference to the gp stroke inside Blender
+    list strokes: References to the new gp strokes inside Blender
     """
+    gp_strokes = []
+    start = 0
 
-    # Init new stroke
-    gp_stroke = gp_frame.strokes.new()
-    gp_stroke.display_mode = '3DSPACE'  # allows for editing
+    for count in point_counts:
+        end = start + count
 
-    # Define stroke geometry
-    gp_stroke.points.add(count=2)
-    gp_stroke.points[0].co = p0
-    apply_custom_vertex_config_leaves(gp_stroke.points[0])
-    gp_stroke.points[0].pressure = thickness
-    gp_stroke.points[1].co = p1
-    apply_custom_vertex_config_leaves(gp_stroke.points[1])
-    gp_stroke.points[1].pressure = thickness
-    return gp_stroke
+        # Init new stroke
+        gp_stroke = gp_frame.strokes.new()
+        gp_stroke.display_mode = '3DSPACE'  # allows for editing
+
+        # Define stroke geometry
+        gp_stroke.points.add(count=count)
+        gp_stroke.points.foreach_set("co", coords[start * 3:end * 3])
+        gp_stroke.points.foreach_set("pressure", pressures[start:end])
+        if vertex_colors is not None:
+            gp_stroke.points.foreach_set("vertex_color", vertex_colors[start * 4:end * 4])
+
+        gp_strokes.append(gp_stroke)
+        start = end
 
+    return gp_strokes
 
-def draw_tree(tree=None, frame=0, overwrite=False, edit_gp_object=None):
+
+def update_strokes(gp_frame=None, point_counts=(), coords=(), pressures=(), vertex_colors=None):
     """
-    For a given Space Colonization tree, go over all the branches and draw them with
-    a brown material and different thickness.
-    :param tree: Space Colonization tree object
+    Draw several strokes inside a given gp frame reusing the strokes it already has: the existing
+    strokes are resized in place and their points filled at once (foreach_set), and only the
+    missing strokes are created (see draw_strokes) or the extra ones removed.
+    :param gp_frame: Reference to the gp frame inside Blender
+    :param point_counts: Number of points of each stroke
+    :param coords: x, y, z coordinates of every point, one stroke after another
+    :param pressures: Pressure (thickness) of every point
+    :param vertex_colors: R, G, B, A vertex color of every point (None = keep the vertex colors)
+    :return:
+    int n_reused: Number of reused strokes
+    """
+    gp_strokes = gp_frame.strokes
+    n_reused = min(len(gp_strokes), len(point_counts))
+
+    for _ in range(len(gp_strokes) - n_reused):
+        gp_strokes.remove(gp_strokes[-1])
+
+    start = 0
+    for index in range(n_reused):
+        count = point_counts[index]
+        end = start + count
+
+        # Resize the stroke
+        gp_points = gp_strokes[index].points
+        n_points = len(gp_points)
+        if n_points < count:
+            gp_points.add(count=count - n_points)
+        for _ in range(n_points - count):
+            gp_points.pop()
+
+        gp_points.foreach_set("co", coords[start * 3:end * 3])
+        gp_points.foreach_set("pressure", pressures[start:end])
+        if vertex_colors is not None:
+            gp_points.foreach_set("vertex_color", vertex_colors[start * 4:end * 4])
+        start = end
+
+    draw_strokes(gp_frame=gp_frame, point_counts=point_counts[n_reused:], coords=coords[start * 3:],
+                 pressures=pressures[start:], vertex_colors=None if vertex_colors is None else vertex_colors[start * 4:])
+
+    return n_reused
+
+
+def make_single_user(gp_object=None):
+    """
+    Give a gp object its own copy of its gp data if other objects share it (the linked duplicates
+    of a forest), so overwriting its strokes doesn't change the other trees.
+    :param gp_object: Reference to the gp object inside Blender
+    """
+    if gp_object.data.users > 1:
+        gp_object.data = gp_object.data.copy()
+
+
+def get_trunk_frame(frame=0, overwrite=False, edit_gp_object=None, layer_name="Trunk"):
+    """
+    Get the gp frame where the tree branches are drawn, with the trunk material.
     :param frame: Frame number
-    :param bool overwrite: True if the edit_gp_object must be overwritten
+    :param bool overwrite: True if the edit_gp_object must be overwritten (its frame keeps the strokes,
+                           to be reused by update_strokes, and the other frames are removed)
                         False if a new gp_object must be created
     :param edit_gp_object: gp_object to overwrite (just used if overwrite=True)
+    :param str layer_name: Layer where the branches are drawn
     :return:
     grease pencil object: Reference to the gp object inside Blender
+    grease pencil frame: Reference to the gp frame inside Blender
     """
-    gp_material = create_material_color(material_name="Trunk", color=(0.0581109, 0.0284933, 0.0100318, 1), mode='LINE')
+    gp_material = get_trunk_material()
 
     if not overwrite:
         gp_object = get_gp_object(name="Tree_trunk", create_new=True)
     else:
         gp_object = edit_gp_object
+        make_single_user(gp_object=gp_object)
 
-    gp_layer = get_gp_layer(gp_object=gp_object, layer_name="Trunk", clear_layer=overwrite)
+    gp_layer = get_gp_layer(gp_object=gp_object, layer_name=layer_name)
 
-    gp_frame = get_frame_gp_layer(gp_layer=gp_layer, frame_number=frame)
+    if overwrite:
+        gp_frame = reuse_frame_gp_layer(gp_layer=gp_layer, frame_number=frame)
+    else:
+        gp_frame = get_frame_gp_layer(gp_layer=gp_layer, frame_number=frame)
 
     add_active_material_to_gp(gp_object=gp_object, material_to_add=gp_material)
 
-    for branch in tree.branches:
-        draw_line(gp_frame=gp_frame, p0=branch.pos, p1=branch.pos + branch.direction * branch.length, thickness=branch.thickness)
+    return gp_object, gp_frame
+
+
+def draw_tree(tree=None, frame=0, overwrite=False, edit_gp_object=None, draw_mode='BULK'):
+    """
+    For a given Space Colonization tree, go over all the branches and draw them with
+    a brown material and different thickness.
+    :param tree: Space Colonization tree object
+    :param frame: Frame number
+    :param bool overwrite: True if the edit_gp_object must be overwritten
+                        False if a new gp_object must be created
+    :param edit_gp_object: gp_object to overwrite (just used if overwrite=True)
+    :param str draw_mode: 'BULK' to fill the strokes from flat buffers,
+                          'CHAINS' to draw one polyline per chain of branches without forks,
+                          'PER_BRANCH' to draw the branches one by one (point by point)
+    :return:
+    grease pencil object: Reference to the gp object inside Blender
+    """
+    gp_object, gp_frame = get_trunk_frame(frame=frame, overwrite=overwrite, edit_gp_object=edit_gp_object)
+
+    # Overwritten trees reuse their strokes, whatever the draw mode (PER_BRANCH draws the same strokes as BULK)
+    if draw_mode == 'PER_BRANCH' and not overwrite:
+        for branch in tree.branches:
+            draw_line(gp_frame=gp_frame, p0=branch.pos, p1=branch.pos + branch.direction * branch.length, thickness=branch.thickness)
+    else:
+        if draw_mode == 'CHAINS':
+            point_counts, coords, pressures = build_chain_buffers(tree.first_branch)
+        else:
+            point_counts, coords, pressures = build_branch_buffers(tree.branches)
+        update_strokes(gp_frame=gp_frame, point_counts=point_counts, coords=coords, pressures=pressures)
+
+    if overwrite:
+        gp_object.data.update_tag()
 
     return gp_object
 
 
-def draw_leaves(tree=None, frame=0, overwrite=False, edit_gp_object=None):
+def bake_tree_growth(tree=None, start_frame=0, stats=NULL_STATS):
+    """
+    Grow a Space Colonization tree and draw every growth step into its own frame: the trunk
+    on start_frame and the iteration k on start_frame + k. Every frame is a copy of the
+    previous one plus the new branches of its step (drawn as one stroke per branch).
+    :param tree: Space Colonization tree object (not generated yet)
+    :param start_frame: Number of the first frame
+    :param GrowthStats stats: Where the drawing timings are recorded
+    :return:
+    grease pencil object: Reference to the trunk gp object inside Blender
+    int last_frame: Number of the last baked frame
+    """
+    gp_object, gp_frame = get_trunk_frame(frame=start_frame, overwrite=False, edit_gp_object=None)
+    gp_layer = get_gp_layer(gp_object=gp_object, layer_name="Trunk")
+    frames_index = index_gp_frames(gp_layer)
+
+    frame_number = start_frame
+    for step, new_branches in enumerate(tree.grow()):
+        with stats.phase("draw_tree"):
+            if step > 0:
+                frame_number = start_frame + step
+                gp_frame = copy_frame_gp_layer(gp_layer=gp_layer, gp_frame=gp_frame, frame_number=frame_number,
+                                               frames_index=frames_index)
+
+            point_counts, coords, pressures = build_branch_buffers(new_branches)
+            draw_strokes(gp_frame=gp_frame, point_counts=point_counts, coords=coords, pressures=pressures)
+
+    return gp_object, frame_number
+
+
+def draw_leaves(tree=None, frame=0, overwrite=False, edit_gp_object=None, leaves=None, layer_name="Leaves",
+                pack_leaves=False):
     """
      For a given Space Colonization tree, go over all the leaves and draw them with
      a special leaf material and different thickness.
      :param tree: Space Colonization tree object
      :param frame: Frame number
-     :param bool overwrite: True if the edit_gp_object must be overwritten
+     :param bool overwrite: True if the edit_gp_object must be overwritten (its strokes are reused)
                             False if a new gp_object must be created
      :param edit_gp_object: gp_object to overwrite (just used if overwrite=True)
+     :param leaves: Leaves to draw (None = all the tree leaves)
+     :param str layer_name: Layer where the leaves are drawn
+     :param bool pack_leaves: True to draw LEAVES_PER_STROKE leaves per stroke (see build_leaf_buffers)
      :return:
      grease pencil object: Reference to the gp object inside Blender
      """
 
     # Add material with image
-    # Get current addon path
-    script_file = os.path.realpath(__file__)
-    directory = os.path.dirname(script_file)
-    img_dir = "{}/{}".format(directory, "leaves_texture.png")
-
-    text_gp_img = import_image(image_path=img_dir)
-
-    gp_material = create_material_texture(material_name="Leaves", color=(0.0, 0.0, 0.0, 1.0), mode='DOTS',
-                                          text_img=text_gp_img)
+    gp_material = get_leaves_material()
 
     if not overwrite:
         gp_object = get_gp_object(name="Tree_leaves", create_new=True)
     else:
         gp_object = edit_gp_object
+        make_single_user(gp_object=gp_object)
 
-    gp_layer = get_gp_layer(gp_object=gp_object, layer_name="Leaves", clear_layer=overwrite)
-
-    gp_frame = get_frame_gp_layer(gp_layer=gp_layer, frame_number=frame)
+    gp_layer = get_gp_layer(gp_object=gp_object, layer_name=layer_name)
 
     add_active_material_to_gp(gp_object=gp_object, material_to_add=gp_material)
 
-    # Create 2 points per leaf in order to draw a line
-    for leaf in tree.original_leaves:
-        p0 = leaf.pos + generate_random_direction() * 0.01
-        p1 = leaf.pos + generate_random_direction() * 0.01
-
-        draw_line_custom_leaves(gp_frame=gp_frame, p0=p0, p1=p1, thickness=random.uniform(200, 300))
+    # Same tree seed, same leaves
+    point_counts, coords, pressures, vertex_colors = build_leaf_buffers(
+        get_leaf_positions(tree=tree, leaves=leaves), seed=tree.seed,
+        leaves_per_stroke=LEAVES_PER_STROKE if pack_leaves else 1)
+
+    if overwrite:
+        # Reuse the leaf strokes
+        gp_frame = reuse_frame_gp_layer(gp_layer=gp_layer, frame_number=frame)
+        update_strokes(gp_frame=gp_frame, point_counts=point_counts, coords=coords, pressures=pressures,
+                       vertex_colors=vertex_colors)
+        gp_object.data.update_tag()
+    else:
+        gp_frame = get_frame_gp_layer(gp_layer=gp_layer, frame_number=frame)
+        draw_strokes(gp_frame=gp_frame, point_counts=point_counts, coords=coords, pressures=pressures,
+                     vertex_colors=vertex_colors)
 
     return gp_object
 
 
-# PROPS
+def create_tree_collection(tree=None, frame=0, draw_mode='BULK', parent_collection=None, name="GP_Tree",
+                           stats=NULL_STATS, pack_leaves=False):
+    """
+    Draw a tree (trunk and leaves) into new gp objects and group them in a new collection.
+    :param tree: Space Colonization tree object (or tree skeleton)
+    :param frame: Frame number
+    :param str draw_mode: How the branches are drawn (see draw_tree)
+    :param parent_collection: Collection where the new collection is linked (None = scene collection)
+    :param str name: Name of the new collection
+    :param GrowthStats stats: Where the drawing timings are recorded
+    :param bool pack_leaves: True to draw several leaves per stroke (see draw_leaves)
+    :return:
+    collection: Reference to the new collection inside Blender
+    grease pencil object: Reference to the trunk gp object inside Blender
+    grease pencil object: Reference to the leaves gp object inside Blender
+    """
+    with stats.phase("draw_tree"):
+        gp_tree = draw_tree(tree=tree, frame=frame, overwrite=False, edit_gp_object=None, draw_mode=draw_mode)
+    with stats.phase("draw_leaves"):
+        gp_leaves = draw_leaves(tree=tree, frame=frame, overwrite=False, edit_gp_object=None,
+                                pack_leaves=pack_leaves)
+    tree_collection = link_tree_collection(gp_tree=gp_tree, gp_leaves=gp_leaves, parent_collection=parent_collection,
+                                           name=name)
 
-class GPT_property_group(bpy.types.PropertyGroup):
+    return tree_collection, gp_tree, gp_leaves
 
-    # Update methods
-    def update_trunk_length(self, context):
-        """
-        Update method for the parameter trunk_length.
-        Ensures that trunk length value is never less than tree_crown_radius
-        :param context: bpy.context
-        """
-        trunk_length = context.scene.gp_tree.trunk_length
-        tree_crown_radius = context.scene.gp_tree.tree_crown_radius
 
-        if trunk_length < tree_crown_radius:
-            context.scene.gp_tree.trunk_length = tree_crown_radius
+def link_tree_collection(gp_tree=None, gp_leaves=None, parent_collection=None, name="GP_Tree"):
+    """
+    Group the tree gp objects (trunk and leaves) in a new collection.
+    :param gp_tree: Reference to the trunk gp object inside Blender
+    :param gp_leaves: Reference to the leaves gp object inside Blender
+    :param parent_collection: Collection where the new collection is linked (None = scene collection)
+    :param str name: Name of the new collection
+    :return:
+    collection: Reference to the new collection inside Blender
+    """
+    # Create a new Blender collection and add the GP objects to it
+    tree_collection = bpy.data.collections.new(name)
+    if parent_collection is None:
+        parent_collection = bpy.context.scene.collection
+    parent_collection.children.link(tree_collection)
 
-    def update_tree_crown_radius(self, context):
-        """
-        Update method for the parameter tree_crown_radius.
-        Ensures that trunk length value is never less than tree_crown_radius
-        :param context: bpy.context
-        """
-        trunk_length = context.scene.gp_tree.trunk_length
-        tree_crown_radius = context.scene.gp_tree.tree_crown_radius
+    for collection in gp_tree.users_collection:
+        collection.objects.unlink(gp_tree)
 
-        if trunk_length < tree_crown_radius:
-            context.scene.gp_tree.tree_crown_radius = trunk_length
+    for collection in gp_leaves.users_collection:
+        collection.objects.unlink(gp_leaves)
 
+    tree_collection.objects.link(gp_tree)
+    tree_collection.objects.link(gp_leaves)
 
-    # Select the editable GP tree
+    return tree_collection
+
+
+# LEVELS OF DETAIL
+# LOD0 is the tree as drawn by draw_tree and draw_leaves ("Trunk" and "Leaves" layers),
+# the simplified levels are drawn into their own layers of the same gp objects
+LOD_LAYER_PATTERN = re.compile(r"^(Trunk|Leaves)(?: LOD(\d+))?$")
+
+
+def lod_layer_name(base_name="Trunk", level=0):
+    """
+    :param str base_name: LOD0 layer name ("Trunk" or "Leaves")
+    :param int level: Level of detail
+    :return:
+    str layer_name: Name of the layer where the level is drawn
+    """
+    return base_name if level == 0 else "{} LOD{}".format(base_name, level)
+
+
+def draw_tree_lods(tree=None, frame=0, gp_tree=None, gp_leaves=None, pack_leaves=False):
+    """
+    Draw the simplified levels of detail of a tree (see SC_Algorithm.lod) into their own layers
+    of its trunk and leaves gp objects: simplified branch chains without the thinnest twigs,
+    and fewer leaves.
+    :param tree: Space Colonization tree object (or tree skeleton)
+    :param frame: Frame number
+    :param gp_tree: Reference to the trunk gp object inside Blender (LOD0 already drawn)
+    :param gp_leaves: Reference to the leaves gp object inside Blender (LOD0 already drawn)
+    :param bool pack_leaves: True to draw several leaves per stroke (see draw_leaves)
+    :return:
+    list n_points: Number of points (trunk and leaves) of every level, LOD0 included
+    """
+    n_points = []
+    for level in range(len(LOD_LEVELS)):
+        if level > 0:
+            tolerance, min_thickness, leaf_ratio = get_lod_settings(tree, level)
+
+            _, gp_frame = get_trunk_frame(frame=frame, overwrite=True, edit_gp_object=gp_tree,
+                                          layer_name=lod_layer_name("Trunk", level))
+            point_counts, coords, pressures = build_lod_buffers(tree, tolerance=tolerance,
+                                                                min_thickness=min_thickness)
+            update_strokes(gp_frame=gp_frame, point_counts=point_counts, coords=coords, pressures=pressures)
+
+            draw_leaves(tree=tree, frame=frame, overwrite=True, edit_gp_object=gp_leaves,
+                        leaves=thin_leaves(tree.original_leaves, leaf_ratio),
+                        layer_name=lod_layer_name("Leaves", level), pack_leaves=pack_leaves)
+
+        n_points.append(
+            count_strokes(gp_object=gp_tree, layer_name=lod_layer_name("Trunk", level), frame_number=frame)[1] +
+            count_strokes(gp_object=gp_leaves, layer_name=lod_layer_name("Leaves", level), frame_number=frame)[1])
+
+    return n_points
+
+
+def show_tree_lod(collection=None, level=0):
+    """
+    Show only the layers of one level of detail of a tree.
+    :param collection: Reference to the tree collection inside Blender
+    :param int level: Level of detail
+    """
+    for gp_object in collection.all_objects:
+        if gp_object.type != 'GPENCIL':
+            continue
+        for gp_layer in gp_object.data.layers:
+            match = LOD_LAYER_PATTERN.match(gp_layer.info)
+            if match is None:
+                continue
+            hide = int(match.group(2) or 0) != level
+            # Only changed layers are written (every change triggers a new depsgraph update)
+            if gp_layer.hide != hide:
+                gp_layer.hide = hide
+
+
+def get_camera_lod(collection=None, camera=None, ui_values=None):
+    """
+    Get the level of detail of a tree from its distance to the camera.
+    :param collection: Reference to the tree collection inside Blender
+    :param camera: Reference to the camera object inside Blender
+    :param ui_values: Add-on properties (GPT_property_group)
+    :return:
+    int level: Level of detail
+    """
+    gp_objects = [gp_object for gp_object in collection.all_objects if gp_object.type == 'GPENCIL']
+    if not gp_objects:
+        return 0
+
+    camera_location = camera.matrix_world.translation
+    distance = min((gp_object.matrix_world.translation - camera_location).length for gp_object in gp_objects)
+    if distance >= ui_values.lod2_distance:
+        return 2
+    if distance >= ui_values.lod1_distance:
+        return 1
+    return 0
+
+
+@bpy.app.handlers.persistent
+def update_tree_lods(scene, depsgraph=None):
+    """
+    Show the level of detail of every tree with LODs that matches its distance to the scene
+    camera (LOD0 if the switch is disabled or there's no camera). Runs after every frame
+    change and depsgraph update.
+    :param scene: Reference to the scene inside Blender
+    :param depsgraph: Evaluated depsgraph (unused)
+    """
+    ui_values = scene.gp_tree
+    camera = scene.camera if ui_values.lod_switch else None
+
+    for collection in bpy.data.collections:
+        if "gp_tree_lods" not in collection:
+            continue
+        level = get_camera_lod(collection=collection, camera=camera, ui_values=ui_values) if camera else 0
+        show_tree_lod(collection=collection, level=level)
+
+
+# STATS
+# Stats of the last tree generation, shown in the panel (only recorded when they are shown)
+last_stats = NULL_STATS
+
+
+def new_stats(ui_values):
+    """
+    Get the object where the stats of a new tree generation are recorded
+    :param ui_values: Add-on properties (GPT_property_group)
+    :return:
+    GrowthStats stats: New stats (NULL_STATS, which records nothing, if the stats are hidden)
+    """
+    if ui_values.show_stats:
+        return GrowthStats()
+    return NULL_STATS
+
+
+def publish_stats(operator=None, stats=NULL_STATS, gp_tree=None, gp_leaves=None, frame=0, log=False):
+    """
+    Count the strokes and points of a new tree and keep its stats as the last ones.
+    :param operator: Operator used to log the stats
+    :param GrowthStats stats: Stats of the tree generation
+    :param gp_tree: Reference to the trunk gp object inside Blender
+    :param gp_leaves: Reference to the leaves gp object inside Blender
+    :param frame: Frame number
+    :param bool log: True if the stats must be reported too
+    """
+    global last_stats
+    if not stats.enabled:
+        return
+
+    n_strokes = 0
+    n_points = 0
+    for gp_object, layer_name in ((gp_tree, "Trunk"), (gp_leaves, "Leaves")):
+        if gp_object is not None:
+            object_strokes, object_points = count_strokes(gp_object=gp_object, layer_name=layer_name,
+                                                          frame_number=frame)
+            n_strokes = n_strokes + object_strokes
+            n_points = n_points + object_points
+    stats.set_value("strokes", n_strokes)
+    stats.set_value("points", n_points)
+
+    last_stats = stats
+    if log:
+        operator.report({'INFO'}, "Stats: " + ", ".join("{} {}".format(label, text)
+                                                         for label, text in stats.summary()))
+
+
+# LIVE PREVIEW
+# Seconds without changes before the preview is drawn, and before it's refined
+LIVE_PREVIEW_DELAY = 0.2
+LIVE_REFINE_DELAY = 0.5
+# Seconds of growth per timer call while refining (Blender keeps responding in between)
+LIVE_REFINE_SLICE = 0.05
+
+
+def get_collection_gp_objects(collection=None):
+    """
+    Get the gp objects of a tree collection.
+    :param collection: Reference to the tree collection inside Blender
+    :return:
+    grease pencil object: Reference to the trunk gp object inside Blender
+    grease pencil object: Reference to the leaves gp object inside Blender
+    """
+    gp_tree = [gp for gp in collection.all_objects if "Tree_trunk" in gp.name_full][0]
+    gp_leaves = [gp for gp in collection.all_objects if "Tree_leaves" in gp.name_full][0]
+
+    return gp_tree, gp_leaves
+
+
+def redraw_view3d_areas(context):
+    """
+    Redraw the 3D viewports (and the add-on panel), e.g. from a timer, where there's no area in the context.
+    :param context: bpy.context
+    """
+    for window in context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+
+class LivePreview:
+    """
+    Live preview of the selected tree while its properties change. Every change (re)starts a
+    debounced timer (bpy.app.timers): once the properties settle, a low resolution preview
+    (see SC_Algorithm.growth.preview_params) is drawn into the tree, and then the full tree is
+    grown a slice at a time and drawn when it's complete. A new change cancels the refinement.
+    """
+
+    def __init__(self):
+        self.stage = None
+        self.params = None
+        self.tree = None
+        self.steps = None
+        # Message of the last failed preview (shown in the panel until the next change)
+        self.error = None
+        # Same function object for every register/unregister call
+        self.timer = self.tick
+
+    def schedule(self, context):
+        """
+        Restart the preview with the current properties (after LIVE_PREVIEW_DELAY seconds).
+        :param context: bpy.context
+        """
+        self.cancel()
+        if not context.scene.gp_tree.live_preview or not GPT_OT_overwrite_tree.poll(context):
+            return
+
+        self.stage = 'PREVIEW'
+        bpy.app.timers.register(self.timer, first_interval=LIVE_PREVIEW_DELAY)
+
+    def cancel(self):
+        """
+        Stop the preview timer and drop the refinement in progress (if any) and the last error.
+        """
+        if bpy.app.timers.is_registered(self.timer):
+            bpy.app.timers.unregister(self.timer)
+        if self.steps is not None:
+            self.steps.close()
+        self.stage = None
+        self.params = None
+        self.tree = None
+        self.steps = None
+        self.error = None
+
+    def tick(self):
+        """
+        Timer function: draw the preview, or grow the full tree for LIVE_REFINE_SLICE seconds.
+        :return:
+        float interval: Seconds until the next call (None = the preview is finished)
+        """
+        context = bpy.context
+        if self.stage is None or not GPT_OT_overwrite_tree.poll(context):
+            self.cancel()
+            return None
+
+        try:
+            if self.stage == 'PREVIEW':
+                return self.draw_preview(context)
+            return self.refine(context)
+        except Exception as e:
+            self.cancel()
+            self.error = '{}'.format(e)
+            redraw_view3d_areas(context)
+            return None
+
+    def draw_preview(self, context):
+        """
+        Draw the low resolution tree and prepare the refinement (nothing to refine if the full
+        tree is cached).
+        :param context: bpy.context
+        :return:
+        float interval: Seconds until the refinement starts (None = the preview is finished)
+        """
+        ui_values = context.scene.gp_tree
+        self.params = get_tree_params(ui_values)
+
+        cache = get_skeleton_cache(ui_values)
+        if cache is not None:
+            skeleton = cache.get(skeleton_key(**self.params))
+            if skeleton is not None:
+                self.draw(context, skeleton, complete=True)
+                self.cancel()
+                return None
+
+        skeleton, _ = get_tree_skeleton(params=preview_params(self.params))
+        if skeleton is not None:
+            self.draw(context, skeleton, complete=False)
+
+        growth_params, crown_volume = split_tree_params(self.params)
+        self.tree = new_tree(crown_volume=crown_volume, **growth_params)
+        if not self.tree.leaves:
+            self.cancel()
+            return None
+        self.steps = self.tree.grow()
+        self.stage = 'REFINE'
+
+        return LIVE_REFINE_DELAY
+
+    def refine(self, context):
+        """
+        Grow the full tree for a while, and draw it when it's complete.
+        :param context: bpy.context
+        :return:
+        float interval: Seconds until the next slice (None = the preview is finished)
+        """
+        end_time = time.perf_counter() + LIVE_REFINE_SLICE
+        for _ in self.steps:
+            if time.perf_counter() > end_time:
+                return 0.0
+
+        cache = get_skeleton_cache(context.scene.gp_tree)
+        if cache is not None:
+            cache.put(skeleton_key(**self.params), Skeleton.from_tree(self.tree))
+        self.draw(context, self.tree, complete=True)
+        self.cancel()
+
+        return None
+
+    def draw(self, context, tree, complete=False):
+        """
+        Draw a tree into the selected tree collection (reusing its strokes).
+        :param context: bpy.context
+        :param tree: Space Colonization tree object (or tree skeleton)
+        :param bool complete: True if it's the full tree (its parameters are stored in the collection)
+        """
+        ui_values = context.scene.gp_tree
+        collection = ui_values.collection_selector
+        gp_tree, gp_leaves = get_collection_gp_objects(collection)
+        frame = context.scene.frame_current
+
+        draw_tree(tree=tree, frame=frame, overwrite=True, edit_gp_object=gp_tree, draw_mode=ui_values.draw_mode)
+        draw_leaves(tree=tree, frame=frame, overwrite=True, edit_gp_object=gp_leaves, pack_leaves=ui_values.pack_leaves)
+        if complete:
+            store_tree_params(collection=collection, params=self.params)
+            if "gp_tree_lods" in collection:
+                draw_tree_lods(tree=tree, frame=frame, gp_tree=gp_tree, gp_leaves=gp_leaves,
+                               pack_leaves=ui_values.pack_leaves)
+
+
+live_preview = LivePreview()
+
+
+# BACKGROUND GENERATION
+# Seconds between the checks of the trees grown in the background
+BACKGROUND_POLL_INTERVAL = 0.1
+
+
+class BackgroundTrees:
+    """
+    Trees grown in a background thread (see SC_Algorithm.background.SkeletonWorker) while
+    Blender keeps responding. A timer (bpy.app.timers) polls the finished skeletons and draws
+    them here, on the main thread, where all the Grease Pencil writes must happen.
+    """
+
+    def __init__(self):
+        self.worker = SkeletonWorker()
+        # Message of the last tree that couldn't be generated (shown in the panel until the next tree is queued)
+        self.error = None
+        # Same function object for every register/unregister call
+        self.timer = self.tick
+
+    @property
+    def n_pending(self):
+        """
+        :return:
+        int n_pending: Number of trees queued or growing
+        """
+        return len(self.worker.pending)
+
+    @property
+    def progress(self):
+        """
+        :return:
+        float progress: Progress of the tree growing now (0 to 1)
+        """
+        return self.worker.pending[0].progress if self.worker.pending else 0.0
+
+    def submit(self, context, params):
+        """
+        Queue a new tree with the given parameters, drawn with the current draw settings.
+        :param context: bpy.context
+        :param dict params: Tree parameters (see get_tree_params)
+        """
+        ui_values = context.scene.gp_tree
+        growth_params, crown_volume = split_tree_params(params)
+        job = SkeletonJob(params=growth_params, crown_volume=crown_volume, stats=new_stats(ui_values),
+                          data={"params": params, "cache": get_skeleton_cache(ui_values),
+                                "frame": context.scene.frame_current, "draw_mode": ui_values.draw_mode,
+                                "pack_leaves": ui_values.pack_leaves})
+
+        # Nothing to grow if the tree is cached
+        cache = job.data["cache"]
+        if cache is not None:
+            job.skeleton = cache.get(skeleton_key(**params))
+
+        self.error = None
+        self.worker.submit(job)
+        if not bpy.app.timers.is_registered(self.timer):
+            bpy.app.timers.register(self.timer, first_interval=BACKGROUND_POLL_INTERVAL)
+
+    def cancel(self):
+        """
+        Cancel every queued tree (the one growing now stops after its current step).
+        """
+        self.worker.cancel_all()
+
+    def stop(self):
+        """
+        Cancel every queued tree, stop the timer and end the worker thread.
+        """
+        if bpy.app.timers.is_registered(self.timer):
+            bpy.app.timers.unregister(self.timer)
+        self.worker.stop()
+        self.worker = SkeletonWorker()
+
+    def tick(self):
+        """
+        Timer function: draw the finished trees and redraw the progress.
+        :return:
+        float interval: Seconds until the next call (None = no tree left)
+        """
+        context = bpy.context
+        for job in self.worker.poll():
+            try:
+                self.draw(context, job)
+            except Exception as e:
+                self.error = '{}'.format(e)
+
+        redraw_view3d_areas(context)
+
+        return BACKGROUND_POLL_INTERVAL if self.n_pending else None
+
+    def draw(self, context, job):
+        """
+        Draw the tree of a finished job into a new tree collection.
+        :param context: bpy.context
+        :param SkeletonJob job: Finished (or cancelled) job
+        """
+        if job.cancelled.is_set():
+            return
+        if job.error is not None:
+            raise job.error
+        if job.skeleton is None:
+            raise ValueError("Error when creating the tree.")
+
+        data = job.data
+        if data["cache"] is not None:
+            data["cache"].put(skeleton_key(**data["params"]), job.skeleton)
+
+        tree_collection, gp_tree, gp_leaves = create_tree_collection(tree=job.skeleton, frame=data["frame"],
+                                                                     draw_mode=data["draw_mode"], stats=job.stats,
+                                                                     pack_leaves=data["pack_leaves"])
+        store_tree_params(collection=tree_collection, params=data["params"])
+        publish_stats(stats=job.stats, gp_tree=gp_tree, gp_leaves=gp_leaves, frame=data["frame"])
+
+        context.scene.gp_tree.collection_selector = tree_collection
+
+
+background_trees = BackgroundTrees()
+
+
+# PROPS
+
+class GPT_property_group(bpy.types.PropertyGroup):
+
+    # Update methods
+    def update_live_preview(self, context):
+        """
+        Update method for the tree properties: schedules a live preview of the selected tree
+        (if enabled, see LivePreview)
+        :param context: bpy.context
+        """
+        live_preview.schedule(context)
+
+    def update_trunk_length(self, context):
+        """
+        Update method for the parameter trunk_length.
+        Ensures that trunk length value is never less than tree_crown_radius
+        :param context: bpy.context
+        """
+        trunk_length = context.scene.gp_tree.trunk_length
+        tree_crown_radius = context.scene.gp_tree.tree_crown_radius
+
+        if trunk_length < tree_crown_radius:
+            context.scene.gp_tree.trunk_length = tree_crown_radius
+        live_preview.schedule(context)
+
+    def update_tree_crown_radius(self, context):
+        """
+        Update method for the parameter tree_crown_radius.
+        Ensures that trunk length value is never less than tree_crown_radius
+        :param context: bpy.context
+        """
+        trunk_length = context.scene.gp_tree.trunk_length
+        tree_crown_radius = context.scene.gp_tree.tree_crown_radius
+
+        if trunk_length < tree_crown_radius:
+            context.scene.gp_tree.tree_crown_radius = trunk_length
+        live_preview.schedule(context)
+
+    def update_collection_selector(self, context):
+        """
+        Update method for the parameter collection_selector.
+        Loads the seed of the selected tree, so editing it keeps the same random growth
+        :param context: bpy.context
+        """
+        collection = context.scene.gp_tree.collection_selector
+        if collection is not None and "gp_tree_params" in collection:
+            context.scene.gp_tree.seed = collection["gp_tree_params"]["seed"]
+
+        # Selecting a tree (or creating a new one, with a new seed) doesn't change it
+        live_preview.cancel()
+
+    # Select the editable GP tree
     collection_selector: bpy.props.PointerProperty(
         name="",
         description="GP Tree collection",
-        type=bpy.types.Collection
+        type=bpy.types.Collection,
+        update=update_collection_selector
     )
 
     # Tree appearance properties
@@ -338,9 +1505,26 @@ class GPT_property_group(bpy.types.PropertyGroup):
         items=[
             ("ROUNDED", "Rounded", "Rounded tree crown"),
             ("ELLIPSE", "Ellipse", "Elliptical tree crown"),
-            ("DOUBLE", "Double", "Two elliptical tree crowns")
+            ("DOUBLE", "Double", "Two elliptical tree crowns"),
+            ("MESH", "Mesh", "Tree crown with the shape of a closed mesh object")
         ],
-        default="ROUNDED"
+        default="ROUNDED",
+        update=update_live_preview
+    )
+
+    crown_mesh: bpy.props.PointerProperty(
+        name="Crown mesh",
+        description="Closed mesh object used as tree crown (its origin is the base of the trunk)",
+        type=bpy.types.Object,
+        poll=lambda self, mesh_object: mesh_object.type == 'MESH',
+        update=update_live_preview
+    )
+
+    vectorized_crown: bpy.props.BoolProperty(
+        name="Fast crown sampling",
+        description="Sample all the leaves at once (a tree with the same seed gets different leaves)",
+        default=False,
+        update=update_live_preview
     )
 
     n_leaves: bpy.props.IntProperty(
@@ -348,7 +1532,26 @@ class GPT_property_group(bpy.types.PropertyGroup):
         description="Number of leaves",
         min=5,
         max=300,
-        default=150
+        default=150,
+        update=update_live_preview
+    )
+
+    large_n_leaves: bpy.props.IntProperty(
+        name="Number of leaves",
+        description="Number of leaves (attraction points) of large-scale trees",
+        min=5,
+        max=1000000,
+        default=100000,
+        update=update_live_preview
+    )
+
+    drawn_leaves: bpy.props.IntProperty(
+        name="Drawn leaves",
+        description="Number of leaves of large-scale trees drawn as strokes (0 = all of them)",
+        min=0,
+        max=1000000,
+        default=5000,
+        update=update_live_preview
     )
 
     tree_crown_radius: bpy.props.FloatProperty(
@@ -376,7 +1579,245 @@ class GPT_property_group(bpy.types.PropertyGroup):
         description="Trunk thickness value (maximum)",
         min=15,
         max=100,
-        default=50
+        default=50,
+        update=update_live_preview
+    )
+
+    # Algorithm properties
+    engine: bpy.props.EnumProperty(
+        name="Engine",
+        description="Implementation of the Space Colonization algorithm used to grow the tree",
+        items=[
+            ("OBJECT", "Objects", "One Python object per branch and leaf (reference implementation)"),
+            ("NUMPY", "NumPy arrays", "Branches stored in NumPy arrays, grown with batched operations (faster)"),
+            ("LARGE", "Large-scale", "Dense crowns of up to a million leaves: leaves kept in compact arrays and "
+                                     "processed in chunks, only a subsample of them is drawn")
+        ],
+        default="OBJECT",
+        update=update_live_preview
+    )
+
+    # Levels of detail
+    lod_switch: bpy.props.BoolProperty(
+        name="Switch LODs by camera distance",
+        description="Show the level of detail of every tree with LODs that matches its distance to the scene camera",
+        default=False,
+        update=lambda self, context: update_tree_lods(context.scene)
+    )
+
+    lod1_distance: bpy.props.FloatProperty(
+        name="LOD1 distance",
+        description="Trees farther than this from the camera show their LOD1",
+        min=0,
+        default=20,
+        update=lambda self, context: update_tree_lods(context.scene)
+    )
+
+    lod2_distance: bpy.props.FloatProperty(
+        name="LOD2 distance",
+        description="Trees farther than this from the camera show their LOD2",
+        min=0,
+        default=50,
+        update=lambda self, context: update_tree_lods(context.scene)
+    )
+
+    # Growth limits
+    max_iterations: bpy.props.IntProperty(
+        name="Max iterations",
+        description="Max number of growth iterations (the growth also stops when no more leaves are reached)",
+        min=1,
+        max=1000,
+        default=150,
+        update=update_live_preview
+    )
+
+    max_branches: bpy.props.IntProperty(
+        name="Max branches",
+        description="Max number of branches of the tree (0 = no limit)",
+        min=0,
+        default=0,
+        update=update_live_preview
+    )
+
+    max_points: bpy.props.IntProperty(
+        name="Max points",
+        description="Max number of stroke points of the tree, counted as one stroke per branch and per leaf "
+                    "(0 = no limit)",
+        min=0,
+        default=0,
+        update=update_live_preview
+    )
+
+    # Reproducibility properties
+    seed: bpy.props.IntProperty(
+        name="Seed",
+        description="Random seed of the tree (same seed and properties, same tree)",
+        min=0,
+        default=0,
+        update=update_live_preview
+    )
+
+    live_preview: bpy.props.BoolProperty(
+        name="Live preview",
+        description="Redraw the selected tree while its properties change: a quick low resolution "
+                    "preview first, and the full tree once the properties settle",
+        default=False,
+        update=update_live_preview
+    )
+
+    randomize_seed: bpy.props.BoolProperty(
+        name="New seed per tree",
+        description="Use a new random seed every time a new tree is created",
+        default=True
+    )
+
+    use_cache: bpy.props.BoolProperty(
+        name="Cache trees",
+        description="Keep the grown trees on disk, so the same tree (same seed and properties) is never grown twice",
+        default=True
+    )
+
+    cache_size: bpy.props.IntProperty(
+        name="Cache size (MB)",
+        description="Max disk space used by the tree cache (least recently used trees are removed first)",
+        min=1,
+        max=10000,
+        default=256
+    )
+
+    # Stats properties
+    show_stats: bpy.props.BoolProperty(
+        name="Stats",
+        description="Record and show the timings and size of the last tree generation",
+        default=False
+    )
+
+    log_stats: bpy.props.BoolProperty(
+        name="Log stats",
+        description="Report the stats of every tree generation in the Info log",
+        default=False
+    )
+
+    # Forest properties
+    forest_count: bpy.props.IntProperty(
+        name="Number of trees",
+        description="Number of trees of the forest",
+        min=1,
+        max=500,
+        default=10
+    )
+
+    forest_competition: bpy.props.BoolProperty(
+        name="Competing trees",
+        description="Grow all the trees at once, competing for the same leaves, so close trees don't grow "
+                    "through each other (NumPy engine, every tree is unique)",
+        default=False
+    )
+
+    forest_archetypes: bpy.props.IntProperty(
+        name="Archetypes",
+        description="Number of different trees of the forest, the rest are instances of them (linked duplicates "
+                    "sharing their Grease Pencil data). 0 = every tree is unique",
+        min=0,
+        max=100,
+        default=0
+    )
+
+    forest_scale_min: bpy.props.FloatProperty(
+        name="Min scale",
+        description="Minimum scale of the tree instances",
+        min=0.1,
+        max=10,
+        default=0.8,
+        precision=2
+    )
+
+    forest_scale_max: bpy.props.FloatProperty(
+        name="Max scale",
+        description="Maximum scale of the tree instances",
+        min=0.1,
+        max=10,
+        default=1.2,
+        precision=2
+    )
+
+    forest_area: bpy.props.FloatProperty(
+        name="Forest size",
+        description="Side of the square area (around the 3D cursor) where the trees are scattered",
+        min=1,
+        max=200,
+        default=10,
+        precision=1
+    )
+
+    forest_n_leaves_min: bpy.props.IntProperty(
+        name="Min leaves",
+        description="Minimum number of leaves of each tree",
+        min=5,
+        max=300,
+        default=100
+    )
+
+    forest_n_leaves_max: bpy.props.IntProperty(
+        name="Max leaves",
+        description="Maximum number of leaves of each tree",
+        min=5,
+        max=300,
+        default=200
+    )
+
+    forest_crown_radius_min: bpy.props.FloatProperty(
+        name="Min crown size",
+        description="Minimum size of the tree crowns",
+        min=0.1,
+        max=2,
+        default=0.5,
+        precision=2
+    )
+
+    forest_crown_radius_max: bpy.props.FloatProperty(
+        name="Max crown size",
+        description="Maximum size of the tree crowns",
+        min=0.1,
+        max=2,
+        default=0.8,
+        precision=2
+    )
+
+    forest_trunk_length_min: bpy.props.FloatProperty(
+        name="Min trunk length",
+        description="Minimum length of the trunks",
+        min=0.1,
+        max=2,
+        default=1.2,
+        precision=2
+    )
+
+    forest_trunk_length_max: bpy.props.FloatProperty(
+        name="Max trunk length",
+        description="Maximum length of the trunks",
+        min=0.1,
+        max=2,
+        default=1.8,
+        precision=2
+    )
+
+    draw_mode: bpy.props.EnumProperty(
+        name="Draw mode",
+        description="How the tree branches are written into Grease Pencil strokes",
+        items=[
+            ("BULK", "Bulk", "Fill all the stroke points from flat buffers (faster)"),
+            ("CHAINS", "Chains", "One multi-point stroke per chain of branches without forks (fewer strokes)"),
+            ("PER_BRANCH", "Per branch", "Set the stroke points one by one (original method)")
+        ],
+        default="BULK"
+    )
+
+    pack_leaves: bpy.props.BoolProperty(
+        name="Pack leaves",
+        description="Draw many leaves per stroke: much faster with dense crowns, but the leaves are harder to "
+                    "edit one by one",
+        default=False
     )
 
 
@@ -384,10 +1825,31 @@ class GPT_property_group(bpy.types.PropertyGroup):
 
 # OPERATORS
 
+def report_trunk_strokes(operator=None, tree=None, gp_object=None, frame=0, cached=False):
+    """
+    Report the number of strokes and points used to draw the tree trunk, compared
+    with the one-stroke-per-branch drawing.
+    :param operator: Operator used to report
+    :param tree: Space Colonization tree object
+    :param gp_object: Reference to the trunk gp object inside Blender
+    :param frame: Frame number
+    :param bool cached: True if the tree has been taken from the cache
+    """
+    n_strokes, n_points = count_strokes(gp_object=gp_object, layer_name="Trunk", frame_number=frame)
+    stop_reason = STOP_REASONS.get(tree.stop_reason)
+    operator.report({'INFO'}, "{}Trunk: {} strokes, {} points (one stroke per branch: {} strokes, {} points){}".format(
+        "(Cached tree) " if cached else "", n_strokes, n_points, len(tree.branches), 2 * len(tree.branches),
+        ". Growth stopped by: {}".format(stop_reason) if stop_reason else ""))
+
+
 class GPT_OT_generate_tree(bpy.types.Operator):
     bl_idname = "gp_tree.generate_tree"
     bl_label = "Generate procedural tree"
-    bl_description = "Generate procedural tree"
+    bl_description = "Generate procedural tree (from the UI it grows step by step, press Esc to stop it)"
+
+    # Modal growth: seconds between steps and seconds of growth per step
+    timer_interval = 0.05
+    time_budget = 0.03
 
     @classmethod
     def poll(cls, context):
@@ -397,38 +1859,271 @@ class GPT_OT_generate_tree(bpy.types.Operator):
 
     def execute(self, context):
         try:
-            ui_values = context.scene.gp_tree
+            params = get_new_tree_params(context.scene.gp_tree)
+        except ValueError as e:
+            self.report({'ERROR'}, '{}'.format(e))
+            return {"CANCELLED"}
 
-            branch_length = ui_values.trunk_length * 0.03
-            influence_radius = ui_values.trunk_length * 0.47
+        return self.generate_tree(context, params)
+
+    def generate_tree(self, context, params):
+        """
+        Grow (or take from the cache) and draw the whole tree at once.
+        :param context: bpy.context
+        :param dict params: Tree growth parameters (see get_new_tree_params)
+        """
+        try:
+            ui_values = context.scene.gp_tree
 
             # Execute the tree algorithm with the selected parameters
-            my_tree = Tree(n_leaves=ui_values.n_leaves, branch_length=branch_length, influence_radius=influence_radius,
-                           kill_distance=branch_length, tree_crown_radius=ui_values.tree_crown_radius,
-                           tree_crown_height=ui_values.trunk_length, tree_type=ui_values.tree_type, max_iterations=150,
-                           max_thickness=ui_values.max_thickness)
-            if not my_tree.generate_tree():
+            stats = new_stats(ui_values)
+            my_tree, cached = get_tree_skeleton(params=params, cache=get_skeleton_cache(ui_values), stats=stats)
+            if my_tree is None:
                 self.report({'ERROR'}, '{}'.format("Error when creating the tree."))
                 return {"CANCELLED"}
 
-            gp_tree = draw_tree(tree=my_tree, frame=context.scene.frame_current, overwrite=False, edit_gp_object=None)
-            gp_leaves = draw_leaves(tree=my_tree, frame=context.scene.frame_current, overwrite=False, edit_gp_object=None)
+            tree_collection, gp_tree, gp_leaves = create_tree_collection(tree=my_tree, frame=context.scene.frame_current,
+                                                                         draw_mode=ui_values.draw_mode, stats=stats,
+                                                                         pack_leaves=ui_values.pack_leaves)
+            store_tree_params(collection=tree_collection, params=params)
+            report_trunk_strokes(operator=self, tree=my_tree, gp_object=gp_tree, frame=context.scene.frame_current,
+                                 cached=cached)
+            publish_stats(operator=self, stats=stats, gp_tree=gp_tree, gp_leaves=gp_leaves,
+                          frame=context.scene.frame_current, log=ui_values.log_stats)
+
+            # The stored parameters set the seed property too
+            ui_values.collection_selector = tree_collection
+
+        except Exception as e:
+            self.report({'ERROR'}, '{}'.format(e))
+            return {"CANCELLED"}
+
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        """
+        Start growing the tree step by step: a timer advances the growth, drawing the new
+        branches of each step, while Blender keeps responding.
+        """
+        ui_values = context.scene.gp_tree
+        try:
+            self.params = get_new_tree_params(ui_values)
+        except ValueError as e:
+            self.report({'ERROR'}, '{}'.format(e))
+            return {"CANCELLED"}
+        self.cache = get_skeleton_cache(ui_values)
+
+        # Nothing to grow if the tree is cached
+        if self.cache is not None and self.cache.get(skeleton_key(**self.params)) is not None:
+            return self.generate_tree(context, self.params)
+
+        self.stats = new_stats(ui_values)
+        self.log_stats = ui_values.log_stats
+        growth_params, crown_volume = split_tree_params(self.params)
+        self.tree = new_tree(stats=self.stats, crown_volume=crown_volume, **growth_params)
+        if not self.tree.leaves:
+            self.report({'ERROR'}, '{}'.format("Error when creating the tree."))
+            return {"CANCELLED"}
+
+        self.steps = self.tree.grow()
+        self.n_steps = 0
+        self.frame = context.scene.frame_current
+        self.draw_mode = ui_values.draw_mode
+
+        self.gp_tree, _ = get_trunk_frame(frame=self.frame, overwrite=False, edit_gp_object=None)
+        with self.stats.phase("draw_leaves"):
+            self.gp_leaves = draw_leaves(tree=self.tree, frame=self.frame, overwrite=False, edit_gp_object=None,
+                                         pack_leaves=ui_values.pack_leaves)
+        self.tree_collection = link_tree_collection(gp_tree=self.gp_tree, gp_leaves=self.gp_leaves)
+        ui_values.collection_selector = self.tree_collection
+        # The parameters are only stored once the tree is complete: the seed of the growing tree is set here,
+        # without previewing it
+        ui_values.seed = self.params["seed"]
+        live_preview.cancel()
+        # The references can become invalid while the tree grows (undo, delete), the names can be looked up
+        self.tree_names = (self.gp_tree.name, self.gp_leaves.name, self.tree_collection.name)
+
+        window_manager = context.window_manager
+        window_manager.progress_begin(0, self.tree.max_iterations + 1)
+        self.timer = window_manager.event_timer_add(self.timer_interval, window=context.window)
+        window_manager.modal_handler_add(self)
+
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            return self.finish_growth(context, cancelled=True)
+
+        if event.type != 'TIMER':
+            return {"PASS_THROUGH"}
+
+        try:
+            if not self.find_tree_objects():
+                self.report({'WARNING'}, "Tree growth stopped: the tree has been removed")
+                return self.finish_growth(context, cancelled=True)
+
+            gp_layer = get_gp_layer(gp_object=self.gp_tree, layer_name="Trunk")
+            gp_frame = get_frame_gp_layer(gp_layer=gp_layer, frame_number=self.frame)
+
+            # Grow (and draw) as many steps as the time budget allows
+            start = time.perf_counter()
+            while time.perf_counter() - start < self.time_budget:
+                new_branches = next(self.steps, None)
+                if new_branches is None:
+                    return self.finish_growth(context, cancelled=False)
+
+                with self.stats.phase("draw_tree"):
+                    point_counts, coords, pressures = build_branch_buffers(new_branches)
+                    draw_strokes(gp_frame=gp_frame, point_counts=point_counts, coords=coords, pressures=pressures)
+                self.n_steps = self.n_steps + 1
+
+        except Exception as e:
+            self.report({'ERROR'}, '{}'.format(e))
+            self.finish_growth(context, cancelled=True)
+            return {"CANCELLED"}
+
+        context.window_manager.progress_update(self.n_steps)
+        context.workspace.status_text_set("Growing tree: step {}/{}, {} branches (Esc to stop)".format(
+            self.n_steps, self.tree.max_iterations + 1, len(self.tree.branches)))
+        context.area.tag_redraw()
+
+        return {"RUNNING_MODAL"}
+
+    def find_tree_objects(self):
+        """
+        Look up the gp objects and the collection of the growing tree again, by name (an undo or a
+        delete while the tree grows invalidates the references taken when it started).
+        :return:
+        bool found: False if any of them has been removed
+        """
+        gp_tree_name, gp_leaves_name, collection_name = self.tree_names
+        self.gp_tree = bpy.data.objects.get(gp_tree_name)
+        self.gp_leaves = bpy.data.objects.get(gp_leaves_name)
+        self.tree_collection = bpy.data.collections.get(collection_name)
+
+        return self.gp_tree is not None and self.gp_leaves is not None and self.tree_collection is not None
+
+    def finish_growth(self, context, cancelled=False):
+        """
+        Stop the step by step growth. A stopped tree keeps the branches grown so far. The timer,
+        the progress and the status text are always cleared, even if the tree can't be finished.
+        :param context: bpy.context
+        :param bool cancelled: True if the growth has been stopped before the tree is complete
+        """
+        try:
+            self.steps.close()
+            if not self.find_tree_objects():
+                return {"CANCELLED"}
+
+            # Growing steps are drawn one stroke per branch
+            if self.draw_mode != 'BULK':
+                with self.stats.phase("draw_tree"):
+                    draw_tree(tree=self.tree, frame=self.frame, overwrite=True, edit_gp_object=self.gp_tree,
+                              draw_mode=self.draw_mode)
+
+            if cancelled:
+                self.report({'WARNING'}, "Tree growth stopped after {} steps ({} branches)".format(
+                    self.n_steps, len(self.tree.branches)))
+            else:
+                # Only complete trees can be grown again from their parameters
+                store_tree_params(collection=self.tree_collection, params=self.params)
+                if self.cache is not None:
+                    self.cache.put(skeleton_key(**self.params), Skeleton.from_tree(self.tree))
+                report_trunk_strokes(operator=self, tree=self.tree, gp_object=self.gp_tree, frame=self.frame)
+
+            publish_stats(operator=self, stats=self.stats, gp_tree=self.gp_tree, gp_leaves=self.gp_leaves,
+                          frame=self.frame, log=self.log_stats)
+
+        except Exception as e:
+            self.report({'ERROR'}, '{}'.format(e))
+            return {"CANCELLED"}
+
+        finally:
+            window_manager = context.window_manager
+            window_manager.event_timer_remove(self.timer)
+            window_manager.progress_end()
+            context.workspace.status_text_set(None)
 
-            # Create a new Blender collection and add the GP objects to it
-            tree_collection = bpy.data.collections.new("GP_Tree")
-            bpy.context.scene.collection.children.link(tree_collection)
+        return {"FINISHED"}
 
-            for collection in gp_tree.users_collection:
-                collection.objects.unlink(gp_tree)
 
-            for collection in gp_leaves.users_collection:
-                collection.objects.unlink(gp_leaves)
+class GPT_OT_generate_tree_background(bpy.types.Operator):
+    bl_idname = "gp_tree.generate_tree_background"
+    bl_label = "Generate procedural tree in background"
+    bl_description = "Grow a procedural tree in a background thread and draw it when it's complete (trees can be queued)"
 
-            tree_collection.objects.link(gp_tree)
-            tree_collection.objects.link(gp_leaves)
+    @classmethod
+    def poll(cls, context):
+        if context.mode != 'OBJECT':
+            return False
+        return True
+
+    def execute(self, context):
+        ui_values = context.scene.gp_tree
+        try:
+            params = get_new_tree_params(ui_values)
+            background_trees.submit(context, params)
+        except Exception as e:
+            self.report({'ERROR'}, '{}'.format(e))
+            return {"CANCELLED"}
 
+        self.report({'INFO'}, "Trees in background: {}".format(background_trees.n_pending))
+
+        return {"FINISHED"}
+
+
+class GPT_OT_cancel_background_trees(bpy.types.Operator):
+    bl_idname = "gp_tree.cancel_background_trees"
+    bl_label = "Cancel background trees"
+    bl_description = "Cancel the trees queued or growing in the background"
+
+    @classmethod
+    def poll(cls, context):
+        return background_trees.n_pending > 0
+
+    def execute(self, context):
+        background_trees.cancel()
+
+        return {"FINISHED"}
+
+
+class GPT_OT_bake_growth(bpy.types.Operator):
+    bl_idname = "gp_tree.bake_growth"
+    bl_label = "Bake tree growth"
+    bl_description = "Generate a tree that grows over time: one growth iteration per frame, from the current frame"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        if context.mode != 'OBJECT':
+            return False
+        return True
+
+    def execute(self, context):
+        try:
+            ui_values = context.scene.gp_tree
+            params = get_new_tree_params(ui_values)
+            stats = new_stats(ui_values)
+            growth_params, crown_volume = split_tree_params(params)
+            my_tree = new_tree(stats=stats, crown_volume=crown_volume, **growth_params)
+            if not my_tree.leaves:
+                self.report({'ERROR'}, '{}'.format("Error when creating the tree."))
+                return {"CANCELLED"}
+
+            start_frame = context.scene.frame_current
+            gp_tree, last_frame = bake_tree_growth(tree=my_tree, start_frame=start_frame, stats=stats)
+            with stats.phase("draw_leaves"):
+                gp_leaves = draw_leaves(tree=my_tree, frame=start_frame, overwrite=False, edit_gp_object=None,
+                                        pack_leaves=ui_values.pack_leaves)
+
+            tree_collection = link_tree_collection(gp_tree=gp_tree, gp_leaves=gp_leaves)
+            store_tree_params(collection=tree_collection, params=params)
             ui_values.collection_selector = tree_collection
 
+            self.report({'INFO'}, "Tree growth baked from frame {} to {} ({} branches)".format(
+                start_frame, last_frame, len(my_tree.branches)))
+            publish_stats(operator=self, stats=stats, gp_tree=gp_tree, gp_leaves=gp_leaves, frame=last_frame,
+                          log=ui_values.log_stats)
 
         except Exception as e:
             self.report({'ERROR'}, '{}'.format(e))
@@ -472,26 +2167,73 @@ class GPT_OT_overwrite_tree(bpy.types.Operator):
         try:
             ui_values = context.scene.gp_tree
 
-            branch_length = ui_values.trunk_length * 0.03
-            influence_radius = ui_values.trunk_length * 0.47
-
             # Execute the tree algorithm with the selected parameters
-            my_tree = Tree(n_leaves=ui_values.n_leaves, branch_length=branch_length, influence_radius=influence_radius,
-                           kill_distance=branch_length, tree_crown_radius=ui_values.tree_crown_radius,
-                           tree_crown_height=ui_values.trunk_length, tree_type=ui_values.tree_type, max_iterations=150,
-                           max_thickness=ui_values.max_thickness)
-            if not my_tree.generate_tree():
+            params = get_tree_params(ui_values)
+            stats = new_stats(ui_values)
+            my_tree, cached = get_tree_skeleton(params=params, cache=get_skeleton_cache(ui_values), stats=stats)
+            if my_tree is None:
                 self.report({'ERROR'}, '{}'.format("Error when creating the tree."))
                 return {"CANCELLED"}
 
             # Get gp object from current collection
             collection = ui_values.collection_selector
-            gp_obj_trunk = [gp for gp in collection.all_objects if "Tree_trunk" in gp.name_full][0]
-            gp_obj_leaves = [gp for gp in collection.all_objects if "Tree_leaves" in gp.name_full][0]
+            store_tree_params(collection=collection, params=params)
+            gp_obj_trunk, gp_obj_leaves = get_collection_gp_objects(collection)
+
+            with stats.phase("draw_tree"):
+                gp_tree = draw_tree(tree=my_tree, frame=context.scene.frame_current, overwrite=True, edit_gp_object=gp_obj_trunk,
+                                    draw_mode=ui_values.draw_mode)
+            with stats.phase("draw_leaves"):
+                gp_leaves = draw_leaves(tree=my_tree, frame=context.scene.frame_current, overwrite=True, edit_gp_object=gp_obj_leaves,
+                                        pack_leaves=ui_values.pack_leaves)
+            if "gp_tree_lods" in collection:
+                draw_tree_lods(tree=my_tree, frame=context.scene.frame_current, gp_tree=gp_tree, gp_leaves=gp_leaves,
+                               pack_leaves=ui_values.pack_leaves)
+            report_trunk_strokes(operator=self, tree=my_tree, gp_object=gp_tree, frame=context.scene.frame_current,
+                                 cached=cached)
+            publish_stats(operator=self, stats=stats, gp_tree=gp_tree, gp_leaves=gp_leaves,
+                          frame=context.scene.frame_current, log=ui_values.log_stats)
+
+
+        except Exception as e:
+            self.report({'ERROR'}, '{}'.format(e))
+            return {"CANCELLED"}
+
+        return {"FINISHED"}
+
+
+class GPT_OT_generate_lods(bpy.types.Operator):
+    bl_idname = "gp_tree.generate_lods"
+    bl_label = "Generate tree LODs"
+    bl_description = "Draw simplified levels of detail (LOD1, LOD2) of the selected tree into their own layers"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        if not GPT_OT_overwrite_tree.poll(context):
+            return False
+        collection = context.scene.gp_tree.collection_selector
+        return "gp_tree_params" in collection or "gp_tree_file" in collection
+
+    def execute(self, context):
+        try:
+            ui_values = context.scene.gp_tree
+            collection = ui_values.collection_selector
+            my_tree = get_collection_skeleton(collection=collection, cache=get_skeleton_cache(ui_values))
+            if my_tree is None:
+                self.report({'ERROR'}, '{}'.format("Error when creating the tree."))
+                return {"CANCELLED"}
+
+            gp_obj_trunk, gp_obj_leaves = get_collection_gp_objects(collection)
 
-            gp_tree = draw_tree(tree=my_tree, frame=context.scene.frame_current, overwrite=True, edit_gp_object=gp_obj_trunk)
-            gp_leaves = draw_leaves(tree=my_tree, frame=context.scene.frame_current, overwrite=True, edit_gp_object=gp_obj_leaves)
+            n_points = draw_tree_lods(tree=my_tree, frame=context.scene.frame_current, gp_tree=gp_obj_trunk,
+                                      gp_leaves=gp_obj_leaves, pack_leaves=ui_values.pack_leaves)
+            collection["gp_tree_lods"] = True
+            update_tree_lods(context.scene)
 
+            self.report({'INFO'}, "Points per level: " + ", ".join(
+                "LOD{} {} ({:.0%})".format(level, points, points / n_points[0] if n_points[0] else 0)
+                for level, points in enumerate(n_points)))
 
         except Exception as e:
             self.report({'ERROR'}, '{}'.format(e))
@@ -500,12 +2242,223 @@ class GPT_OT_overwrite_tree(bpy.types.Operator):
         return {"FINISHED"}
 
 
+class GPT_OT_generate_forest(bpy.types.Operator):
+    bl_idname = "gp_tree.generate_forest"
+    bl_label = "Generate forest"
+    bl_description = "Grow several trees in parallel (worker processes) and scatter them around the 3D cursor"
+
+    @classmethod
+    def poll(cls, context):
+        if context.mode != 'OBJECT':
+            return False
+        return True
+
+    def execute(self, context):
+        try:
+            ui_values = context.scene.gp_tree
+
+            # Instanced forest: only the archetypes are grown and drawn
+            n_archetypes = min(ui_values.forest_archetypes, ui_values.forest_count)
+            instances = None
+            if n_archetypes > 0 and not ui_values.forest_competition:
+                instances = scatter_instances(
+                    count=ui_values.forest_count, area_size=ui_values.forest_area, n_archetypes=n_archetypes,
+                    scale_range=sorted((ui_values.forest_scale_min, ui_values.forest_scale_max)))
+
+            # Trees are grown in parallel: only their skeletons come back
+            locations, params_list = scatter_trees(
+                count=n_archetypes if instances else ui_values.forest_count, area_size=ui_values.forest_area,
+                n_leaves_range=sorted((ui_values.forest_n_leaves_min, ui_values.forest_n_leaves_max)),
+                tree_crown_radius_range=sorted((ui_values.forest_crown_radius_min, ui_values.forest_crown_radius_max)),
+                trunk_length_range=sorted((ui_values.forest_trunk_length_min, ui_values.forest_trunk_length_max)))
+
+            # Worker processes have no mesh data: MESH crowns are grown as rounded crowns
+            tree_type = ui_values.tree_type if ui_values.tree_type != 'MESH' else 'ROUNDED'
+            if tree_type != ui_values.tree_type:
+                self.report({'WARNING'}, "Forests can't use mesh crowns, rounded crowns are used instead")
+
+            for params in params_list:
+                params.update(engine=ui_values.engine, tree_type=tree_type, max_thickness=ui_values.max_thickness,
+                              vectorized_crown=ui_values.vectorized_crown, max_iterations=ui_values.max_iterations,
+                              max_branches=ui_values.max_branches, max_points=ui_values.max_points)
+
+            if ui_values.forest_competition:
+                # One shared growth: the trees can't be grown again on their own from their parameters
+                skeletons, stop_reason = grow_competing_skeletons(params_list, locations)
+                params_list = [None] * len(skeletons)
+                parallel = False
+            else:
+                skeletons, parallel = grow_skeletons(params_list)
+
+            # Draw every tree (main thread)
+            forest_collection = bpy.data.collections.new("GP_Forest")
+            context.scene.collection.children.link(forest_collection)
+            origin = context.scene.cursor.location.copy()
+
+            if instances:
+                n_trees = self.draw_instances(context, forest_collection, instances, params_list, skeletons)
+                self.report({'INFO'}, "{} trees generated from {} archetypes ({})".format(
+                    n_trees, n_archetypes, "worker processes" if parallel else "no worker processes available"))
+                return {"FINISHED"}
+
+            n_trees = 0
+            for location, params, skeleton in zip(locations, params_list, skeletons):
+                if skeleton is None:
+                    continue
+                tree_collection, gp_tree, gp_leaves = create_tree_collection(tree=skeleton,
+                                                                             frame=context.scene.frame_current,
+                                                                             draw_mode=ui_values.draw_mode,
+                                                                             parent_collection=forest_collection,
+                                                                             pack_leaves=ui_values.pack_leaves)
+                if params is not None:
+                    store_tree_params(collection=tree_collection, params=params)
+                gp_tree.location = origin + Vector((location[0], location[1], 0))
+                gp_leaves.location = gp_tree.location
+                n_trees = n_trees + 1
+
+            if ui_values.forest_competition:
+                self.report({'INFO'}, "{} competing trees generated. Growth stopped by: {}".format(
+                    n_trees, STOP_REASONS[stop_reason] if stop_reason else "-"))
+            else:
+                self.report({'INFO'}, "{} trees generated ({})".format(
+                    n_trees, "worker processes" if parallel else "no worker processes available"))
+
+        except Exception as e:
+            self.report({'ERROR'}, '{}'.format(e))
+            return {"CANCELLED"}
+
+        return {"FINISHED"}
+
+    def draw_instances(self, context, forest_collection, instances, params_list, skeletons):
+        """
+        Draw every archetype tree once and place the instances as linked duplicates of its gp
+        objects (same Grease Pencil data), each one in its own tree collection. An instance that
+        is overwritten (edited, previewed, LODs) gets its own gp data first (see make_single_user).
+        :param context: bpy.context
+        :param forest_collection: Reference to the forest collection inside Blender
+        :param list instances: Position, archetype, rotation and scale of every instance (see scatter_instances)
+        :param list params_list: Tree growth parameters of every archetype
+        :param list skeletons: Skeleton of every archetype (None if it couldn't be grown)
+        :return:
+        int n_trees: Number of instances placed
+        """
+        ui_values = context.scene.gp_tree
+        origin = context.scene.cursor.location.copy()
+        archetype_objects = {}
+        n_trees = 0
+
+        for location, archetype, rotation, scale in instances:
+            skeleton = skeletons[archetype]
+            if skeleton is None:
+                continue
+
+            if archetype not in archetype_objects:
+                # First instance of the archetype: its tree is drawn
+                gp_tree = draw_tree(tree=skeleton, frame=context.scene.frame_current, overwrite=False,
+                                    edit_gp_object=None, draw_mode=ui_values.draw_mode)
+                gp_leaves = draw_leaves(tree=skeleton, frame=context.scene.frame_current, overwrite=False,
+                                        edit_gp_object=None, pack_leaves=ui_values.pack_leaves)
+                archetype_objects[archetype] = (gp_tree, gp_leaves)
+            else:
+                # Linked duplicates: new objects, same gp data
+                gp_tree, gp_leaves = (gp_object.copy() for gp_object in archetype_objects[archetype])
+
+            tree_collection = link_tree_collection(gp_tree=gp_tree, gp_leaves=gp_leaves,
+                                                   parent_collection=forest_collection)
+            store_tree_params(collection=tree_collection, params=params_list[archetype])
+
+            for gp_object in (gp_tree, gp_leaves):
+                gp_object.location = origin + Vector((location[0], location[1], 0))
+                gp_object.rotation_euler = (0, 0, rotation)
+                gp_object.scale = (scale, scale, scale)
+            n_trees = n_trees + 1
+
+        return n_trees
+
+
+class GPT_OT_purge_orphans(bpy.types.Operator):
+    bl_idname = "gp_tree.purge_orphans"
+    bl_label = "Purge unused tree materials"
+    bl_description = "Remove the tree materials and leaf textures that are not used by any object"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        n_materials, n_images = purge_orphan_data()
+        self.report({'INFO'}, "Removed {} materials and {} images".format(n_materials, n_images))
+
+        return {"FINISHED"}
+
+
+class GPT_OT_export_skeleton(bpy.types.Operator, ExportHelper):
+    bl_idname = "gp_tree.export_skeleton"
+    bl_label = "Export tree skeleton"
+    bl_description = "Save the selected tree as a binary skeleton file, so it can be imported without growing it again"
+
+    filename_ext = ".gptree"
+    filter_glob: bpy.props.StringProperty(default="*.gptree", options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        collection = context.scene.gp_tree.collection_selector
+        return collection is not None and ("gp_tree_params" in collection or "gp_tree_file" in collection)
+
+    def execute(self, context):
+        ui_values = context.scene.gp_tree
+        skeleton = get_collection_skeleton(collection=ui_values.collection_selector,
+                                           cache=get_skeleton_cache(ui_values))
+        if skeleton is None:
+            self.report({'ERROR'}, '{}'.format("Error when creating the tree."))
+            return {"CANCELLED"}
+
+        write_skeleton(skeleton, self.filepath)
+        self.report({'INFO'}, "Exported {} branches and {} leaves".format(skeleton.n_branches, skeleton.n_leaves))
+
+        return {"FINISHED"}
+
+
+class GPT_OT_import_skeleton(bpy.types.Operator, ImportHelper):
+    bl_idname = "gp_tree.import_skeleton"
+    bl_label = "Import tree skeleton"
+    bl_description = "Draw a tree from a binary skeleton file (the file is memory mapped, not parsed)"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filename_ext = ".gptree"
+    filter_glob: bpy.props.StringProperty(default="*.gptree", options={'HIDDEN'})
+
+    def execute(self, context):
+        ui_values = context.scene.gp_tree
+
+        try:
+            skeleton = read_skeleton(self.filepath)
+        except (OSError, ValueError) as error:
+            self.report({'ERROR'}, '{}'.format(error))
+            return {"CANCELLED"}
+
+        tree_collection, gp_tree, gp_leaves = create_tree_collection(tree=skeleton, frame=context.scene.frame_current,
+                                                                     draw_mode=ui_values.draw_mode,
+                                                                     pack_leaves=ui_values.pack_leaves)
+        tree_collection["gp_tree_file"] = self.filepath
+        report_trunk_strokes(operator=self, tree=skeleton, gp_object=gp_tree, frame=context.scene.frame_current)
+
+        ui_values.collection_selector = tree_collection
+
+        return {"FINISHED"}
+
+
 # REGISTER
 
 classes = [
     GPT_property_group,
     GPT_OT_generate_tree,
-    GPT_OT_overwrite_tree
+    GPT_OT_generate_tree_background,
+    GPT_OT_cancel_background_trees,
+    GPT_OT_bake_growth,
+    GPT_OT_overwrite_tree,
+    GPT_OT_generate_lods,
+    GPT_OT_generate_forest,
+    GPT_OT_purge_orphans,
+    GPT_OT_export_skeleton,
+    GPT_OT_import_skeleton
 ]
 
 
@@ -519,8 +2472,19 @@ def register():
         description="Information needed for generating a GP Tree"
     )
 
+    for handlers in (bpy.app.handlers.frame_change_post, bpy.app.handlers.depsgraph_update_post):
+        if update_tree_lods not in handlers:
+            handlers.append(update_tree_lods)
+
 
 def unregister():
+    live_preview.cancel()
+    background_trees.stop()
+
+    for handlers in (bpy.app.handlers.frame_change_post, bpy.app.handlers.depsgraph_update_post):
+        if update_tree_lods in handlers:
+            handlers.remove(update_tree_lods)
+
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
     bpy.types.Scene.gp_tree
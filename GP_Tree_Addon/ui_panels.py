@@ -1,4 +1,5 @@
 import bpy
+from . import ops
 
 
 class GPT_PT_mainPanel(bpy.types.Panel):
@@ -18,8 +19,17 @@ class GPT_PT_mainPanel(bpy.types.Panel):
         row = box.row(align=True)
         row.prop(context.scene.gp_tree, "tree_type")
 
-        row = box.row(align=True)
-        row.prop(context.scene.gp_tree, "n_leaves")
+        if context.scene.gp_tree.tree_type == 'MESH':
+            row = box.row(align=True)
+            row.prop(context.scene.gp_tree, "crown_mesh")
+
+        if context.scene.gp_tree.engine == 'LARGE':
+            row = box.row(align=True)
+            row.prop(context.scene.gp_tree, "large_n_leaves")
+            row.prop(context.scene.gp_tree, "drawn_leaves")
+        else:
+            row = box.row(align=True)
+            row.prop(context.scene.gp_tree, "n_leaves")
 
         row = box.row(align=True)
         row.prop(context.scene.gp_tree, "tree_crown_radius")
@@ -30,6 +40,29 @@ class GPT_PT_mainPanel(bpy.types.Panel):
         row = box.row(align=True)
         row.prop(context.scene.gp_tree, "max_thickness")
 
+        row = box.row(align=True)
+        row.prop(context.scene.gp_tree, "seed")
+        row.prop(context.scene.gp_tree, "randomize_seed")
+
+        row = box.row(align=True)
+        row.prop(context.scene.gp_tree, "engine")
+        row.prop(context.scene.gp_tree, "vectorized_crown")
+
+        row = box.row(align=True)
+        row.prop(context.scene.gp_tree, "max_iterations")
+
+        row = box.row(align=True)
+        row.prop(context.scene.gp_tree, "max_branches")
+        row.prop(context.scene.gp_tree, "max_points")
+
+        row = box.row(align=True)
+        row.prop(context.scene.gp_tree, "draw_mode")
+        row.prop(context.scene.gp_tree, "pack_leaves")
+
+        row = box.row(align=True)
+        row.prop(context.scene.gp_tree, "use_cache")
+        row.prop(context.scene.gp_tree, "cache_size")
+
         # BUTTONS
 
         box = layout.box()
@@ -41,10 +74,117 @@ class GPT_PT_mainPanel(bpy.types.Panel):
         row.operator('gp_tree.overwrite_tree', text='Edit current', icon='GREASEPENCIL')
         row.prop(context.scene.gp_tree, "collection_selector")
 
+        row = box.row(align=True)
+        row.prop(context.scene.gp_tree, "live_preview")
+
+        if ops.live_preview.error:
+            row = box.row(align=True)
+            row.label(text='Preview failed: {}'.format(ops.live_preview.error), icon='ERROR')
+
         row = box.row(align=True)
         row.scale_y = 1.4
         row.operator('gp_tree.generate_tree', text='New tree', icon='OUTLINER_DATA_GP_LAYER')
 
+        row = box.row(align=True)
+        row.operator('gp_tree.generate_tree_background', text='New tree in background', icon='SORTTIME')
+
+        n_pending = ops.background_trees.n_pending
+        if n_pending:
+            row = box.row(align=True)
+            row.label(text='Growing: {:.0%} ({} queued)'.format(ops.background_trees.progress, n_pending - 1))
+            row.operator('gp_tree.cancel_background_trees', text='', icon='CANCEL')
+
+        if ops.background_trees.error:
+            row = box.row(align=True)
+            row.label(text='Background tree failed: {}'.format(ops.background_trees.error), icon='ERROR')
+
+        row = box.row(align=True)
+        row.operator('gp_tree.bake_growth', text='New growing tree', icon='RENDER_ANIMATION')
+
+        row = box.row(align=True)
+        row.operator('gp_tree.purge_orphans', text='Purge unused materials', icon='TRASH')
+
+        row = box.row(align=True)
+        row.operator('gp_tree.export_skeleton', text='Export skeleton', icon='EXPORT')
+        row.operator('gp_tree.import_skeleton', text='Import skeleton', icon='IMPORT')
+
+        # LEVELS OF DETAIL
+
+        box = layout.box()
+        row = box.row(align=True)
+        row.label(text='Levels of detail')
+
+        row = box.row(align=True)
+        row.operator('gp_tree.generate_lods', text='Generate LODs', icon='MOD_DECIM')
+
+        row = box.row(align=True)
+        row.prop(context.scene.gp_tree, "lod_switch")
+
+        row = box.row(align=True)
+        row.enabled = context.scene.gp_tree.lod_switch
+        row.prop(context.scene.gp_tree, "lod1_distance")
+        row.prop(context.scene.gp_tree, "lod2_distance")
+
+        # STATS
+
+        box = layout.box()
+        row = box.row(align=True)
+        show_stats = context.scene.gp_tree.show_stats
+        row.prop(context.scene.gp_tree, "show_stats", icon='TRIANGLE_DOWN' if show_stats else 'TRIANGLE_RIGHT',
+                 emboss=False)
+
+        if show_stats:
+            row.prop(context.scene.gp_tree, "log_stats")
+
+            lines = ops.last_stats.summary()
+            if not lines:
+                row = box.row(align=True)
+                row.label(text='Generate a tree to record its stats')
+            for label, text in lines:
+                row = box.row(align=True)
+                row.label(text=label)
+                row.label(text=text)
+
+        # FOREST
+
+        box = layout.box()
+        row = box.row(align=True)
+        row.label(text='Forest')
+
+        row = box.row(align=True)
+        row.prop(context.scene.gp_tree, "forest_count")
+
+        row = box.row(align=True)
+        row.prop(context.scene.gp_tree, "forest_area")
+
+        row = box.row(align=True)
+        row.prop(context.scene.gp_tree, "forest_competition")
+
+        row = box.row(align=True)
+        row.enabled = not context.scene.gp_tree.forest_competition
+        row.prop(context.scene.gp_tree, "forest_archetypes")
+
+        row = box.row(align=True)
+        row.enabled = context.scene.gp_tree.forest_archetypes > 0 and not context.scene.gp_tree.forest_competition
+        row.prop(context.scene.gp_tree, "forest_scale_min")
+        row.prop(context.scene.gp_tree, "forest_scale_max")
+
+        row = box.row(align=True)
+        row.prop(context.scene.gp_tree, "forest_n_leaves_min")
+        row.prop(context.scene.gp_tree, "forest_n_leaves_max")
+
+        row = box.row(align=True)
+        row.prop(context.scene.gp_tree, "forest_crown_radius_min")
+        row.prop(context.scene.gp_tree, "forest_crown_radius_max")
+
+        row = box.row(align=True)
+        row.prop(context.scene.gp_tree, "forest_trunk_length_min")
+        row.prop(context.scene.gp_tree, "forest_trunk_length_max")
+
+        row = box.row(align=True)
+        row.scale_y = 1.4
+        row.operator('gp_tree.generate_forest', text='New forest', icon='OUTLINER_COLLECTION')
+
 
 # REGISTER
 
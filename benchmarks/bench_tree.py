@@ -0,0 +1,271 @@
+"""
+Benchmarks of the tree growth and drawing phases.
+
+Plain Python (growth phases only):
+    python benchmarks/bench_tree.py --output results.json
+
+Inside Blender (growth and drawing phases):
+    blender --background --python benchmarks/bench_tree.py -- --output results.json
+
+Compare with a previous run (exit code 1 if any phase is slower than the threshold):
+    python benchmarks/bench_tree.py --output new.json --baseline results.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+import platform
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from GP_Tree_Addon.SC_Algorithm.vector import BACKEND
+from GP_Tree_Addon.SC_Algorithm.growth import ALGORITHM_VERSION, new_tree
+
+try:
+    import bpy
+    from GP_Tree_Addon import ops
+except ImportError:
+    # Outside Blender: the drawing phases are skipped
+    bpy = None
+    ops = None
+
+
+# Benchmark grid
+N_LEAVES = (50, 150, 300)
+TREE_TYPES = ("ROUNDED", "ELLIPSE", "DOUBLE")
+TRUNK_LENGTHS = (1.0, 1.6, 2.5)
+TREE_CROWN_RADIUS = 0.7
+MAX_THICKNESS = 50
+
+
+def get_cases(args):
+    """
+    :param args: command line arguments
+    :return:
+    list cases: new_tree parameters of every benchmark case
+    """
+    cases = []
+    for n_leaves in args.n_leaves:
+        for tree_type in args.tree_types:
+            for trunk_length in args.trunk_lengths:
+                for seed in args.seeds:
+                    cases.append({
+                        "engine": args.engine,
+                        "n_leaves": n_leaves,
+                        "tree_crown_radius": min(TREE_CROWN_RADIUS, trunk_length),
+                        "trunk_length": trunk_length,
+                        "tree_type": tree_type,
+                        "max_thickness": MAX_THICKNESS,
+                        "seed": seed
+                    })
+    return cases
+
+
+def case_name(params):
+    return "n_leaves={n_leaves} tree_type={tree_type} trunk_length={trunk_length} seed={seed}".format(**params)
+
+
+def remove_gp_object(gp_object):
+    """
+    Remove a gp object created by the benchmark (and its data), so the runs don't pile up.
+    """
+    gp_data = gp_object.data
+    bpy.data.objects.remove(gp_object, do_unlink=True)
+    bpy.data.grease_pencils.remove(gp_data)
+
+
+def run_case(params, draw_modes=()):
+    """
+    Time every phase of a tree once.
+
+    :param dict params: new_tree parameters
+    :param draw_modes: draw_tree modes to time (only inside Blender)
+    :return:
+    dict timings: seconds spent on every phase
+    int n_branches: number of branches of the grown tree
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    tree = new_tree(**params)
+    timings["crown"] = time.perf_counter() - start
+
+    # The first growth step is the trunk, the rest are the iterations of generate_tree
+    steps = tree.grow()
+    start = time.perf_counter()
+    next(steps)
+    timings["create_trunk"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in steps:
+        pass
+    timings["generate_tree"] = time.perf_counter() - start
+
+    if ops is not None:
+        for draw_mode in draw_modes:
+            start = time.perf_counter()
+            gp_object = ops.draw_tree(tree=tree, frame=0, draw_mode=draw_mode)
+            timings["draw_tree[{}]".format(draw_mode)] = time.perf_counter() - start
+            remove_gp_object(gp_object)
+
+        for pack_leaves in (False, True):
+            start = time.perf_counter()
+            gp_object = ops.draw_leaves(tree=tree, frame=0, pack_leaves=pack_leaves)
+            timings["draw_leaves[packed]" if pack_leaves else "draw_leaves"] = time.perf_counter() - start
+            remove_gp_object(gp_object)
+
+    return timings, len(tree.branches)
+
+
+def measure_memory(params):
+    """
+    Grow a tree once while tracing the Python allocations (slower, so it's not timed).
+
+    :param dict params: new_tree parameters
+    :return:
+    int peak_memory: peak memory allocated while growing the tree, in bytes
+    """
+    tracemalloc.start()
+    try:
+        tree = new_tree(**params)
+        tree.generate_tree()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak_memory
+
+
+def run_benchmarks(args):
+    """
+    Run every case args.repeat times, keeping the best and the median time of every phase.
+
+    :param args: command line arguments
+    :return:
+    dict results: benchmark results (JSON serializable)
+    """
+    cases = get_cases(args)
+    results = []
+
+    # Warm up (imports, first allocations) before timing anything
+    if cases:
+        run_case(cases[0], draw_modes=args.draw_modes)
+
+    for params in cases:
+        runs = []
+        n_branches = 0
+        for _ in range(args.repeat):
+            timings, n_branches = run_case(params, draw_modes=args.draw_modes)
+            runs.append(timings)
+
+        phases = {}
+        for phase in runs[0]:
+            values = [timings[phase] for timings in runs]
+            phases[phase] = {"min": min(values), "median": statistics.median(values)}
+
+        result = {"case": case_name(params), "params": params, "n_branches": n_branches, "phases": phases}
+        if args.memory:
+            result["peak_memory"] = measure_memory(params)
+        results.append(result)
+
+        if not args.quiet:
+            print("{:<60} {}{}".format(case_name(params), "  ".join(
+                "{}={:.4f}".format(phase, times["min"]) for phase, times in phases.items()),
+                "  peak_memory={:.1f}MB".format(result["peak_memory"] / 2 ** 20) if args.memory else ""))
+
+    return {
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "blender": bpy.app.version_string if bpy is not None else None,
+            "vector_backend": BACKEND,
+            "engine": args.engine,
+            "algorithm_version": ALGORITHM_VERSION,
+            "repeat": args.repeat
+        },
+        "results": results
+    }
+
+
+def compare(results, baseline, threshold=0.2, min_delta=0.001):
+    """
+    Compare the best times of every case and phase with a baseline run.
+
+    :param dict results: benchmark results
+    :param dict baseline: benchmark results used as reference
+    :param float threshold: relative slowdown flagged as a regression (0.2 = 20% slower)
+    :param float min_delta: smaller slowdowns (in seconds) are ignored as noise
+    :return:
+    list regressions: (case, phase, baseline time, new time) of every regression
+    list changes: cases whose grown tree is different (number of branches)
+    """
+    reference = {result["case"]: result for result in baseline["results"]}
+    regressions = []
+    changes = []
+
+    for result in results["results"]:
+        old_result = reference.get(result["case"])
+        if old_result is None:
+            continue
+        if old_result["n_branches"] != result["n_branches"]:
+            changes.append(result["case"])
+
+        for phase, times in result["phases"].items():
+            if phase not in old_result["phases"]:
+                continue
+            old_time = old_result["phases"][phase]["min"]
+            new_time = times["min"]
+            if new_time - old_time > max(min_delta, old_time * threshold):
+                regressions.append((result["case"], phase, old_time, new_time))
+
+    return regressions, changes
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Tree growth and drawing benchmarks")
+    parser.add_argument("--output", help="JSON file where the results are saved")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown flagged as regression")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case (the best one is compared)")
+    parser.add_argument("--engine", default="OBJECT", choices=("OBJECT", "NUMPY", "LARGE"))
+    parser.add_argument("--n-leaves", type=int, nargs="+", default=N_LEAVES)
+    parser.add_argument("--tree-types", nargs="+", default=TREE_TYPES)
+    parser.add_argument("--trunk-lengths", type=float, nargs="+", default=TRUNK_LENGTHS)
+    parser.add_argument("--seeds", type=int, nargs="+", default=(0,))
+    parser.add_argument("--draw-modes", nargs="+", default=("BULK",), choices=("BULK", "CHAINS", "PER_BRANCH"))
+    parser.add_argument("--memory", action="store_true", help="also measure the peak memory of every growth")
+    parser.add_argument("--quiet", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main():
+    # Blender passes its own arguments, the benchmark ones go after "--"
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    args = parse_args(argv)
+
+    results = run_benchmarks(args)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions, changes = compare(results, baseline, threshold=args.threshold)
+
+        for case in changes:
+            print("CHANGED     {}: the grown tree is different".format(case))
+        for case, phase, old_time, new_time in regressions:
+            print("REGRESSION  {} {}: {:.4f}s -> {:.4f}s (+{:.0%})".format(
+                case, phase, old_time, new_time, new_time / old_time - 1 if old_time > 0 else 0))
+        if regressions:
+            sys.exit(1)
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()